@@ -1,33 +1,78 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
 from typing import Optional
 import os
-from dotenv import load_dotenv
+from indexes import ensure_indexes, find_collscans
+from metrics import mongo_command_metrics, mongo_pool_metrics
+from resources import resources
+import logging
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-class Database:
-    client: Optional[AsyncIOMotorClient] = None
-    db: Optional[AsyncIOMotorDatabase] = None
+def _int_env(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value else default
 
-db_instance = Database()
+def client_options() -> dict:
+    """Pool, timeout and compression settings for the Mongo client"""
+    options = {
+        "maxPoolSize": _int_env('MONGO_MAX_POOL_SIZE', 100),
+        "minPoolSize": _int_env('MONGO_MIN_POOL_SIZE', 0),
+        "maxIdleTimeMS": _int_env('MONGO_MAX_IDLE_TIME_MS', None),
+        "waitQueueTimeoutMS": _int_env('MONGO_WAIT_QUEUE_TIMEOUT_MS', 5000),
+        "serverSelectionTimeoutMS": _int_env('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000),
+        "event_listeners": [mongo_command_metrics, mongo_pool_metrics],
+    }
+    # e.g. "zstd,snappy,zlib"; zstd and snappy need their python packages
+    compressors = os.environ.get('MONGO_COMPRESSORS')
+    if compressors:
+        options["compressors"] = compressors
+    return {key: value for key, value in options.items() if value is not None}
+
+def read_only_preference():
+    """
+    Read preference for endpoints that tolerate slightly stale data
+    Defaults to secondaryPreferred, which falls back to the primary on a
+    standalone server or when no secondary is available
+    """
+    mode = read_pref_mode_from_name(os.environ.get('MONGO_READ_ONLY_PREFERENCE', 'secondaryPreferred'))
+    max_staleness = _int_env('MONGO_MAX_STALENESS_SECONDS', -1)
+    return make_read_preference(mode, None, max_staleness)
 
 async def connect_to_mongo():
-    """Connect to MongoDB"""
+    """
+    Connect to MongoDB and store the handles on the process resources
+    Pings the server and applies missing indexes, so a worker fails fast on a
+    bad connection instead of on its first request
+    """
     mongo_url = os.environ.get('MONGO_URL', os.environ.get('MONGODB_URI'))
     db_name = os.environ.get('DB_NAME', 'zenchair')
     
-    db_instance.client = AsyncIOMotorClient(mongo_url)
-    db_instance.db = db_instance.client[db_name]
+    resources.client = AsyncIOMotorClient(mongo_url, **client_options())
+    resources.db = resources.client[db_name]
+    resources.read_db = resources.client.get_database(
+        db_name, read_preference=read_only_preference()
+    )
+    
+    await resources.client.admin.command('ping')
+    
+    # Idempotent: only missing indexes are built
+    await ensure_indexes(resources.db)
+    
+    # Optionally verify that every known query shape is index-backed
+    if os.environ.get('CHECK_QUERY_PLANS', '').lower() in ('1', 'true', 'yes'):
+        for offender in await find_collscans(resources.db):
+            logger.warning(f"COLLSCAN: {offender}")
     
-    # Indexes already exist from previous runs, skip recreation
-    print(f"✅ Connected to MongoDB: {db_name}")
+    logger.info(f"Connected to MongoDB: {db_name}")
 
 async def close_mongo_connection():
     """Close MongoDB connection"""
-    if db_instance.client:
-        db_instance.client.close()
-        print("❌ Disconnected from MongoDB")
+    if resources.client:
+        resources.client.close()
+        resources.client = resources.db = resources.read_db = None
+        logger.info("Disconnected from MongoDB")
 
 def get_database() -> AsyncIOMotorDatabase:
-    """Get database instance"""
-    return db_instance.db
+    """Database handle for code running outside a request"""
+    return resources.db
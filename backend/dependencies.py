@@ -2,15 +2,38 @@ from fastapi import HTTPException, status, Request
 from typing import Optional
 from datetime import datetime, timezone
 import os
-from database import get_database
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from models import User
+from resources import Resources
+
+# Resources opened by the app lifespan (see resources.py); async so FastAPI
+# resolves them inline instead of in its threadpool
+
+async def get_resources(request: Request) -> Resources:
+    """Process resources for this app"""
+    return request.app.state.resources
+
+async def get_db(request: Request) -> AsyncIOMotorDatabase:
+    """Primary database handle"""
+    return request.app.state.resources.db
+
+async def get_read_db(request: Request) -> AsyncIOMotorDatabase:
+    """Database handle for read-only endpoints; may read from secondaries"""
+    resources = request.app.state.resources
+    if resources.read_db is None:
+        return resources.db
+    return resources.read_db
 
 async def get_current_user(request: Request) -> User:
     """
     Get current user from session token
     Checks cookies first, then Authorization header
+    Resolved once per request and served from the session cache when warm
     """
-    db = get_database()
+    # Several auth checks in one request resolve once
+    cached_user = getattr(request.state, "current_user", None)
+    if cached_user is not None:
+        return cached_user
     
     # Check cookies first
     session_token = request.cookies.get("session_token")
@@ -27,6 +50,27 @@ async def get_current_user(request: Request) -> User:
             detail="Not authenticated"
         )
     
+    user_doc = await resolve_session_token(session_token, request.app.state.resources)
+    
+    user = User.from_db(user_doc)
+    request.state.current_user = user
+    return user
+
+async def resolve_session_token(session_token: str, resources: Resources) -> dict:
+    """
+    Return the user document for a session token
+    Served from the session cache when warm; raises HTTPException otherwise
+    if the session is missing, expired or its user is gone
+    """
+    user_doc = resources.session_cache.get(session_token)
+    if user_doc is None:
+        user_doc = await _load_session_user(session_token, resources)
+    return user_doc
+
+async def _load_session_user(session_token: str, resources: Resources) -> dict:
+    """Resolve a session token against Mongo and cache the result"""
+    db = resources.db
+    
     # Find session
     session = await db.user_sessions.find_one({
         "session_token": session_token
@@ -60,7 +104,8 @@ async def get_current_user(request: Request) -> User:
             detail="User not found"
         )
     
-    return User(**user_doc)
+    resources.session_cache.put(session_token, user_doc, expires_at)
+    return user_doc
 
 async def get_current_barber(request: Request) -> User:
     """Get current user and verify they are a barber"""
@@ -0,0 +1,98 @@
+# Shared async HTTP client
+# One pooled httpx.AsyncClient is opened at startup and reused for every
+# outbound call, so connections to auth providers stay alive between
+# requests. Each host gets its own concurrency limit, and idempotent calls
+# are retried with exponential backoff on transport errors and 5xx/429.
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import asyncio
+import logging
+import os
+import random
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_PER_HOST_LIMIT = int(os.environ.get("HTTP_PER_HOST_LIMIT", "20"))
+HTTP_TIMEOUT_SECONDS = float(os.environ.get("HTTP_TIMEOUT_SECONDS", "10"))
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", "2"))
+HTTP_BACKOFF_SECONDS = float(os.environ.get("HTTP_BACKOFF_SECONDS", "0.2"))
+
+RETRY_STATUSES = {429, 502, 503, 504}
+# A retried POST could charge or send twice; callers opt in with retries=
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+
+
+class HttpClient:
+    """Pooled async HTTP client with per-host limits and retries"""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+
+    async def start(self):
+        """Open the connection pool"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=HTTP_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE
+                )
+            )
+
+    async def close(self):
+        """Close the connection pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        # Semaphores belong to the loop they were used on
+        self._host_slots = {}
+
+    def _slots_for(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        slots = self._host_slots.get(host)
+        if slots is None:
+            slots = self._host_slots[host] = asyncio.Semaphore(HTTP_PER_HOST_LIMIT)
+        return slots
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        retries: Optional[int] = None,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Send a request, retrying transient failures with backoff
+        Only idempotent methods are retried unless retries is given
+        """
+        if self._client is None:
+            await self.start()
+        if retries is None:
+            retries = HTTP_RETRIES if method.upper() in IDEMPOTENT_METHODS else 0
+
+        attempt = 0
+        while True:
+            try:
+                async with self._slots_for(url):
+                    response = await self._client.request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    return response
+            except httpx.TransportError:
+                if attempt >= retries:
+                    raise
+
+            attempt += 1
+            delay = HTTP_BACKOFF_SECONDS * (2 ** (attempt - 1))
+            delay += random.uniform(0, delay)
+            logger.warning(f"Retrying {method} {url} in {delay:.2f}s (attempt {attempt})")
+            await asyncio.sleep(delay)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+
+http_client = HttpClient()
@@ -0,0 +1,162 @@
+# Declarative index registry and query-plan checker
+# INDEXES lists every index the app relies on; ensure_indexes applies them
+# idempotently at startup (create_indexes is a no-op for existing ones).
+# QUERY_SHAPES mirrors the filters and sorts issued by the routes, and
+# find_collscans explains each one so a missing index shows up as a COLLSCAN
+# in tests or at startup rather than as a slow endpoint in production.
+from typing import Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, IndexModel
+from pymongo.errors import OperationFailure
+from services.notifications import NOTIFICATION_OUTBOX_TTL_SECONDS
+import logging
+
+logger = logging.getLogger(__name__)
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel(
+            [("email", ASCENDING)],
+            name="email_unique",
+            unique=True,
+            partialFilterExpression={"email": {"$type": "string"}}
+        ),
+        IndexModel([("username", ASCENDING)], name="username"),
+    ],
+    "user_sessions": [
+        IndexModel([("session_token", ASCENDING)], name="session_token_unique", unique=True),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "barber_shops": [
+        IndexModel([("barber_id", ASCENDING)], name="barber_id"),
+        IndexModel([("city_normalized", ASCENDING), ("_id", ASCENDING)], name="city_normalized"),
+        IndexModel([("geo", GEOSPHERE)], name="geo_2dsphere"),
+    ],
+    "services": [
+        IndexModel(
+            [("shop_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)],
+            name="shop_created"
+        ),
+    ],
+    "products": [
+        IndexModel(
+            [("shop_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)],
+            name="shop_created"
+        ),
+    ],
+    "bookings": [
+        IndexModel(
+            [("shop_id", ASCENDING), ("date", ASCENDING), ("status", ASCENDING)],
+            name="shop_date_status"
+        ),
+        IndexModel(
+            [("shop_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="shop_created"
+        ),
+        IndexModel(
+            [("customer_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="customer_created"
+        ),
+        IndexModel([("shop_id", ASCENDING), ("version", ASCENDING)], name="shop_version"),
+        IndexModel(
+            [("shop_id", ASCENDING), ("updated_at", ASCENDING), ("_id", ASCENDING)],
+            name="shop_updated"
+        ),
+    ],
+    "reviews": [
+        IndexModel(
+            [("shop_id", ASCENDING), ("customer_id", ASCENDING)],
+            name="shop_customer"
+        ),
+        IndexModel(
+            [("shop_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="shop_created"
+        ),
+    ],
+    "subscriptions": [
+        IndexModel([("barber_id", ASCENDING), ("status", ASCENDING)], name="barber_status"),
+    ],
+    "slot_locks": [
+        IndexModel([("booking_id", ASCENDING)], name="booking_id"),
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "notification_outbox": [
+        IndexModel([("shop_id", ASCENDING), ("seq", ASCENDING)], name="shop_seq", unique=True),
+        IndexModel(
+            [("pending", ASCENDING), ("created_at", ASCENDING)],
+            name="pending_created",
+            partialFilterExpression={"pending": True}
+        ),
+        IndexModel(
+            [("created_at", ASCENDING)],
+            name="created_at_ttl",
+            expireAfterSeconds=NOTIFICATION_OUTBOX_TTL_SECONDS
+        ),
+    ],
+}
+
+# (collection, filter, sort) for every hot query the routes issue
+QUERY_SHAPES = [
+    ("users", {"email": "x"}, None),
+    ("users", {"username": "x"}, None),
+    ("user_sessions", {"session_token": "x"}, None),
+    ("barber_shops", {"barber_id": "x"}, None),
+    ("barber_shops", {"city_normalized": {"$regex": "^x"}}, [("_id", ASCENDING)]),
+    ("services", {"shop_id": "x"}, [("created_at", ASCENDING), ("_id", ASCENDING)]),
+    ("products", {"shop_id": "x"}, [("created_at", ASCENDING), ("_id", ASCENDING)]),
+    ("bookings", {"shop_id": "x"}, [("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ("bookings", {"shop_id": "x", "date": {"$gte": "x"}}, [("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ("bookings", {"shop_id": "x", "date": "x", "status": {"$in": ["pending", "confirmed"]}}, None),
+    ("bookings", {"customer_id": "x"}, [("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ("bookings", {"shop_id": "x", "version": {"$gt": 0}}, [("version", ASCENDING)]),
+    ("bookings", {"shop_id": "x", "updated_at": {"$gt": 0}}, [("updated_at", ASCENDING), ("_id", ASCENDING)]),
+    ("reviews", {"shop_id": "x"}, [("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ("reviews", {"shop_id": "x", "customer_id": "x"}, None),
+    ("subscriptions", {"barber_id": "x", "status": "active"}, None),
+    ("slot_locks", {"booking_id": "x"}, None),
+    ("notification_outbox", {"shop_id": "x", "seq": {"$gt": 0}}, [("seq", ASCENDING)]),
+    ("notification_outbox", {"pending": True, "created_at": {"$lt": 0}}, [("created_at", ASCENDING)]),
+]
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase):
+    """Create every registered index that does not exist yet"""
+    for collection, indexes in INDEXES.items():
+        try:
+            await db[collection].create_indexes(indexes)
+        except OperationFailure as e:
+            # Existing data may violate a constraint; keep starting up
+            logger.error(f"Index creation failed on {collection}: {e}")
+
+
+def _stages(plan: dict):
+    yield plan.get("stage")
+    for key in ("inputStage", "outerStage", "innerStage"):
+        if key in plan:
+            yield from _stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _stages(child)
+
+
+async def explain_query(
+    db: AsyncIOMotorDatabase,
+    collection: str,
+    query: dict,
+    sort: Optional[list] = None
+) -> dict:
+    """Return the queryPlanner output for a find"""
+    command = {"find": collection, "filter": query}
+    if sort:
+        command["sort"] = dict(sort)
+    return await db.command("explain", command, verbosity="queryPlanner")
+
+
+async def find_collscans(db: AsyncIOMotorDatabase) -> List[str]:
+    """Explain every known query shape and list those that scan a collection"""
+    offenders = []
+    for collection, query, sort in QUERY_SHAPES:
+        explanation = await explain_query(db, collection, query, sort)
+        winning_plan = explanation["queryPlanner"]["winningPlan"]
+        if "COLLSCAN" in _stages(winning_plan.get("queryPlan", winning_plan)):
+            offenders.append(f"{collection} {query} sort={sort}")
+    return offenders
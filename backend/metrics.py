@@ -0,0 +1,334 @@
+# In-process metrics in Prometheus text format
+# Request latency comes from MetricsMiddleware (labelled by route template, so
+# /api/bookings/{booking_id} is one series), Mongo timings from a pymongo
+# command listener registered on the client. GET /metrics renders the
+# registry. Requests and commands slower than HTTP_SLOW_REQUEST_MS /
+# MONGO_SLOW_QUERY_MS are also logged as warnings. A pool listener tracks
+# open and checked-out connections, waiters and check-out wait time.
+#
+# Command listeners run on Motor's worker threads, so every metric guards
+# its series with a lock.
+from typing import Dict, Iterable, List, Optional, Tuple
+from pymongo import monitoring
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+HTTP_SLOW_REQUEST_MS = float(os.environ.get("HTTP_SLOW_REQUEST_MS", "500"))
+MONGO_SLOW_QUERY_MS = float(os.environ.get("MONGO_SLOW_QUERY_MS", "100"))
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.label_names, labels)} {value}" for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: LabelValues = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+    def set(self, labels: LabelValues, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = buckets
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, labels: LabelValues, value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        lines = self.header()
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def counter(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route", "status")
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served", ("method",)
+)
+mongo_command_duration = registry.histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency", ("collection", "command")
+)
+mongo_documents_returned = registry.counter(
+    "mongo_documents_returned_total", "Documents returned by MongoDB commands", ("collection", "command")
+)
+mongo_command_failures = registry.counter(
+    "mongo_command_failures_total", "Failed MongoDB commands", ("collection", "command")
+)
+mongo_pool_connections = registry.gauge(
+    "mongo_pool_connections", "Open connections in the MongoDB pool", ("address",)
+)
+mongo_pool_checked_out = registry.gauge(
+    "mongo_pool_checked_out", "Connections currently checked out of the pool", ("address",)
+)
+mongo_pool_waiters = registry.gauge(
+    "mongo_pool_waiters", "Operations waiting to check out a connection", ("address",)
+)
+mongo_pool_wait_duration = registry.histogram(
+    "mongo_pool_wait_seconds", "Time spent waiting to check out a connection", ("address",)
+)
+mongo_pool_checkout_failures = registry.counter(
+    "mongo_pool_checkout_failures_total", "Failed connection check-outs", ("address", "reason")
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency and in-flight requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        # The route is only known once the router has run, so in-flight
+        # requests are counted per method
+        http_requests_in_flight.inc((method,))
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec((method,))
+            # The router stores the matched route in the shared scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            http_request_duration.observe((method, route, str(status_code)), elapsed)
+            if elapsed * 1000 >= HTTP_SLOW_REQUEST_MS:
+                logger.warning("Slow request", extra={
+                    "event": "http.slow", "method": method, "route": route,
+                    "status": status_code, "duration_ms": round(elapsed * 1000, 1)
+                })
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Per-collection, per-command timings and document counts"""
+
+    def __init__(self):
+        self._pending: Dict[Tuple, Tuple[str, Optional[dict]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(event) -> Tuple:
+        return (event.connection_id, event.request_id, event.operation_id)
+
+    def started(self, event):
+        command = event.command
+        collection = command.get(event.command_name)
+        if not isinstance(collection, str):
+            # getMore names the collection separately; admin commands have none
+            collection = command.get("collection", "")
+        with self._lock:
+            self._pending[self._key(event)] = (collection, command.get("filter"))
+
+    def _finish(self, event) -> Tuple[str, Optional[dict]]:
+        with self._lock:
+            return self._pending.pop(self._key(event), ("", None))
+
+    def succeeded(self, event):
+        collection, query_filter = self._finish(event)
+        labels = (collection, event.command_name)
+        duration = event.duration_micros / 1_000_000
+        mongo_command_duration.observe(labels, duration)
+
+        reply = event.reply
+        cursor = reply.get("cursor")
+        if cursor:
+            returned = len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+        elif event.command_name == "count":
+            returned = reply.get("n", 0)
+        else:
+            returned = 0
+        if returned:
+            mongo_documents_returned.inc(labels, returned)
+
+        if duration * 1000 >= MONGO_SLOW_QUERY_MS:
+            logger.warning("Slow Mongo command", extra={
+                "event": "mongo.slow", "collection": collection, "command": event.command_name,
+                "duration_ms": round(duration * 1000, 1), "documents": returned,
+                "filter_keys": sorted(query_filter) if isinstance(query_filter, dict) else None
+            })
+
+    def failed(self, event):
+        collection, _ = self._finish(event)
+        labels = (collection, event.command_name)
+        mongo_command_duration.observe(labels, event.duration_micros / 1_000_000)
+        mongo_command_failures.inc(labels)
+
+
+mongo_command_metrics = MongoCommandMetrics()
+
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool occupancy, waiters and check-out wait time"""
+
+    def __init__(self):
+        # Check-out started and finished fire on the same thread
+        self._local = threading.local()
+
+    @staticmethod
+    def _address(event) -> Tuple[str]:
+        host, port = event.address
+        return (f"{host}:{port}",)
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+        mongo_pool_waiters.inc(self._address(event))
+
+    def _check_out_done(self, event):
+        labels = self._address(event)
+        mongo_pool_waiters.dec(labels)
+        started = getattr(self._local, "started", None)
+        if started is not None:
+            mongo_pool_wait_duration.observe(labels, time.perf_counter() - started)
+            self._local.started = None
+
+    def connection_checked_out(self, event):
+        self._check_out_done(event)
+        mongo_pool_checked_out.inc(self._address(event))
+
+    def connection_check_out_failed(self, event):
+        self._check_out_done(event)
+        mongo_pool_checkout_failures.inc(self._address(event) + (str(event.reason),))
+
+    def connection_checked_in(self, event):
+        mongo_pool_checked_out.dec(self._address(event))
+
+    def connection_created(self, event):
+        mongo_pool_connections.inc(self._address(event))
+
+    def connection_closed(self, event):
+        mongo_pool_connections.dec(self._address(event))
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+
+mongo_pool_metrics = MongoPoolMetrics()
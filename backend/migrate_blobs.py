@@ -0,0 +1,85 @@
+"""
+Move inline base64 images into the blob store
+
+Streams barber_shops (gallery_images) and products (image) with a cursor,
+uploads every inline image to the blob store and rewrites the documents with
+blob references in bulk batches. Documents that already hold only references
+are skipped, so the tool can be re-run safely.
+
+Usage: python migrate_blobs.py [--batch-size 100] [--dry-run]
+"""
+from dotenv import load_dotenv
+from pathlib import Path
+from pymongo import UpdateOne
+import argparse
+import asyncio
+
+load_dotenv(Path(__file__).parent / '.env')
+
+from database import connect_to_mongo, close_mongo_connection, get_database
+from services.blob_store import InvalidBlob, store_image
+
+# Inline images are strings that are not already references
+INLINE_GALLERY = {"gallery_images": {"$elemMatch": {"$not": {"$regex": "^/api/blobs/"}}}}
+INLINE_IMAGE = {"image": {"$type": "string", "$not": {"$regex": "^/api/blobs/"}}}
+
+async def _flush(collection, operations):
+    if operations:
+        await collection.bulk_write(operations, ordered=False)
+    return len(operations)
+
+async def migrate_collection(collection, query, rewrite, batch_size, dry_run):
+    """Rewrite every document matching query; returns the number updated"""
+    migrated = 0
+    operations = []
+
+    cursor = collection.find(query).batch_size(batch_size)
+    async for doc in cursor:
+        if dry_run:
+            migrated += 1
+            continue
+
+        try:
+            update = await rewrite(doc)
+        except InvalidBlob as e:
+            print(f"⚠️ Skipping {doc['_id']}: {e}")
+            continue
+
+        operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": update}))
+
+        if len(operations) >= batch_size:
+            migrated += await _flush(collection, operations)
+            operations = []
+
+    migrated += await _flush(collection, operations)
+    return migrated
+
+async def _rewrite_gallery(shop):
+    return {"gallery_images": [await store_image(image) for image in shop["gallery_images"]]}
+
+async def _rewrite_product_image(product):
+    return {"image": await store_image(product["image"])}
+
+async def main(batch_size: int, dry_run: bool):
+    await connect_to_mongo()
+    db = get_database()
+
+    try:
+        shops = await migrate_collection(
+            db.barber_shops, INLINE_GALLERY, _rewrite_gallery, batch_size, dry_run
+        )
+        print(f"✅ Shops migrated: {shops}")
+
+        products = await migrate_collection(
+            db.products, INLINE_IMAGE, _rewrite_product_image, batch_size, dry_run
+        )
+        print(f"✅ Products migrated: {products}")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.dry_run))
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, ConfigDict, Field, EmailStr
 from typing import List, Optional
 from datetime import datetime
 from enum import Enum
@@ -18,8 +18,18 @@ class User(BaseModel):
     username: Optional[str] = None  # For username-based login
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
-    class Config:
-        populate_by_name = True
+    model_config = ConfigDict(populate_by_name=True)
+    
+    @classmethod
+    def from_db(cls, doc: dict) -> "User":
+        """
+        Build a User from a users document without validating it
+        Only for documents this app wrote itself (e.g. on every authenticated
+        request); anything client-supplied still goes through validation
+        """
+        user = cls.model_construct(**doc)
+        user.role = UserRole(user.role)
+        return user
 
 class UserSession(BaseModel):
     user_id: str
@@ -47,17 +57,18 @@ class BarberShop(BaseModel):
     location: Location
     phone: str
     email: EmailStr
-    rating: float = 0.0
-    total_reviews: int = 0
-    gallery_images: List[str] = []  # base64 encoded images
+    rating: float = 0.0  # derived: round(rating_sum / rating_count, 1)
+    total_reviews: int = 0  # derived: rating_count
+    rating_sum: int = 0
+    rating_count: int = 0
+    gallery_images: List[str] = []  # blob references ("/api/blobs/<sha256>")
     working_hours: List[WorkingHours] = []
     is_open: bool = True
     vacation_dates: List[str] = []  # ["2025-01-15", "2025-01-16"]
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
-    class Config:
-        populate_by_name = True
+    model_config = ConfigDict(populate_by_name=True)
 
 class Service(BaseModel):
     id: Optional[str] = Field(default=None, alias="_id")
@@ -68,8 +79,7 @@ class Service(BaseModel):
     duration: int  # in minutes
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
-    class Config:
-        populate_by_name = True
+    model_config = ConfigDict(populate_by_name=True)
 
 class Product(BaseModel):
     id: Optional[str] = Field(default=None, alias="_id")
@@ -77,12 +87,11 @@ class Product(BaseModel):
     name: str
     description: str
     price: float  # in ILS
-    image: Optional[str] = None  # base64 encoded
+    image: Optional[str] = None  # blob reference ("/api/blobs/<sha256>")
     quantity: int = 0
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
-    class Config:
-        populate_by_name = True
+    model_config = ConfigDict(populate_by_name=True)
 
 class BookingStatus(str, Enum):
     PENDING = "pending"
@@ -99,14 +108,15 @@ class Booking(BaseModel):
     product_ids: List[str] = []
     date: str  # "2025-01-15"
     time: str  # "10:00"
+    start_minute: Optional[int] = None  # minutes since midnight
+    end_minute: Optional[int] = None  # start + summed service durations
     status: BookingStatus = BookingStatus.PENDING
     total_price: float
     notes: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
-    class Config:
-        populate_by_name = True
+    model_config = ConfigDict(populate_by_name=True)
 
 class Review(BaseModel):
     id: Optional[str] = Field(default=None, alias="_id")
@@ -115,9 +125,9 @@ class Review(BaseModel):
     rating: int  # 1-5
     comment: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: Optional[datetime] = None
     
-    class Config:
-        populate_by_name = True
+    model_config = ConfigDict(populate_by_name=True)
 
 class SubscriptionStatus(str, Enum):
     ACTIVE = "active"
@@ -138,5 +148,4 @@ class Subscription(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
-    class Config:
-        populate_by_name = True
+    model_config = ConfigDict(populate_by_name=True)
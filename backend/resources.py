@@ -0,0 +1,43 @@
+# Per-process resources: connections, caches and background tasks opened by the app lifespan
+from typing import List, Optional
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from http_client import HttpClient, http_client
+from session_cache import SessionCache, session_cache
+from services.availability import AvailabilityIndex, availability_index
+from services.notifications import NotificationDispatcher, notification_dispatcher
+from services.passwords import PasswordHasher, password_hasher
+from services.shop_page import ShopPageCache, shop_page_cache
+import asyncio
+
+
+class Resources:
+    """Container for the process's connections, caches and background tasks"""
+
+    def __init__(self):
+        self.client: Optional[AsyncIOMotorClient] = None
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        # Same database, reading with MONGO_READ_ONLY_PREFERENCE
+        self.read_db: Optional[AsyncIOMotorDatabase] = None
+        self.http_client: HttpClient = http_client
+        self.password_hasher: PasswordHasher = password_hasher
+        self.session_cache: SessionCache = session_cache
+        self.shop_page_cache: ShopPageCache = shop_page_cache
+        self.availability_index: AvailabilityIndex = availability_index
+        self.notifications: NotificationDispatcher = notification_dispatcher
+        self.tasks: List[asyncio.Task] = []
+        self.ready = False
+
+    def start_task(self, coro) -> asyncio.Task:
+        """Run a background coroutine for the lifetime of the process"""
+        task = asyncio.create_task(coro)
+        self.tasks.append(task)
+        return task
+
+    async def stop_tasks(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+
+resources = Resources()
@@ -0,0 +1,38 @@
+# JSON responses for Mongo documents
+# MongoJSONResponse encodes with orjson, which handles datetimes (as ISO 8601,
+# like jsonable_encoder) and other native types in C. It is the app's default
+# response class, but FastAPI still runs jsonable_encoder over whatever a
+# route returns; routes that return large lists of documents skip that walk
+# by returning mongo_json(...) themselves.
+from typing import Any, Optional
+from bson import ObjectId
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+import orjson
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any):
+    # Anything orjson cannot encode natively (ObjectId, Decimal, models, ...)
+    if isinstance(value, ObjectId):
+        return str(value)
+    return jsonable_encoder(value)
+
+
+class MongoJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+def mongo_json(content: Any, response: Optional[Response] = None) -> MongoJSONResponse:
+    """
+    Encode content directly, bypassing jsonable_encoder
+    Headers set on the route's injected Response (e.g. X-Next-Cursor) are
+    carried over, since FastAPI ignores it when a Response is returned
+    """
+    headers = dict(response.headers) if response is not None else None
+    return MongoJSONResponse(content, headers=headers)
@@ -1,13 +1,14 @@
-from fastapi import APIRouter, HTTPException, Response, Header, status
+from fastapi import APIRouter, Depends, HTTPException, Response, Header, status
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 from datetime import datetime, timezone, timedelta
-from database import get_database
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from dependencies import get_db, get_resources
 from models import User, UserSession, UserRole
-import requests
+from resources import Resources
+import httpx
 import os
 import uuid
-import bcrypt
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
@@ -28,20 +29,16 @@ class BarberLoginRequest(BaseModel):
 class SessionIDRequest(BaseModel):
     session_id: str
 
-# Hash password
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
-
 @router.post("/barber/register")
-async def register_barber(request: BarberRegisterRequest, response: Response):
+async def register_barber(
+    request: BarberRegisterRequest,
+    response: Response,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
+):
     """
     Register a new barber with email, username, and password
     """
-    db = get_database()
-    
     # Check if email exists
     existing_email = await db.users.find_one({"email": request.email})
     if existing_email:
@@ -59,7 +56,7 @@ async def register_barber(request: BarberRegisterRequest, response: Response):
         )
     
     # Hash password
-    password_hash = hash_password(request.password)
+    password_hash = await resources.password_hasher.hash(request.password)
     
     # Create new barber user
     user_id = f"user_{uuid.uuid4().hex}"
@@ -110,12 +107,15 @@ async def register_barber(request: BarberRegisterRequest, response: Response):
     }
 
 @router.post("/barber/login")
-async def login_barber(request: BarberLoginRequest, response: Response):
+async def login_barber(
+    request: BarberLoginRequest,
+    response: Response,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
+):
     """
     Login barber with username and password
     """
-    db = get_database()
-    
     # Find user by username
     user = await db.users.find_one({"username": request.username})
     
@@ -133,7 +133,7 @@ async def login_barber(request: BarberLoginRequest, response: Response):
         )
     
     # Verify password
-    if not verify_password(request.password, user["password_hash"]):
+    if not await resources.password_hasher.verify(request.password, user["password_hash"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect password"
@@ -173,16 +173,19 @@ async def login_barber(request: BarberLoginRequest, response: Response):
     }
 
 @router.post("/barber/oauth/session")
-async def barber_google_oauth(request: SessionIDRequest, response: Response):
+async def barber_google_oauth(
+    request: SessionIDRequest,
+    response: Response,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
+):
     """
     Process Google OAuth for barbers
     """
-    db = get_database()
-    
     try:
         # Get user data from Emergent Auth
         headers = {"X-Session-ID": request.session_id}
-        auth_response = requests.get(EMERGENT_AUTH_URL, headers=headers, timeout=10)
+        auth_response = await resources.http_client.get(EMERGENT_AUTH_URL, headers=headers, timeout=10)
         
         if auth_response.status_code != 200:
             raise HTTPException(
@@ -246,19 +249,20 @@ async def barber_google_oauth(request: SessionIDRequest, response: Response):
             }
         }
         
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to authenticate with Google"
         )
 
 @router.get("/me")
-async def get_current_user_info(authorization: Optional[str] = Header(None)):
+async def get_current_user_info(
+    authorization: Optional[str] = Header(None),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
     """
     Get current user information
     """
-    db = get_database()
-    
     # Get session token from header
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(
@@ -302,15 +306,19 @@ async def get_current_user_info(authorization: Optional[str] = Header(None)):
     }
 
 @router.post("/logout")
-async def logout(authorization: Optional[str] = Header(None), response: Response = None):
+async def logout(
+    authorization: Optional[str] = Header(None),
+    response: Response = None,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
+):
     """
     Logout user and clear session
     """
-    db = get_database()
-    
     if authorization and authorization.startswith("Bearer "):
         session_token = authorization.replace("Bearer ", "")
         await db.user_sessions.delete_one({"session_token": session_token})
+        resources.session_cache.invalidate(session_token)
     
     # Clear cookie
     if response:
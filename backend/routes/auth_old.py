@@ -3,8 +3,9 @@ from pydantic import BaseModel, EmailStr
 from typing import Optional
 from datetime import datetime, timezone, timedelta
 from database import get_database
+from http_client import http_client
 from models import User, UserSession, UserRole
-import requests
+import httpx
 import os
 import uuid
 
@@ -35,7 +36,7 @@ async def process_google_oauth(request: SessionIDRequest, response: Response):
     try:
         # Get user data from Emergent Auth
         headers = {"X-Session-ID": request.session_id}
-        auth_response = requests.get(EMERGENT_AUTH_URL, headers=headers, timeout=10)
+        auth_response = await http_client.get(EMERGENT_AUTH_URL, headers=headers, timeout=10)
         
         if auth_response.status_code != 200:
             raise HTTPException(
@@ -97,7 +98,7 @@ async def process_google_oauth(request: SessionIDRequest, response: Response):
             }
         }
         
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to authenticate with Google"
@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
-from database import get_database
-from dependencies import get_current_barber, get_current_user
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from dependencies import get_current_barber, get_current_user, get_db, get_read_db, get_resources
 from models import BarberShop, Location, WorkingHours, User
+from responses import mongo_json
+from resources import Resources
+from services.blob_store import InvalidBlob, store_image
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, set_next_cursor
+from services.projections import shop_projection
+from services.shop_search import find_nearby_shops, find_shops, shop_search_fields
 import uuid
 
 router = APIRouter(prefix="/api/barbers", tags=["Barbers"])
@@ -27,7 +33,7 @@ class UpdateShopRequest(BaseModel):
     is_open: Optional[bool] = None
 
 class AddGalleryImageRequest(BaseModel):
-    image: str  # base64
+    image: str  # base64 or data URI; stored in the blob store
 
 class SetVacationRequest(BaseModel):
     vacation_dates: List[str]  # ["2025-01-15", "2025-01-16"]
@@ -35,11 +41,11 @@ class SetVacationRequest(BaseModel):
 @router.post("/shops", status_code=status.HTTP_201_CREATED)
 async def create_barber_shop(
     request_data: CreateShopRequest,
-    current_user: Request
+    current_user: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Create a new barber shop (barber only)"""
     user = await get_current_barber(current_user)
-    db = get_database()
     
     # Check if barber already has a shop
     existing_shop = await db.barber_shops.find_one({"barber_id": user.id})
@@ -53,9 +59,12 @@ async def create_barber_shop(
     shop_data = {
         "_id": shop_id,
         "barber_id": user.id,
-        **request_data.dict(),
+        **request_data.model_dump(),
+        **shop_search_fields(request_data.location.model_dump()),
         "rating": 0.0,
         "total_reviews": 0,
+        "rating_sum": 0,
+        "rating_count": 0,
         "gallery_images": [],
         "vacation_dates": [],
         "is_open": True,
@@ -67,12 +76,11 @@ async def create_barber_shop(
     return {"success": True, "shop_id": shop_id, "message": "Shop created successfully"}
 
 @router.get("/shops/my")
-async def get_my_shop(current_user: Request):
+async def get_my_shop(current_user: Request, db: AsyncIOMotorDatabase = Depends(get_db)):
     """Get current barber's shop"""
     user = await get_current_barber(current_user)
-    db = get_database()
     
-    shop = await db.barber_shops.find_one({"barber_id": user.id})
+    shop = await db.barber_shops.find_one({"barber_id": user.id}, shop_projection("owner"))
     if not shop:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -85,11 +93,12 @@ async def get_my_shop(current_user: Request):
 async def update_barber_shop(
     shop_id: str,
     request_data: UpdateShopRequest,
-    current_user: Request
+    current_user: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
 ):
     """Update barber shop"""
     user = await get_current_barber(current_user)
-    db = get_database()
     
     # Verify ownership
     shop = await db.barber_shops.find_one({"_id": shop_id, "barber_id": user.id})
@@ -100,13 +109,17 @@ async def update_barber_shop(
         )
     
     # Update only provided fields
-    update_data = {k: v for k, v in request_data.dict().items() if v is not None}
+    update_data = request_data.model_dump(exclude_none=True)
+    if "location" in update_data:
+        update_data.update(shop_search_fields(update_data["location"]))
     update_data["updated_at"] = datetime.utcnow()
     
     await db.barber_shops.update_one(
         {"_id": shop_id},
         {"$set": update_data}
     )
+    resources.availability_index.invalidate_shop(shop_id)
+    resources.shop_page_cache.invalidate(shop_id)
     
     return {"success": True, "message": "Shop updated successfully"}
 
@@ -114,11 +127,12 @@ async def update_barber_shop(
 async def add_gallery_image(
     shop_id: str,
     request_data: AddGalleryImageRequest,
-    current_user: Request
+    current_user: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
 ):
     """Add image to gallery"""
     user = await get_current_barber(current_user)
-    db = get_database()
     
     # Verify ownership
     shop = await db.barber_shops.find_one({"_id": shop_id, "barber_id": user.id})
@@ -128,22 +142,32 @@ async def add_gallery_image(
             detail="Shop not found or access denied"
         )
     
+    try:
+        image_ref = await store_image(request_data.image)
+    except InvalidBlob as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
     await db.barber_shops.update_one(
         {"_id": shop_id},
-        {"$push": {"gallery_images": request_data.image}}
+        {"$push": {"gallery_images": image_ref}}
     )
+    resources.shop_page_cache.invalidate(shop_id)
     
-    return {"success": True, "message": "Image added to gallery"}
+    return {"success": True, "message": "Image added to gallery", "image": image_ref}
 
 @router.delete("/shops/{shop_id}/gallery/{image_index}")
 async def remove_gallery_image(
     shop_id: str,
     image_index: int,
-    current_user: Request
+    current_user: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
 ):
     """Remove image from gallery"""
     user = await get_current_barber(current_user)
-    db = get_database()
     
     # Verify ownership
     shop = await db.barber_shops.find_one({"_id": shop_id, "barber_id": user.id})
@@ -161,6 +185,7 @@ async def remove_gallery_image(
             {"_id": shop_id},
             {"$set": {"gallery_images": gallery}}
         )
+        resources.shop_page_cache.invalidate(shop_id)
         return {"success": True, "message": "Image removed"}
     
     raise HTTPException(
@@ -172,11 +197,12 @@ async def remove_gallery_image(
 async def set_vacation_dates(
     shop_id: str,
     request_data: SetVacationRequest,
-    current_user: Request
+    current_user: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
 ):
     """Set vacation dates"""
     user = await get_current_barber(current_user)
-    db = get_database()
     
     # Verify ownership
     shop = await db.barber_shops.find_one({"_id": shop_id, "barber_id": user.id})
@@ -190,6 +216,8 @@ async def set_vacation_dates(
         {"_id": shop_id},
         {"$set": {"vacation_dates": request_data.vacation_dates}}
     )
+    resources.availability_index.invalidate_shop(shop_id)
+    resources.shop_page_cache.invalidate(shop_id)
     
     return {"success": True, "message": "Vacation dates updated"}
 
@@ -197,51 +225,51 @@ async def set_vacation_dates(
 
 @router.get("/shops")
 async def get_barber_shops(
+    response: Response,
     city: Optional[str] = None,
     latitude: Optional[float] = None,
     longitude: Optional[float] = None,
-    radius_km: float = 10.0
+    radius_km: float = Query(10.0, gt=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    shape: Literal["card", "detail"] = "card",
+    db: AsyncIOMotorDatabase = Depends(get_read_db)
 ):
-    """Get barber shops by city or location"""
-    db = get_database()
+    """
+    Get barber shops by city or location
+    Location searches are sorted by distance; the next page's cursor is
+    returned in the X-Next-Cursor header. Results use the lean "card" shape
+    unless shape=detail is requested
+    """
+    after = decode_cursor(cursor) if cursor else None
     
-    query = {}
-    
-    if city:
-        # Search by city
-        query["location.city"] = {"$regex": city, "$options": "i"}
-    elif latitude and longitude:
-        # Search by geolocation (simple distance calculation)
-        # For production, use MongoDB geospatial queries
-        pass
+    if latitude is not None and longitude is not None and not city:
+        # Search by geolocation
+        shops, next_position = await find_nearby_shops(
+            db, latitude, longitude, radius_km, limit, after, shape
+        )
+    else:
+        # Search by city prefix (or list all shops)
+        shops, next_position = await find_shops(db, city, limit, after, shape)
     
-    shops = await db.barber_shops.find(query).to_list(100)
-    return shops
+    set_next_cursor(response, next_position)
+    return mongo_json(shops, response)
 
 @router.get("/shops/{shop_id}")
-async def get_barber_shop_details(shop_id: str):
-    """Get barber shop details"""
-    db = get_database()
-    
-    shop = await db.barber_shops.find_one({"_id": shop_id})
-    if not shop:
+async def get_barber_shop_details(
+    shop_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
+):
+    """
+    Get barber shop details
+    Includes services, products, the newest reviews and a rating histogram
+    """
+    page = await resources.shop_page_cache.get(db, shop_id)
+    if not page:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Shop not found"
         )
     
-    # Get services
-    services = await db.services.find({"shop_id": shop_id}).to_list(100)
-    
-    # Get products
-    products = await db.products.find({"shop_id": shop_id}).to_list(100)
-    
-    # Get reviews
-    reviews = await db.reviews.find({"shop_id": shop_id}).to_list(100)
-    
-    return {
-        **shop,
-        "services": services,
-        "products": products,
-        "reviews": reviews
-    }
+    return mongo_json(page)
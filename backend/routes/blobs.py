@@ -0,0 +1,86 @@
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from services.blob_store import IMAGE_TYPES, blob_store
+import re
+
+router = APIRouter(prefix="/api/blobs", tags=["Blobs"])
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Blobs are user uploads served from the API origin: never let a browser
+# sniff or run them as anything but the stored image type
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "Content-Security-Policy": "default-src 'none'; sandbox"
+}
+
+def _parse_range(header: str, size: int):
+    """Return (start, end) for a single byte range, or None if unsatisfiable"""
+    match = _RANGE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return None
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start > end:
+        return None
+    return start, end
+
+@router.get("/{digest}")
+async def get_blob(digest: str, request: Request):
+    """Stream a blob with ETag and Range support"""
+    meta = blob_store.stat(digest)
+    if not meta:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Blob not found"
+        )
+
+    # Content-addressed: the digest is a strong validator and never changes
+    etag = f'"{digest}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=31536000, immutable",
+        **SECURITY_HEADERS
+    }
+
+    if request.headers.get("If-None-Match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    size = meta["size"]
+    start, end = 0, size - 1
+    status_code = status.HTTP_200_OK
+
+    range_header = request.headers.get("Range")
+    if range_header and request.headers.get("If-Range", etag) == etag:
+        byte_range = _parse_range(range_header, size)
+        if byte_range is None:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{size}"}
+            )
+        start, end = byte_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    # Blobs stored before uploads were sniffed may carry any declared type
+    media_type = meta["content_type"]
+    if media_type not in IMAGE_TYPES:
+        media_type = "application/octet-stream"
+
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        blob_store.iter_range(digest, start, end),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers
+    )
@@ -1,12 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic import BaseModel, Field
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from typing import List, Optional
 from datetime import datetime, timedelta
-from database import get_database
-from dependencies import get_current_user, get_current_barber
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from dependencies import get_current_user, get_current_barber, get_db, get_read_db, get_resources
 from models import Booking, BookingStatus
+from responses import mongo_json
+from resources import Resources
+from services.availability import ACTIVE_STATUSES, build_schedule
+from services.booking_changes import (
+    CHANGES_PAGE_SIZE, booking_changes, next_booking_version, next_booking_versions,
+    set_bookings_version, synced_booking_version
+)
+from services.enrichment import attach_customers, attach_services, attach_shops
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate
+from services.reservations import SlotUnavailable, release_slot, reserve_slot
+from services.scheduling import booking_interval, parse_minutes, total_duration
+import asyncio
 import uuid
-from ws_handler import notify_new_booking, notify_booking_cancelled, notify_booking_updated
+from ws_handler import (
+    notify_new_booking, notify_booking_cancelled, notify_booking_updated, notify_bookings_updated
+)
 
 router = APIRouter(prefix="/api/bookings", tags=["Bookings"])
 
@@ -23,14 +39,23 @@ class CreateBookingRequest(BaseModel):
 class UpdateBookingStatusRequest(BaseModel):
     status: BookingStatus
 
+BULK_STATUS_LIMIT = 200
+
+class BookingStatusChange(BaseModel):
+    booking_id: str
+    status: BookingStatus
+
+class BulkUpdateBookingStatusRequest(BaseModel):
+    updates: List[BookingStatusChange] = Field(min_length=1, max_length=BULK_STATUS_LIMIT)
+
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_booking(
     request_data: CreateBookingRequest,
-    current_user: Request = None
+    current_user: Request = None,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
 ):
     """Create a new booking (customers don't need auth)"""
-    db = get_database()
-    
     # Try to get authenticated user, but allow anonymous customers
     customer_id = "guest"
     try:
@@ -87,25 +112,49 @@ async def create_booking(
             detail="Bookings can only be made within the next 7 days"
         )
     
-    # Check for conflicts
-    existing_booking = await db.bookings.find_one({
-        "shop_id": request_data.shop_id,
-        "date": request_data.date,
-        "time": request_data.time,
-        "status": {"$in": ["pending", "confirmed"]}
-    })
+    # Check the requested interval against working hours
+    try:
+        start_minute = parse_minutes(request_data.time)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid time format"
+        )
+    end_minute = start_minute + total_duration(services)
     
-    if existing_booking:
+    # Working hours come from the shop just read; the availability index may
+    # be stale on this worker, so reserve_slot alone decides conflicts
+    schedule, message = build_schedule(shop, request_data.date)
+    if message:
         raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Time slot already booked"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=message
+        )
+    
+    if not schedule.fits(start_minute, end_minute):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Selected services do not fit within working hours"
         )
     
     # Calculate total price
     total_price = sum(s["price"] for s in services) + sum(p["price"] for p in products)
     
-    # Create booking
+    # Reserve the interval atomically; concurrent requests for it lose here
     booking_id = f"booking_{uuid.uuid4().hex}"
+    try:
+        await reserve_slot(
+            db, booking_id, request_data.shop_id, request_data.date,
+            start_minute, end_minute
+        )
+    except SlotUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Time slot already booked"
+        )
+    
+    # Create booking
+    version = await next_booking_version(db, request_data.shop_id)
     booking_data = {
         "_id": booking_id,
         "shop_id": request_data.shop_id,
@@ -117,14 +166,22 @@ async def create_booking(
         "product_ids": request_data.product_ids,
         "date": request_data.date,
         "time": request_data.time,
+        "start_minute": start_minute,
+        "end_minute": end_minute,
         "status": BookingStatus.PENDING.value,
         "total_price": total_price,
         "notes": request_data.notes,
         "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow()
+        "updated_at": datetime.utcnow(),
+        "version": version
     }
     
-    await db.bookings.insert_one(booking_data)
+    try:
+        await db.bookings.insert_one(booking_data)
+    except Exception:
+        await release_slot(db, booking_id)
+        raise
+    resources.availability_index.book(booking_data)
     
     # Notify barber via WebSocket
     await notify_new_booking(request_data.shop_id, {
@@ -144,30 +201,40 @@ async def create_booking(
     }
 
 @router.get("/my")
-async def get_my_bookings(current_user: Request):
-    """Get current user's bookings"""
+async def get_my_bookings(
+    current_user: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Get current user's bookings, newest first (paginated)"""
     user = await get_current_user(current_user)
-    db = get_database()
     
-    bookings = await db.bookings.find({"customer_id": user.id}).to_list(100)
+    bookings = await paginate(
+        db.bookings, {"customer_id": user.id}, response, cursor, limit
+    )
     
     # Enrich with shop and service details
-    for booking in bookings:
-        shop = await db.barber_shops.find_one({"_id": booking["shop_id"]})
-        services = await db.services.find({
-            "_id": {"$in": booking["service_ids"]}
-        }).to_list(100)
-        
-        booking["shop"] = shop
-        booking["services"] = services
+    await asyncio.gather(
+        attach_shops(db, bookings),
+        attach_services(db, bookings)
+    )
     
-    return bookings
+    return mongo_json(bookings, response)
 
 @router.get("/shop/{shop_id}")
-async def get_shop_bookings(shop_id: str, current_user: Request):
-    """Get bookings for a shop (barber only)"""
+async def get_shop_bookings(
+    shop_id: str,
+    current_user: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    date_from: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Get bookings for a shop, newest first (barber only, paginated)"""
     user = await get_current_barber(current_user)
-    db = get_database()
     
     # Verify ownership
     shop = await db.barber_shops.find_one({"_id": shop_id, "barber_id": user.id})
@@ -177,89 +244,80 @@ async def get_shop_bookings(shop_id: str, current_user: Request):
             detail="Shop not found or access denied"
         )
     
-    bookings = await db.bookings.find({"shop_id": shop_id}).to_list(1000)
+    # Read before listing, so a delta sync from it cannot skip a change
+    set_bookings_version(response, await synced_booking_version(db, shop_id))
+    query = {"shop_id": shop_id}
+    if date_from:
+        # Only bookings for that day or later
+        query["date"] = {"$gte": date_from}
+    bookings = await paginate(db.bookings, query, response, cursor, limit)
     
     # Enrich with customer and service details
-    for booking in bookings:
-        customer = await db.users.find_one({"_id": booking["customer_id"]})
-        services = await db.services.find({
-            "_id": {"$in": booking["service_ids"]}
-        }).to_list(100)
-        
-        booking["customer"] = {
-            "name": customer["name"],
-            "phone": customer.get("phone"),
-            "email": customer.get("email")
-        }
-        booking["services"] = services
+    await asyncio.gather(
+        attach_customers(db, bookings),
+        attach_services(db, bookings)
+    )
     
-    return bookings
+    return mongo_json(bookings, response)
 
-@router.get("/available-slots/{shop_id}")
-async def get_available_slots(
+@router.get("/shop/{shop_id}/changes")
+async def get_shop_booking_changes(
     shop_id: str,
-    date: str  # "2025-01-15"
+    current_user: Request,
+    since_version: Optional[int] = Query(None, ge=0),
+    since: Optional[datetime] = None,
+    limit: int = Query(CHANGES_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    """Get available time slots for a date"""
-    db = get_database()
+    """Get bookings changed since a version or timestamp (barber only)"""
+    user = await get_current_barber(current_user)
     
-    # Get shop
-    shop = await db.barber_shops.find_one({"_id": shop_id})
+    # Verify ownership
+    shop = await db.barber_shops.find_one({"_id": shop_id, "barber_id": user.id}, {"_id": 1})
     if not shop:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Shop not found"
+            detail="Shop not found or access denied"
         )
     
-    # Check if shop is on vacation
-    if date in shop.get("vacation_dates", []):
-        return {"available_slots": [], "message": "Shop closed on this date"}
-    
-    # Get working hours for the day
-    booking_date = datetime.strptime(date, "%Y-%m-%d")
-    day_of_week = booking_date.weekday()
-    
-    working_hours = next(
-        (wh for wh in shop.get("working_hours", []) if wh["day"] == day_of_week),
-        None
-    )
-    
-    if not working_hours or working_hours.get("is_closed"):
-        return {"available_slots": [], "message": "Shop closed on this day"}
-    
-    # Generate time slots (every 30 minutes)
-    open_time = datetime.strptime(working_hours["open_time"], "%H:%M")
-    close_time = datetime.strptime(working_hours["close_time"], "%H:%M")
-    
-    slots = []
-    current_time = open_time
-    while current_time < close_time:
-        slots.append(current_time.strftime("%H:%M"))
-        current_time += timedelta(minutes=30)
-    
-    # Get booked slots
-    booked_bookings = await db.bookings.find({
-        "shop_id": shop_id,
-        "date": date,
-        "status": {"$in": ["pending", "confirmed"]}
-    }).to_list(1000)
+    return mongo_json(await booking_changes(db, shop_id, since_version, since, limit))
+
+@router.get("/available-slots/{shop_id}")
+async def get_available_slots(
+    shop_id: str,
+    date: str,  # "2025-01-15"
+    service_ids: List[str] = Query(default=[]),
+    db: AsyncIOMotorDatabase = Depends(get_read_db),
+    resources: Resources = Depends(get_resources)
+):
+    """Get start times on a date where the selected services fit"""
+    day = await resources.availability_index.get(db, shop_id, date)
+    if day is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Shop not found"
+        )
     
-    booked_times = [b["time"] for b in booked_bookings]
+    if day.message:
+        return {"available_slots": [], "message": day.message}
     
-    # Filter available slots
-    available_slots = [s for s in slots if s not in booked_times]
+    durations = {}
+    if service_ids:
+        durations = await resources.availability_index.service_durations(db, shop_id)
+    duration = total_duration({"duration": durations.get(sid)} for sid in service_ids)
     
-    return {"available_slots": available_slots}
+    return {"available_slots": day.available_slots(duration), "duration": duration}
 
 @router.put("/{booking_id}/status")
 async def update_booking_status(
     booking_id: str,
     request_data: UpdateBookingStatusRequest,
-    current_user: Request
+    current_user: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
 ):
     """Update booking status"""
     user = await get_current_user(current_user)
-    db = get_database()
     
     # Get booking
     booking = await db.bookings.find_one({"_id": booking_id})
@@ -276,17 +334,39 @@ async def update_booking_status(
             detail="Access denied"
         )
     
+    was_active = booking["status"] in ACTIVE_STATUSES
+    is_active = request_data.status.value in ACTIVE_STATUSES
+    
+    # Re-activating a booking has to win its interval back
+    if is_active and not was_active:
+        start, end = booking_interval(booking)
+        try:
+            await reserve_slot(db, booking_id, booking["shop_id"], booking["date"], start, end)
+        except SlotUnavailable:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Time slot already booked"
+            )
+    
     # Update status
     await db.bookings.update_one(
         {"_id": booking_id},
         {
             "$set": {
                 "status": request_data.status.value,
-                "updated_at": datetime.utcnow()
+                "updated_at": datetime.utcnow(),
+                "version": await next_booking_version(db, booking["shop_id"])
             }
         }
     )
     
+    # Keep the slot locks and index in step with the new status
+    if was_active and not is_active:
+        await release_slot(db, booking_id)
+        resources.availability_index.release(booking)
+    elif is_active and not was_active:
+        resources.availability_index.book(booking)
+    
     # Notify via WebSocket
     if request_data.status == BookingStatus.CANCELLED:
         await notify_booking_cancelled(booking["shop_id"], booking_id)
@@ -298,11 +378,145 @@ async def update_booking_status(
     
     return {"success": True, "message": "Booking updated successfully"}
 
+@router.post("/bulk-status")
+async def bulk_update_booking_status(
+    request_data: BulkUpdateBookingStatusRequest,
+    current_user: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
+):
+    """Apply status changes to many bookings at once, with a result per item (barber only)"""
+    user = await get_current_barber(current_user)
+    
+    # The first change per booking applies; repeats are reported as duplicates
+    changes = {}
+    duplicates = set()
+    for index, change in enumerate(request_data.updates):
+        if change.booking_id in changes:
+            duplicates.add(index)
+        else:
+            changes[change.booking_id] = change.status.value
+    results = {}
+    
+    bookings = await db.bookings.find({
+        "_id": {"$in": list(changes)},
+        "barber_id": user.id
+    }).to_list(len(changes))
+    bookings_by_id = {b["_id"]: b for b in bookings}
+    
+    to_update = []
+    for booking_id, new_status in changes.items():
+        booking = bookings_by_id.get(booking_id)
+        if booking is None:
+            results[booking_id] = "not_found"
+        elif booking["status"] == new_status:
+            results[booking_id] = "unchanged"
+        else:
+            to_update.append(booking)
+    
+    # Re-activated bookings have to win their intervals back
+    async def reclaim(booking):
+        start, end = booking_interval(booking)
+        try:
+            await reserve_slot(db, booking["_id"], booking["shop_id"], booking["date"], start, end)
+            return True
+        except SlotUnavailable:
+            return False
+    
+    reactivated = [
+        b for b in to_update
+        if b["status"] not in ACTIVE_STATUSES and changes[b["_id"]] in ACTIVE_STATUSES
+    ]
+    reclaimed = await asyncio.gather(*(reclaim(b) for b in reactivated))
+    for booking, ok in zip(reactivated, reclaimed):
+        if not ok:
+            results[booking["_id"]] = "conflict"
+    to_update = [b for b in to_update if b["_id"] not in results]
+    
+    # One version allocation per shop, then one bulk write for everything
+    by_shop = {}
+    for booking in to_update:
+        by_shop.setdefault(booking["shop_id"], []).append(booking)
+    versions = await asyncio.gather(*(
+        next_booking_versions(db, shop_id, len(shop_bookings))
+        for shop_id, shop_bookings in by_shop.items()
+    ))
+    
+    now = datetime.utcnow()
+    operations = []
+    for shop_bookings, shop_versions in zip(by_shop.values(), versions):
+        for booking, version in zip(shop_bookings, shop_versions):
+            operations.append(UpdateOne(
+                {"_id": booking["_id"]},
+                {"$set": {"status": changes[booking["_id"]], "updated_at": now, "version": version}}
+            ))
+    ordered_bookings = [b for shop_bookings in by_shop.values() for b in shop_bookings]
+    
+    failed = set()
+    if operations:
+        try:
+            await db.bookings.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            failed = {ordered_bookings[err["index"]]["_id"] for err in e.details.get("writeErrors", [])}
+    
+    updated = []
+    for booking in ordered_bookings:
+        booking_id = booking["_id"]
+        was_active = booking["status"] in ACTIVE_STATUSES
+        is_active = changes[booking_id] in ACTIVE_STATUSES
+        if booking_id in failed:
+            results[booking_id] = "failed"
+            if is_active and not was_active:
+                await release_slot(db, booking_id)
+            continue
+        results[booking_id] = "updated"
+        updated.append(booking)
+        if was_active and not is_active:
+            resources.availability_index.release(booking)
+        elif is_active and not was_active:
+            resources.availability_index.book(booking)
+    
+    # Slot locks of everything that stopped being active, in one delete
+    released = [
+        b["_id"] for b in updated
+        if b["status"] in ACTIVE_STATUSES and changes[b["_id"]] not in ACTIVE_STATUSES
+    ]
+    if released:
+        await db.slot_locks.delete_many({"booking_id": {"$in": released}})
+    
+    # One coalesced event per shop
+    notified_shops = {}
+    for booking in updated:
+        notified_shops.setdefault(booking["shop_id"], []).append({
+            "booking_id": booking["_id"],
+            "status": changes[booking["_id"]]
+        })
+    await asyncio.gather(*(
+        notify_bookings_updated(shop_id, shop_updates)
+        for shop_id, shop_updates in notified_shops.items()
+    ))
+    
+    return {
+        "success": True,
+        "updated": len(updated),
+        "results": [
+            {
+                "booking_id": change.booking_id,
+                "result": "duplicate" if index in duplicates else results[change.booking_id]
+            }
+            for index, change in enumerate(request_data.updates)
+        ]
+    }
+
 @router.delete("/{booking_id}")
-async def cancel_booking(booking_id: str, current_user: Request):
+async def cancel_booking(
+    booking_id: str,
+    current_user: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
+):
     """Cancel a booking"""
     user = await get_current_user(current_user)
-    db = get_database()
     
     # Get booking
     booking = await db.bookings.find_one({"_id": booking_id})
@@ -325,11 +539,16 @@ async def cancel_booking(booking_id: str, current_user: Request):
         {
             "$set": {
                 "status": BookingStatus.CANCELLED.value,
-                "updated_at": datetime.utcnow()
+                "updated_at": datetime.utcnow(),
+                "version": await next_booking_version(db, booking["shop_id"])
             }
         }
     )
     
+    if booking["status"] in ACTIVE_STATUSES:
+        await release_slot(db, booking_id)
+        resources.availability_index.release(booking)
+    
     # Notify barber
     await notify_booking_cancelled(booking["shop_id"], booking_id)
     
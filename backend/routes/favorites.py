@@ -1,10 +1,13 @@
 # Backend API - Add Favorites & Recent Visits
-from fastapi import APIRouter, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from datetime import datetime
-from database import get_database
-from dependencies import get_current_user
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from dependencies import get_current_user, get_db, get_resources
+from resources import Resources
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate
+from services.projections import finalize_shops, shop_projection
 
 router = APIRouter(prefix="/api/favorites", tags=["Favorites"])
 
@@ -14,11 +17,12 @@ class AddFavoriteRequest(BaseModel):
 @router.post("/")
 async def add_favorite(
     request_data: AddFavoriteRequest,
-    current_user: Request
+    current_user: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
 ):
     """Add shop to favorites"""
     user = await get_current_user(current_user)
-    db = get_database()
     
     # Check if shop exists
     shop = await db.barber_shops.find_one({"_id": request_data.shop_id})
@@ -36,17 +40,19 @@ async def add_favorite(
             "$set": {"updated_at": datetime.utcnow()}
         }
     )
+    resources.session_cache.invalidate_user(user.id)
     
     return {"success": True, "message": "Added to favorites"}
 
 @router.delete("/{shop_id}")
 async def remove_favorite(
     shop_id: str,
-    current_user: Request
+    current_user: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
 ):
     """Remove shop from favorites"""
     user = await get_current_user(current_user)
-    db = get_database()
     
     await db.users.update_one(
         {"_id": user.id},
@@ -55,38 +61,45 @@ async def remove_favorite(
             "$set": {"updated_at": datetime.utcnow()}
         }
     )
+    resources.session_cache.invalidate_user(user.id)
     
     return {"success": True, "message": "Removed from favorites"}
 
 @router.get("/")
-async def get_favorites(current_user: Request):
-    """Get user's favorite shops"""
+async def get_favorites(
+    current_user: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Get user's favorite shops (paginated)"""
     user = await get_current_user(current_user)
-    db = get_database()
     
     # Get user with favorites
-    user_doc = await db.users.find_one({"_id": user.id})
+    user_doc = await db.users.find_one({"_id": user.id}, {"favorites": 1})
     favorite_ids = user_doc.get("favorites", [])
     
     if not favorite_ids:
         return []
     
-    # Get shop details
-    shops = await db.barber_shops.find({
-        "_id": {"$in": favorite_ids}
-    }).to_list(100)
+    # Get shop cards
+    shops = await paginate(
+        db.barber_shops, {"_id": {"$in": favorite_ids}}, response, cursor, limit,
+        projection=shop_projection("card")
+    )
     
-    return shops
+    return finalize_shops(shops, "card")
 
 @router.get("/recent")
-async def get_recent_shops(current_user: Request):
+async def get_recent_shops(current_user: Request, db: AsyncIOMotorDatabase = Depends(get_db)):
     """Get recently visited shops based on bookings"""
     user = await get_current_user(current_user)
-    db = get_database()
     
     # Get recent bookings
     recent_bookings = await db.bookings.find(
-        {"customer_id": user.id}
+        {"customer_id": user.id},
+        {"shop_id": 1}
     ).sort("created_at", -1).limit(10).to_list(10)
     
     # Get unique shop IDs
@@ -95,9 +108,10 @@ async def get_recent_shops(current_user: Request):
     if not shop_ids:
         return []
     
-    # Get shop details
-    shops = await db.barber_shops.find({
-        "_id": {"$in": shop_ids}
-    }).to_list(100)
+    # Get shop cards
+    shops = await db.barber_shops.find(
+        {"_id": {"$in": shop_ids}},
+        shop_projection("card")
+    ).to_list(100)
     
-    return shops
+    return finalize_shops(shops, "card")
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
-from database import get_database
-from dependencies import get_current_barber
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from dependencies import get_current_barber, get_db, get_resources
+from responses import mongo_json
+from resources import Resources
+from services.blob_store import InvalidBlob, store_image
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate
 import uuid
 
 router = APIRouter(prefix="/api/products", tags=["Products"])
@@ -12,7 +16,7 @@ class CreateProductRequest(BaseModel):
     name: str
     description: str
     price: float
-    image: Optional[str] = None  # base64
+    image: Optional[str] = None  # base64 or data URI; stored in the blob store
     quantity: int = 0
 
 class UpdateProductRequest(BaseModel):
@@ -22,15 +26,25 @@ class UpdateProductRequest(BaseModel):
     image: Optional[str] = None
     quantity: Optional[int] = None
 
+async def _store_product_image(image: str) -> str:
+    try:
+        return await store_image(image)
+    except InvalidBlob as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_product(
     shop_id: str,
     request_data: CreateProductRequest,
-    current_user: Request
+    current_user: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
 ):
     """Create a new product"""
     user = await get_current_barber(current_user)
-    db = get_database()
     
     # Verify shop ownership
     shop = await db.barber_shops.find_one({"_id": shop_id, "barber_id": user.id})
@@ -44,29 +58,40 @@ async def create_product(
     product_data = {
         "_id": product_id,
         "shop_id": shop_id,
-        **request_data.dict(),
+        **request_data.model_dump(),
         "created_at": datetime.utcnow()
     }
+    if product_data["image"]:
+        product_data["image"] = await _store_product_image(product_data["image"])
     
     await db.products.insert_one(product_data)
+    resources.shop_page_cache.invalidate(shop_id)
     return {"success": True, "product_id": product_id}
 
 @router.get("/shop/{shop_id}")
-async def get_shop_products(shop_id: str):
-    """Get all products for a shop"""
-    db = get_database()
-    products = await db.products.find({"shop_id": shop_id}).to_list(100)
-    return products
+async def get_shop_products(
+    shop_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Get products for a shop in the order they were added (paginated)"""
+    products = await paginate(
+        db.products, {"shop_id": shop_id}, response, cursor, limit, descending=False
+    )
+    return mongo_json(products, response)
 
 @router.put("/{product_id}")
 async def update_product(
     product_id: str,
     request_data: UpdateProductRequest,
-    current_user: Request
+    current_user: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
 ):
     """Update a product"""
     user = await get_current_barber(current_user)
-    db = get_database()
     
     # Get product
     product = await db.products.find_one({"_id": product_id})
@@ -88,16 +113,23 @@ async def update_product(
         )
     
     # Update product
-    update_data = {k: v for k, v in request_data.dict().items() if v is not None}
+    update_data = request_data.model_dump(exclude_none=True)
+    if update_data.get("image"):
+        update_data["image"] = await _store_product_image(update_data["image"])
     await db.products.update_one({"_id": product_id}, {"$set": update_data})
+    resources.shop_page_cache.invalidate(product["shop_id"])
     
     return {"success": True, "message": "Product updated"}
 
 @router.delete("/{product_id}")
-async def delete_product(product_id: str, current_user: Request):
+async def delete_product(
+    product_id: str,
+    current_user: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
+):
     """Delete a product"""
     user = await get_current_barber(current_user)
-    db = get_database()
     
     # Get product
     product = await db.products.find_one({"_id": product_id})
@@ -119,4 +151,5 @@ async def delete_product(product_id: str, current_user: Request):
         )
     
     await db.products.delete_one({"_id": product_id})
+    resources.shop_page_cache.invalidate(product["shop_id"])
     return {"success": True, "message": "Product deleted"}
@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from datetime import datetime
-from database import get_database
-from dependencies import get_current_user
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from dependencies import get_current_user, get_db, get_resources
+from responses import mongo_json
+from resources import Resources
+from services.enrichment import attach_review_authors
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate
+from services.ratings import apply_rating_change, begin_rating_change
+from pymongo import ReturnDocument
 import uuid
 
 router = APIRouter(prefix="/api/reviews", tags=["Reviews"])
@@ -13,29 +19,29 @@ class CreateReviewRequest(BaseModel):
     rating: int  # 1-5
     comment: str
 
+class UpdateReviewRequest(BaseModel):
+    rating: Optional[int] = None  # 1-5
+    comment: Optional[str] = None
+
+def _validate_rating(rating: int):
+    if rating < 1 or rating > 5:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Rating must be between 1 and 5"
+        )
+
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_review(
     request_data: CreateReviewRequest,
-    current_user: Request
+    current_user: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
 ):
     """Create a review for a shop"""
     user = await get_current_user(current_user)
-    db = get_database()
     
     # Validate rating
-    if request_data.rating < 1 or request_data.rating > 5:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Rating must be between 1 and 5"
-        )
-    
-    # Check if shop exists
-    shop = await db.barber_shops.find_one({"_id": request_data.shop_id})
-    if not shop:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Shop not found"
-        )
+    _validate_rating(request_data.rating)
     
     # Check if user already reviewed
     existing_review = await db.reviews.find_one({
@@ -49,6 +55,13 @@ async def create_review(
             detail="You have already reviewed this shop"
         )
     
+    # Check the shop exists and stamp it before the review lands
+    if not await begin_rating_change(db, request_data.shop_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Shop not found"
+        )
+    
     # Create review
     review_id = f"review_{uuid.uuid4().hex}"
     review_data = {
@@ -63,33 +76,100 @@ async def create_review(
     await db.reviews.insert_one(review_data)
     
     # Update shop rating
-    all_reviews = await db.reviews.find({"shop_id": request_data.shop_id}).to_list(1000)
-    avg_rating = sum(r["rating"] for r in all_reviews) / len(all_reviews)
-    
-    await db.barber_shops.update_one(
-        {"_id": request_data.shop_id},
-        {
-            "$set": {
-                "rating": round(avg_rating, 1),
-                "total_reviews": len(all_reviews)
-            }
-        }
-    )
+    await apply_rating_change(db, request_data.shop_id, request_data.rating, 1)
+    resources.shop_page_cache.invalidate(request_data.shop_id)
     
     return {"success": True, "review_id": review_id}
 
-@router.get("/shop/{shop_id}")
-async def get_shop_reviews(shop_id: str):
-    """Get all reviews for a shop"""
-    db = get_database()
+@router.put("/{review_id}")
+async def update_review(
+    review_id: str,
+    request_data: UpdateReviewRequest,
+    current_user: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
+):
+    """Edit your own review"""
+    user = await get_current_user(current_user)
     
-    reviews = await db.reviews.find({"shop_id": shop_id}).to_list(1000)
+    update_data = request_data.model_dump(exclude_none=True)
+    if "rating" in update_data:
+        _validate_rating(update_data["rating"])
+    update_data["updated_at"] = datetime.utcnow()
+    
+    review = await db.reviews.find_one({"_id": review_id, "customer_id": user.id}, {"shop_id": 1})
+    if not review:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Review not found"
+        )
+    await begin_rating_change(db, review["shop_id"])
+    
+    # Atomically swap in the edit and keep the previous rating for the delta
+    previous = await db.reviews.find_one_and_update(
+        {"_id": review_id, "customer_id": user.id},
+        {"$set": update_data},
+        return_document=ReturnDocument.BEFORE
+    )
+    if not previous:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Review not found"
+        )
+    
+    rating_delta = update_data.get("rating", previous["rating"]) - previous["rating"]
+    if rating_delta:
+        await apply_rating_change(db, previous["shop_id"], rating_delta, 0)
+    resources.shop_page_cache.invalidate(previous["shop_id"])
+    
+    return {"success": True, "message": "Review updated"}
+
+@router.delete("/{review_id}")
+async def delete_review(
+    review_id: str,
+    current_user: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
+):
+    """Delete your own review"""
+    user = await get_current_user(current_user)
+    
+    review = await db.reviews.find_one({"_id": review_id, "customer_id": user.id}, {"shop_id": 1})
+    if not review:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Review not found"
+        )
+    await begin_rating_change(db, review["shop_id"])
+    
+    review = await db.reviews.find_one_and_delete(
+        {"_id": review_id, "customer_id": user.id}
+    )
+    if not review:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Review not found"
+        )
+    
+    await apply_rating_change(db, review["shop_id"], -review["rating"], -1)
+    resources.shop_page_cache.invalidate(review["shop_id"])
+    
+    return {"success": True, "message": "Review deleted"}
+
+@router.get("/shop/{shop_id}")
+async def get_shop_reviews(
+    shop_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Get reviews for a shop, newest first (paginated)"""
+    reviews = await paginate(
+        db.reviews, {"shop_id": shop_id}, response, cursor, limit
+    )
     
     # Enrich with customer info
-    for review in reviews:
-        customer = await db.users.find_one({"_id": review["customer_id"]})
-        if customer:
-            review["customer_name"] = customer["name"]
-            review["customer_picture"] = customer.get("picture")
+    await attach_review_authors(db, reviews)
     
-    return reviews
+    return mongo_json(reviews, response)
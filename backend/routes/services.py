@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
-from database import get_database
-from dependencies import get_current_barber
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from dependencies import get_current_barber, get_db, get_resources
+from responses import mongo_json
+from resources import Resources
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate
 import uuid
 
 router = APIRouter(prefix="/api/services", tags=["Services"])
@@ -24,11 +27,12 @@ class UpdateServiceRequest(BaseModel):
 async def create_service(
     shop_id: str,
     request_data: CreateServiceRequest,
-    current_user: Request
+    current_user: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
 ):
     """Create a new service"""
     user = await get_current_barber(current_user)
-    db = get_database()
     
     # Verify shop ownership
     shop = await db.barber_shops.find_one({"_id": shop_id, "barber_id": user.id})
@@ -42,29 +46,39 @@ async def create_service(
     service_data = {
         "_id": service_id,
         "shop_id": shop_id,
-        **request_data.dict(),
+        **request_data.model_dump(),
         "created_at": datetime.utcnow()
     }
     
     await db.services.insert_one(service_data)
+    resources.availability_index.invalidate_services(shop_id)
+    resources.shop_page_cache.invalidate(shop_id)
     return {"success": True, "service_id": service_id}
 
 @router.get("/shop/{shop_id}")
-async def get_shop_services(shop_id: str):
-    """Get all services for a shop"""
-    db = get_database()
-    services = await db.services.find({"shop_id": shop_id}).to_list(100)
-    return services
+async def get_shop_services(
+    shop_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Get services for a shop in the order they were added (paginated)"""
+    services = await paginate(
+        db.services, {"shop_id": shop_id}, response, cursor, limit, descending=False
+    )
+    return mongo_json(services, response)
 
 @router.put("/{service_id}")
 async def update_service(
     service_id: str,
     request_data: UpdateServiceRequest,
-    current_user: Request
+    current_user: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
 ):
     """Update a service"""
     user = await get_current_barber(current_user)
-    db = get_database()
     
     # Get service
     service = await db.services.find_one({"_id": service_id})
@@ -86,16 +100,22 @@ async def update_service(
         )
     
     # Update service
-    update_data = {k: v for k, v in request_data.dict().items() if v is not None}
+    update_data = request_data.model_dump(exclude_none=True)
     await db.services.update_one({"_id": service_id}, {"$set": update_data})
+    resources.availability_index.invalidate_services(service["shop_id"])
+    resources.shop_page_cache.invalidate(service["shop_id"])
     
     return {"success": True, "message": "Service updated"}
 
 @router.delete("/{service_id}")
-async def delete_service(service_id: str, current_user: Request):
+async def delete_service(
+    service_id: str,
+    current_user: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    resources: Resources = Depends(get_resources)
+):
     """Delete a service"""
     user = await get_current_barber(current_user)
-    db = get_database()
     
     # Get service
     service = await db.services.find_one({"_id": service_id})
@@ -117,4 +137,6 @@ async def delete_service(service_id: str, current_user: Request):
         )
     
     await db.services.delete_one({"_id": service_id})
+    resources.availability_index.invalidate_services(service["shop_id"])
+    resources.shop_page_cache.invalidate(service["shop_id"])
     return {"success": True, "message": "Service deleted"}
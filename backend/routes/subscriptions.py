@@ -1,10 +1,11 @@
 # Subscription Routes with Mock Tranzila
-from fastapi import APIRouter, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime, timezone, timedelta
-from database import get_database
-from dependencies import get_current_user
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from dependencies import get_current_user, get_db
+from responses import mongo_json
 from services.tranzila_service import process_tranzila_payment, TranzilaPaymentRequest
 import uuid
 
@@ -16,11 +17,11 @@ class CreateSubscriptionRequest(BaseModel):
 @router.post("/create")
 async def create_subscription(
     request_data: CreateSubscriptionRequest,
-    current_user: Request
+    current_user: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Create subscription and process payment"""
     user = await get_current_user(current_user)
-    db = get_database()
     
     # Verify user is a barber
     if user.role != "barber":
@@ -102,14 +103,13 @@ async def create_subscription(
         "success": True,
         "subscription_id": subscription_id,
         "message": payment_response.message,
-        "renewal_date": renewal_date.isoformat()
+        "renewal_date": renewal_date
     }
 
 @router.get("/my")
-async def get_my_subscription(current_user: Request):
+async def get_my_subscription(current_user: Request, db: AsyncIOMotorDatabase = Depends(get_db)):
     """Get current user's subscription"""
     user = await get_current_user(current_user)
-    db = get_database()
     
     subscription = await db.subscriptions.find_one({
         "barber_id": user.id
@@ -118,19 +118,13 @@ async def get_my_subscription(current_user: Request):
     if not subscription:
         return None
     
-    # Convert dates for JSON
-    subscription["start_date"] = subscription["start_date"].isoformat()
-    subscription["renewal_date"] = subscription["renewal_date"].isoformat()
-    subscription["created_at"] = subscription["created_at"].isoformat()
-    subscription["updated_at"] = subscription["updated_at"].isoformat()
-    
-    return subscription
+    # Dates are encoded natively by the response class
+    return mongo_json(subscription)
 
 @router.post("/cancel")
-async def cancel_subscription(current_user: Request):
+async def cancel_subscription(current_user: Request, db: AsyncIOMotorDatabase = Depends(get_db)):
     """Cancel subscription"""
     user = await get_current_user(current_user)
-    db = get_database()
     
     subscription = await db.subscriptions.find_one({
         "barber_id": user.id,
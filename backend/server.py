@@ -1,34 +1,89 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from pathlib import Path
+
+# The entry point loads backend/.env before anything else is imported, since
+# several modules read their settings from the environment at import time
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.middleware.cors import CORSMiddleware
 import logging
 import socketio
 
 # Import database
-from database import connect_to_mongo, close_mongo_connection
+from database import connect_to_mongo, close_mongo_connection, get_database
+from resources import resources
+from log_config import setup_logging, shutdown_logging
+from metrics import MetricsMiddleware, registry as metrics_registry
+from responses import MongoJSONResponse
+from services.shop_search import backfill_shop_search_fields
+from services.ratings import run_reconciliation
+import asyncio
+import os
 
 # Import routes
-from routes import auth, barbers, services, products, bookings, reviews, favorites, subscriptions
+from routes import auth, barbers, services, products, bookings, reviews, favorites, subscriptions, blobs
 
 # Import WebSocket
-from ws_handler import sio
+from ws_handler import sio, emit_to_shop
 
-ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging (queued JSON output, see log_config)
+setup_logging()
 logger = logging.getLogger(__name__)
 
+WARM_SHOP_PAGES = int(os.environ.get("WARM_SHOP_PAGES", "20"))
+
+async def warm_caches():
+    """Prefill the shop page cache with the most reviewed shops"""
+    if WARM_SHOP_PAGES <= 0:
+        return
+    shops = await resources.db.barber_shops.find({}, {"_id": 1}).sort(
+        "total_reviews", -1
+    ).limit(WARM_SHOP_PAGES).to_list(WARM_SHOP_PAGES)
+    await asyncio.gather(*(
+        resources.shop_page_cache.get(resources.db, shop["_id"]) for shop in shops
+    ))
+    logger.info(f"Warmed {len(shops)} shop pages")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Open and warm this worker's resources before it accepts traffic
+    Mongo is pinged and indexed, caches are prefilled and background
+    workers started; everything is torn down in reverse on shutdown
+    """
+    app.state.resources = resources
+    await connect_to_mongo()
+    await backfill_shop_search_fields(resources.db)
+    await resources.http_client.start()
+    resources.password_hasher.start()
+    await warm_caches()
+    resources.start_task(run_reconciliation(get_database))
+    resources.notifications.start(get_database, emit_to_shop)
+    resources.ready = True
+    logger.info("✅ ZenChair API started successfully")
+    
+    yield
+    
+    resources.ready = False
+    await resources.stop_tasks()
+    await resources.notifications.stop()
+    await close_mongo_connection()
+    await resources.http_client.close()
+    resources.password_hasher.shutdown()
+    logger.info("❌ ZenChair API shutdown")
+    shutdown_logging()
+
 # Create FastAPI app
 app = FastAPI(
     title="ZenChair Barber Marketplace API",
     description="Multi-tenant barber marketplace platform",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=MongoJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -38,8 +93,12 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Bookings-Version"],
 )
 
+# Latency and in-flight metrics, served at /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(barbers.router)
@@ -49,6 +108,7 @@ app.include_router(bookings.router)
 app.include_router(reviews.router)
 app.include_router(favorites.router)
 app.include_router(subscriptions.router)
+app.include_router(blobs.router)
 
 # Mount Socket.IO
 socket_app = socketio.ASGIApp(
@@ -57,17 +117,6 @@ socket_app = socketio.ASGIApp(
     socketio_path='/socket.io'
 )
 
-# Startup and shutdown events
-@app.on_event("startup")
-async def startup_event():
-    await connect_to_mongo()
-    logger.info("✅ ZenChair API started successfully")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    await close_mongo_connection()
-    logger.info("❌ ZenChair API shutdown")
-
 @app.get("/")
 async def root():
     return {
@@ -78,7 +127,18 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy" if resources.ready else "starting",
+        "session_cache": resources.session_cache.stats()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of request and MongoDB metrics"""
+    return PlainTextResponse(
+        metrics_registry.render(),
+        media_type="text/plain; version=0.0.4"
+    )
 
 # Export the socket_app for uvicorn
 app = socket_app
@@ -0,0 +1,171 @@
+# In-memory slot availability index
+# Keeps one DaySchedule of booked intervals per (shop_id, date) so the
+# customer slot picker is answered from memory. Booking writes update the
+# schedule in place (write-through), shop edits drop every cached day of that
+# shop and service edits drop the shop's cached service durations.
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from services.scheduling import DaySchedule, booking_interval, parse_minutes
+import os
+import time
+
+ACTIVE_STATUSES = ["pending", "confirmed"]
+
+CACHE_TTL_SECONDS = float(os.environ.get("AVAILABILITY_CACHE_TTL_SECONDS", "60"))
+CACHE_MAX_DAYS = int(os.environ.get("AVAILABILITY_CACHE_MAX_DAYS", "10000"))
+
+
+class DayAvailability:
+    """Cached schedule for one shop on one date"""
+
+    def __init__(self, schedule: Optional[DaySchedule], message: Optional[str] = None):
+        self.schedule = schedule
+        self.message = message
+        self.ready = False
+        self.expires_at = time.monotonic() + CACHE_TTL_SECONDS
+
+    def available_slots(self, duration: int) -> List[str]:
+        if self.schedule is None:
+            return []
+        return self.schedule.free_starts(duration)
+
+
+def build_schedule(shop: dict, date: str) -> Tuple[Optional[DaySchedule], Optional[str]]:
+    """Return an empty schedule for a date's working hours, or a closure message"""
+    # Check if shop is on vacation
+    if date in shop.get("vacation_dates", []):
+        return None, "Shop closed on this date"
+
+    # Get working hours for the day
+    day_of_week = datetime.strptime(date, "%Y-%m-%d").weekday()
+    working_hours = next(
+        (wh for wh in shop.get("working_hours", []) if wh["day"] == day_of_week),
+        None
+    )
+
+    if not working_hours or working_hours.get("is_closed"):
+        return None, "Shop closed on this day"
+
+    schedule = DaySchedule(
+        parse_minutes(working_hours["open_time"]),
+        parse_minutes(working_hours["close_time"])
+    )
+    return schedule, None
+
+
+class AvailabilityIndex:
+    """Bounded per-(shop_id, date) cache of DayAvailability entries"""
+
+    def __init__(self, max_days: int = CACHE_MAX_DAYS):
+        self.max_days = max_days
+        self._days: "OrderedDict[Tuple[str, str], DayAvailability]" = OrderedDict()
+        self._shops: Dict[str, Tuple[dict, float]] = {}
+        self._durations: Dict[str, Tuple[Dict[str, int], float]] = {}
+
+    def _get(self, shop_id: str, date: str) -> Optional[DayAvailability]:
+        key = (shop_id, date)
+        day = self._days.get(key)
+        if day is None:
+            return None
+        if day.expires_at < time.monotonic():
+            del self._days[key]
+            return None
+        self._days.move_to_end(key)
+        return day
+
+    async def _load_shop(self, db: AsyncIOMotorDatabase, shop_id: str) -> Optional[dict]:
+        cached = self._shops.get(shop_id)
+        if cached and cached[1] >= time.monotonic():
+            return cached[0]
+
+        shop = await db.barber_shops.find_one(
+            {"_id": shop_id},
+            {"working_hours": 1, "vacation_dates": 1}
+        )
+        if shop:
+            self._shops[shop_id] = (shop, time.monotonic() + CACHE_TTL_SECONDS)
+        return shop
+
+    async def service_durations(
+        self,
+        db: AsyncIOMotorDatabase,
+        shop_id: str
+    ) -> Dict[str, int]:
+        """Return {service_id: duration} for a shop's services"""
+        cached = self._durations.get(shop_id)
+        if cached and cached[1] >= time.monotonic():
+            return cached[0]
+
+        durations = {
+            service["_id"]: service.get("duration") or 0
+            async for service in db.services.find({"shop_id": shop_id}, {"duration": 1})
+        }
+        self._durations[shop_id] = (durations, time.monotonic() + CACHE_TTL_SECONDS)
+        return durations
+
+    async def get(
+        self,
+        db: AsyncIOMotorDatabase,
+        shop_id: str,
+        date: str
+    ) -> Optional[DayAvailability]:
+        """Return the day's availability, building it on a cache miss"""
+        day = self._get(shop_id, date)
+        if day is not None and day.ready:
+            return day
+
+        shop = await self._load_shop(db, shop_id)
+        if not shop:
+            return None
+
+        schedule, message = build_schedule(shop, date)
+        day = DayAvailability(schedule, message)
+
+        # Register before loading so bookings written meanwhile are applied
+        self._days[(shop_id, date)] = day
+        while len(self._days) > self.max_days:
+            self._days.popitem(last=False)
+
+        if schedule is not None:
+            booked_bookings = db.bookings.find(
+                {
+                    "shop_id": shop_id,
+                    "date": date,
+                    "status": {"$in": ACTIVE_STATUSES}
+                },
+                {"time": 1, "start_minute": 1, "end_minute": 1}
+            )
+            async for booking in booked_bookings:
+                start, end = booking_interval(booking)
+                schedule.add(booking["_id"], start, end)
+
+        day.ready = True
+        return day
+
+    def book(self, booking: dict):
+        """Record a booking's interval if its day is cached"""
+        day = self._get(booking["shop_id"], booking["date"])
+        if day is not None and day.schedule is not None:
+            start, end = booking_interval(booking)
+            day.schedule.add(booking["_id"], start, end)
+
+    def release(self, booking: dict):
+        """Free a booking's interval if its day is cached"""
+        day = self._get(booking["shop_id"], booking["date"])
+        if day is not None and day.schedule is not None:
+            day.schedule.remove(booking["_id"])
+
+    def invalidate_services(self, shop_id: str):
+        """Drop a shop's cached service durations after a service changes"""
+        self._durations.pop(shop_id, None)
+
+    def invalidate_shop(self, shop_id: str):
+        """Drop every cached day of a shop after its hours or closures change"""
+        self._shops.pop(shop_id, None)
+        for key in [key for key in self._days if key[0] == shop_id]:
+            del self._days[key]
+
+
+availability_index = AvailabilityIndex()
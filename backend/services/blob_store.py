@@ -0,0 +1,137 @@
+# Content-addressed blob store
+# Images are stored once under their SHA-256 digest and documents keep only a
+# reference ("/api/blobs/<digest>"), so shop and product queries no longer
+# carry base64 payloads. The local filesystem backend lays files out as
+# <root>/<d[:2]>/<d[2:4]>/<digest> with a small JSON sidecar for metadata;
+# writes go through a temp file and os.replace so readers never see partial
+# blobs. Identical uploads dedupe to the same file.
+from typing import Iterator, Optional, Tuple
+from pathlib import Path
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+BLOB_URL_PREFIX = "/api/blobs/"
+BLOB_CHUNK_SIZE = 64 * 1024
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+_DATA_URI = re.compile(r"^data:[^,]*;base64,", re.IGNORECASE)
+
+# Only these types are accepted, and the type is taken from the bytes, never
+# from the client: a data URI declaring text/html must not be served back as
+# HTML from the API origin
+IMAGE_TYPES = ("image/jpeg", "image/png", "image/gif", "image/webp")
+
+
+class InvalidBlob(ValueError):
+    """Raised when an upload is not valid base64 image data"""
+
+
+def is_blob_reference(value: str) -> bool:
+    return value.startswith(BLOB_URL_PREFIX)
+
+
+def sniff_image_type(data: bytes) -> Optional[str]:
+    """Return the image type given by the magic bytes, if it is an accepted one"""
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def decode_data_uri(value: str) -> Tuple[bytes, str]:
+    """Decode a data URI or bare base64 image into (bytes, content_type)"""
+    match = _DATA_URI.match(value)
+    if match:
+        value = value[match.end():]
+
+    try:
+        data = base64.b64decode(value, validate=False)
+    except (binascii.Error, ValueError):
+        raise InvalidBlob("Invalid base64 data")
+    if not data:
+        raise InvalidBlob("Empty image")
+
+    content_type = sniff_image_type(data)
+    if content_type is None:
+        raise InvalidBlob("Unsupported image type; use JPEG, PNG, GIF or WebP")
+    return data, content_type
+
+
+class LocalBlobStore:
+    """Filesystem-backed blob store"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def _put(self, data: bytes, content_type: str) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        # The sidecar is written last and marks the blob as complete
+        if path.with_suffix(".json").exists():
+            return digest
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {"content_type": content_type, "size": len(data)}
+        for target, payload in (
+            (path, data),
+            (path.with_suffix(".json"), json.dumps(meta).encode("utf-8")),
+        ):
+            fd, tmp = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, target)
+        return digest
+
+    async def put(self, data: bytes, content_type: str) -> str:
+        """Store bytes and return their digest"""
+        return await asyncio.to_thread(self._put, data, content_type)
+
+    def stat(self, digest: str) -> Optional[dict]:
+        """Return {"content_type", "size"} or None if the blob is unknown"""
+        if not DIGEST_PATTERN.match(digest):
+            return None
+        try:
+            with open(self._path(digest).with_suffix(".json"), "rb") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def iter_range(self, digest: str, start: int, end: int) -> Iterator[bytes]:
+        """Yield bytes [start, end] of a blob in chunks"""
+        with open(self._path(digest), "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(BLOB_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+
+async def store_image(value: str) -> str:
+    """Store an uploaded image and return its reference; references pass through"""
+    if is_blob_reference(value):
+        return value
+    data, content_type = decode_data_uri(value)
+    digest = await blob_store.put(data, content_type)
+    return BLOB_URL_PREFIX + digest
+
+
+blob_store = LocalBlobStore(
+    os.environ.get("BLOB_STORE_DIR", str(Path(__file__).parent.parent / "blobs"))
+)
@@ -0,0 +1,98 @@
+# Batched enrichment helpers
+# Collect the distinct foreign keys of a result list, fetch each referenced
+# collection once with $in and join in memory, so the number of Mongo round
+# trips stays constant no matter how many documents are being enriched.
+from typing import Dict, Iterable, List, Optional
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from services.projections import finalize_shop, shop_projection
+
+
+async def fetch_by_ids(
+    collection: AsyncIOMotorCollection,
+    ids: Iterable[str],
+    projection: Optional[dict] = None
+) -> Dict[str, dict]:
+    """Fetch documents by _id in a single query, keyed by _id"""
+    unique_ids = list({i for i in ids if i})
+    if not unique_ids:
+        return {}
+
+    cursor = collection.find({"_id": {"$in": unique_ids}}, projection)
+    return {doc["_id"]: doc async for doc in cursor}
+
+
+async def attach_services(db: AsyncIOMotorDatabase, bookings: List[dict]) -> List[dict]:
+    """Attach service documents to each booking"""
+    services_by_id = await fetch_by_ids(
+        db.services,
+        (sid for b in bookings for sid in b.get("service_ids", []))
+    )
+
+    for booking in bookings:
+        booking["services"] = [
+            services_by_id[sid]
+            for sid in booking.get("service_ids", [])
+            if sid in services_by_id
+        ]
+
+    return bookings
+
+
+async def attach_shops(db: AsyncIOMotorDatabase, bookings: List[dict]) -> List[dict]:
+    """Attach the shop card to each booking"""
+    shops_by_id = await fetch_by_ids(
+        db.barber_shops,
+        (b["shop_id"] for b in bookings),
+        shop_projection("card")
+    )
+    for shop in shops_by_id.values():
+        finalize_shop(shop, "card")
+
+    for booking in bookings:
+        booking["shop"] = shops_by_id.get(booking["shop_id"])
+
+    return bookings
+
+
+async def attach_customers(db: AsyncIOMotorDatabase, bookings: List[dict]) -> List[dict]:
+    """Attach customer contact details to each booking"""
+    customers_by_id = await fetch_by_ids(
+        db.users,
+        (b["customer_id"] for b in bookings),
+        {"name": 1, "phone": 1, "email": 1}
+    )
+
+    for booking in bookings:
+        customer = customers_by_id.get(booking["customer_id"])
+        if customer:
+            booking["customer"] = {
+                "name": customer["name"],
+                "phone": customer.get("phone"),
+                "email": customer.get("email")
+            }
+        else:
+            # Guest bookings carry the contact details on the booking itself
+            booking["customer"] = {
+                "name": booking.get("customer_name"),
+                "phone": booking.get("customer_phone"),
+                "email": None
+            }
+
+    return bookings
+
+
+async def attach_review_authors(db: AsyncIOMotorDatabase, reviews: List[dict]) -> List[dict]:
+    """Attach author name and picture to each review"""
+    customers_by_id = await fetch_by_ids(
+        db.users,
+        (r["customer_id"] for r in reviews),
+        {"name": 1, "picture": 1}
+    )
+
+    for review in reviews:
+        customer = customers_by_id.get(review["customer_id"])
+        if customer:
+            review["customer_name"] = customer["name"]
+            review["customer_picture"] = customer.get("picture")
+
+    return reviews
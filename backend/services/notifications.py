@@ -0,0 +1,214 @@
+# Booking notification outbox, delivered at-least-once by background workers
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_QUEUE_SIZE = int(os.environ.get("NOTIFICATION_QUEUE_SIZE", "1000"))
+NOTIFICATION_WORKERS = int(os.environ.get("NOTIFICATION_WORKERS", "2"))
+NOTIFICATION_BATCH_SIZE = int(os.environ.get("NOTIFICATION_BATCH_SIZE", "50"))
+NOTIFICATION_EMIT_RETRIES = int(os.environ.get("NOTIFICATION_EMIT_RETRIES", "3"))
+NOTIFICATION_MAX_ATTEMPTS = int(os.environ.get("NOTIFICATION_MAX_ATTEMPTS", "10"))
+NOTIFICATION_SWEEP_INTERVAL_SECONDS = float(os.environ.get("NOTIFICATION_SWEEP_INTERVAL_SECONDS", "5"))
+NOTIFICATION_OUTBOX_TTL_SECONDS = int(os.environ.get("NOTIFICATION_OUTBOX_TTL_SECONDS", str(7 * 24 * 3600)))
+NOTIFICATION_REPLAY_GRACE_SECONDS = float(os.environ.get("NOTIFICATION_REPLAY_GRACE_SECONDS", "5"))
+REPLAY_LIMIT = 500
+
+# Events younger than this are assumed to still be on their way through the
+# queue and are left alone by the sweeper
+SWEEP_GRACE = timedelta(seconds=2)
+
+Emitter = Callable[[str, str, dict], Awaitable[None]]
+
+
+async def next_sequence(db: AsyncIOMotorDatabase, shop_id: str) -> int:
+    """Allocate the next notification sequence number for a shop"""
+    counter = await db.notification_counters.find_one_and_update(
+        {"_id": shop_id},
+        {"$inc": {"seq": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return counter["seq"]
+
+
+async def events_since(
+    db: AsyncIOMotorDatabase,
+    shop_id: str,
+    since: int,
+    limit: int = REPLAY_LIMIT
+) -> List[dict]:
+    """
+    Outbox events for a shop with seq greater than since, oldest first
+    Stops at a gap in seq that may still fill in: a seq is allocated before
+    its event is written, so the missing one could still be on its way
+    """
+    cursor = db.notification_outbox.find(
+        {"shop_id": shop_id, "seq": {"$gt": since}},
+        {"_id": 0, "seq": 1, "event": 1, "payload": 1, "created_at": 1}
+    ).sort("seq", 1).limit(limit)
+    settled = datetime.utcnow() - timedelta(seconds=NOTIFICATION_REPLAY_GRACE_SECONDS)
+    events = []
+    async for doc in cursor:
+        if doc["seq"] > since + 1 and doc["created_at"] > settled:
+            break
+        since = doc["seq"]
+        events.append({"seq": doc["seq"], "event": doc["event"], "data": {**doc["payload"], "seq": doc["seq"]}})
+    return events
+
+
+def _coalesce(batch: List[dict]) -> List[dict]:
+    """Keep only the newest event per (shop, event, booking), in seq order"""
+    latest: Dict[Tuple[str, str, Optional[str]], dict] = {}
+    for doc in batch:
+        # Events not about a single booking are never merged
+        key = (doc["shop_id"], doc["event"], doc["payload"].get("booking_id") or doc["_id"])
+        if key not in latest or latest[key]["seq"] < doc["seq"]:
+            latest[key] = doc
+    return sorted(latest.values(), key=lambda doc: (doc["shop_id"], doc["seq"]))
+
+
+class NotificationDispatcher:
+    """Persisted outbox plus a bounded queue drained by background workers"""
+
+    def __init__(
+        self,
+        queue_size: int = NOTIFICATION_QUEUE_SIZE,
+        workers: int = NOTIFICATION_WORKERS,
+        batch_size: int = NOTIFICATION_BATCH_SIZE
+    ):
+        self.queue_size = queue_size
+        self.workers = workers
+        self.batch_size = batch_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued: set = set()
+        self._tasks: List[asyncio.Task] = []
+        self._db_getter = None
+        self._emit: Optional[Emitter] = None
+
+    def start(self, db_getter, emit: Emitter):
+        """Start the workers and the sweeper; emit(shop_id, event, data) does the socket I/O"""
+        self._db_getter = db_getter
+        self._emit = emit
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweeper()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._queued.clear()
+
+    async def publish(self, db: AsyncIOMotorDatabase, shop_id: str, event: str, payload: dict) -> int:
+        """Persist an event to the outbox and queue it for delivery; returns its seq"""
+        seq = await next_sequence(db, shop_id)
+        doc = {
+            "_id": f"{shop_id}:{seq}",
+            "shop_id": shop_id,
+            "seq": seq,
+            "event": event,
+            "payload": payload,
+            "pending": True,
+            "attempts": 0,
+            "created_at": datetime.utcnow()
+        }
+        await db.notification_outbox.insert_one(doc)
+        self._enqueue(doc)
+        return seq
+
+    def _enqueue(self, doc: dict) -> bool:
+        if self._queue is None or doc["_id"] in self._queued:
+            return False
+        try:
+            self._queue.put_nowait(doc)
+        except asyncio.QueueFull:
+            # Backpressure: the event stays pending and the sweeper retries it
+            return False
+        self._queued.add(doc["_id"])
+        return True
+
+    async def _worker(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._deliver(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Notification delivery failed")
+            finally:
+                for doc in batch:
+                    self._queued.discard(doc["_id"])
+
+    async def _emit_with_retry(self, doc: dict) -> bool:
+        data = {**doc["payload"], "seq": doc["seq"]}
+        for attempt in range(NOTIFICATION_EMIT_RETRIES):
+            try:
+                await self._emit(doc["shop_id"], doc["event"], data)
+                return True
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Emit of {doc['_id']} failed (attempt {attempt + 1}): {e}")
+                await asyncio.sleep(0.1 * 2 ** attempt)
+        return False
+
+    async def _deliver(self, batch: List[dict]):
+        to_emit = _coalesce(batch)
+        emitted_ids = {doc["_id"] for doc in to_emit}
+        # Events superseded by a newer one in the same batch count as delivered
+        delivered = [doc["_id"] for doc in batch if doc["_id"] not in emitted_ids]
+        failed = []
+
+        for doc in to_emit:
+            if await self._emit_with_retry(doc):
+                delivered.append(doc["_id"])
+            else:
+                failed.append(doc["_id"])
+
+        db = self._db_getter()
+        if delivered:
+            await db.notification_outbox.update_many(
+                {"_id": {"$in": delivered}},
+                {"$unset": {"pending": ""}, "$set": {"delivered_at": datetime.utcnow()}}
+            )
+        if failed:
+            await db.notification_outbox.update_many(
+                {"_id": {"$in": failed}},
+                {"$inc": {"attempts": 1}}
+            )
+
+    async def _sweep(self):
+        free = self._queue.maxsize - self._queue.qsize()
+        if free <= 0:
+            return
+        cursor = self._db_getter().notification_outbox.find({
+            "pending": True,
+            "attempts": {"$lt": NOTIFICATION_MAX_ATTEMPTS},
+            "created_at": {"$lt": datetime.utcnow() - SWEEP_GRACE}
+        }).sort("created_at", 1).limit(free)
+        async for doc in cursor:
+            self._enqueue(doc)
+
+    async def _sweeper(self):
+        while True:
+            try:
+                await self._sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Notification outbox sweep failed")
+            await asyncio.sleep(NOTIFICATION_SWEEP_INTERVAL_SECONDS)
+
+
+notification_dispatcher = NotificationDispatcher()
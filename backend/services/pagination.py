@@ -0,0 +1,92 @@
+# Keyset pagination with opaque cursors, returned in the X-Next-Cursor header
+from datetime import datetime
+from typing import List, Optional
+from fastapi import HTTPException, Response, status
+from motor.motor_asyncio import AsyncIOMotorCollection
+import base64
+import json
+import os
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+DEFAULT_PAGE_SIZE = int(os.environ.get("DEFAULT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.environ.get("MAX_PAGE_SIZE", "200"))
+
+
+def encode_cursor(position: dict) -> str:
+    raw = json.dumps(position, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        position = None
+
+    if not isinstance(position, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return position
+
+
+def set_next_cursor(response: Response, position: Optional[dict]):
+    """Expose the next page's cursor, if there is one"""
+    if position is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(position)
+
+
+async def paginate(
+    collection: AsyncIOMotorCollection,
+    query: dict,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    projection: Optional[dict] = None,
+    descending: bool = True
+) -> List[dict]:
+    """Return one page of query results in (created_at, _id) order"""
+    order = -1 if descending else 1
+    after_op = "$lt" if descending else "$gt"
+
+    # Inclusion projections must still return the sort key for the cursor
+    if projection and "created_at" not in projection and any(
+        value not in (0, False) for value in projection.values()
+    ):
+        projection = {**projection, "created_at": 1}
+
+    if cursor:
+        position = decode_cursor(cursor)
+        try:
+            created_at = datetime.fromisoformat(position["t"])
+            last_id = position["id"]
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        query = {
+            "$and": [
+                query,
+                {
+                    "$or": [
+                        {"created_at": {after_op: created_at}},
+                        {"created_at": created_at, "_id": {after_op: last_id}}
+                    ]
+                }
+            ]
+        }
+
+    items = await collection.find(query, projection).sort(
+        [("created_at", order), ("_id", order)]
+    ).limit(limit + 1).to_list(limit + 1)
+
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        set_next_cursor(response, {"t": last["created_at"].isoformat(), "id": last["_id"]})
+
+    return items
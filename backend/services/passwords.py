@@ -0,0 +1,67 @@
+# Password hashing off the event loop
+# bcrypt is deliberately slow (~100-300 ms per call at the default cost), so
+# hashing and verification run on a small dedicated thread pool. bcrypt
+# releases the GIL while it works, so other requests and socket events keep
+# being served. A semaphore caps in-flight hashes; a login storm queues here
+# instead of saturating every core. The pool and semaphore are created by
+# start() in the app lifespan rather than at import, since an asyncio
+# semaphore is bound to the event loop it is first used on.
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import asyncio
+import os
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+def _hash(password: str) -> str:
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def _verify(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+class PasswordHasher:
+    """bcrypt on a bounded thread pool, opened by start() and closed by shutdown()"""
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS):
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def start(self):
+        """Create the pool; the semaphore belongs to the loop that runs the app"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="bcrypt"
+            )
+        self._slots = asyncio.Semaphore(self.workers)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, func, *args):
+        if self._executor is None:
+            self.start()
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password on the bcrypt pool"""
+        return await self._run(_hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        """Check a password against its hash on the bcrypt pool"""
+        return await self._run(_verify, password, hashed)
+
+
+password_hasher = PasswordHasher()
+
@@ -0,0 +1,46 @@
+# Named response shapes for shop documents
+# Each shape maps to a Mongo projection so list endpoints only fetch the
+# fields they render:
+#   card   - search results, favorites, recents: listing fields + thumbnail
+#   detail - the public shop page: everything except internal search fields
+#   owner  - the barber's own shop: the full document
+from typing import List, Literal, Optional
+
+ShopShape = Literal["card", "detail", "owner"]
+
+CARD_FIELDS = ["name", "description", "location", "rating", "total_reviews", "is_open"]
+INTERNAL_FIELDS = ["city_normalized", "geo"]
+
+
+def shop_projection(shape: ShopShape) -> Optional[dict]:
+    """Projection for find() / find_one()"""
+    if shape == "card":
+        projection = {field: 1 for field in CARD_FIELDS}
+        projection["gallery_images"] = {"$slice": 1}
+        return projection
+    if shape == "detail":
+        return {field: 0 for field in INTERNAL_FIELDS}
+    return None
+
+
+def shop_project_stage(shape: ShopShape, keep: List[str] = ()) -> Optional[dict]:
+    """$project stage for aggregations, keeping any computed `keep` fields"""
+    if shape == "card":
+        stage = {field: 1 for field in [*CARD_FIELDS, *keep]}
+        stage["gallery_images"] = {"$slice": [{"$ifNull": ["$gallery_images", []]}, 1]}
+        return {"$project": stage}
+    if shape == "detail":
+        return {"$project": {field: 0 for field in INTERNAL_FIELDS}}
+    return None
+
+
+def finalize_shop(shop: dict, shape: ShopShape) -> dict:
+    """Turn a projected document into its response shape"""
+    if shape == "card":
+        gallery = shop.pop("gallery_images", None) or []
+        shop["thumbnail"] = gallery[0] if gallery else None
+    return shop
+
+
+def finalize_shops(shops: List[dict], shape: ShopShape) -> List[dict]:
+    return [finalize_shop(shop, shape) for shop in shops]
@@ -0,0 +1,118 @@
+# Incremental shop rating aggregates with periodic reconciliation
+from datetime import datetime, timedelta
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_INTERVAL_SECONDS = float(os.environ.get("RATING_RECONCILE_INTERVAL_SECONDS", "3600"))
+# A review write older than this is assumed finished or crashed
+RECONCILE_GRACE_SECONDS = float(os.environ.get("RATING_RECONCILE_GRACE_SECONDS", "60"))
+
+
+def _derived_fields() -> dict:
+    return {
+        "rating": {
+            "$cond": [
+                {"$gt": ["$rating_count", 0]},
+                {"$round": [{"$divide": ["$rating_sum", "$rating_count"]}, 1]},
+                0.0
+            ]
+        },
+        "total_reviews": "$rating_count"
+    }
+
+
+async def begin_rating_change(db: AsyncIOMotorDatabase, shop_id: str) -> bool:
+    """Stamp a shop before one of its reviews is written; False if it doesn't exist"""
+    result = await db.barber_shops.update_one(
+        {"_id": shop_id},
+        {"$set": {"rating_changed_at": datetime.utcnow()}}
+    )
+    return result.matched_count > 0
+
+
+async def apply_rating_change(
+    db: AsyncIOMotorDatabase,
+    shop_id: str,
+    sum_delta: int,
+    count_delta: int
+):
+    """Adjust a shop's rating aggregates and re-derive its average atomically"""
+    await db.barber_shops.update_one(
+        {"_id": shop_id},
+        [
+            {
+                "$set": {
+                    "rating_sum": {"$add": [{"$ifNull": ["$rating_sum", 0]}, sum_delta]},
+                    "rating_count": {"$add": [{"$ifNull": ["$rating_count", 0]}, count_delta]}
+                }
+            },
+            {"$set": _derived_fields()}
+        ]
+    )
+
+
+async def reconcile_ratings(db: AsyncIOMotorDatabase) -> int:
+    """Recompute every shop's aggregates from its reviews; returns shops fixed"""
+    # Read the stored aggregates and stamps before counting. A shop stamped
+    # within the grace period may have a review written but not yet applied;
+    # a stamp that moves while we count fails the conditional update below
+    cutoff = datetime.utcnow() - timedelta(seconds=RECONCILE_GRACE_SECONDS)
+    stored = {
+        shop["_id"]: (shop.get("rating_sum"), shop.get("rating_count"), shop.get("rating_changed_at"))
+        async for shop in db.barber_shops.find(
+            {}, {"rating_sum": 1, "rating_count": 1, "rating_changed_at": 1}
+        )
+    }
+
+    actual = {
+        row["_id"]: (row["sum"], row["count"])
+        async for row in db.reviews.aggregate([
+            {"$group": {"_id": "$shop_id", "sum": {"$sum": "$rating"}, "count": {"$sum": 1}}}
+        ])
+    }
+
+    operations = []
+    for shop_id, (stored_sum, stored_count, changed_at) in stored.items():
+        rating_sum, rating_count = actual.get(shop_id, (0, 0))
+        if (stored_sum, stored_count) == (rating_sum, rating_count):
+            continue
+        if changed_at and changed_at > cutoff:
+            continue
+
+        operations.append(UpdateOne(
+            {
+                "_id": shop_id,
+                "rating_sum": stored_sum,
+                "rating_count": stored_count,
+                "rating_changed_at": changed_at
+            },
+            [
+                {"$set": {"rating_sum": rating_sum, "rating_count": rating_count}},
+                {"$set": _derived_fields()}
+            ]
+        ))
+
+    if not operations:
+        return 0
+
+    result = await db.barber_shops.bulk_write(operations, ordered=False)
+    if result.modified_count:
+        logger.warning(f"Reconciled rating aggregates for {result.modified_count} shops")
+    return result.modified_count
+
+
+async def run_reconciliation(db_getter):
+    """Reconcile rating aggregates forever, once per interval"""
+    while True:
+        try:
+            await reconcile_ratings(db_getter())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Rating reconciliation failed")
+        await asyncio.sleep(RECONCILE_INTERVAL_SECONDS)
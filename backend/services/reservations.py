@@ -0,0 +1,62 @@
+# Atomic slot reservation
+# A booking claims every 5-minute bucket of its [start, end) interval by
+# inserting one slot_locks document per bucket, keyed by shop, date and
+# bucket. The unique _id makes Mongo the arbiter: of two overlapping bookings
+# only one can insert the shared bucket, without any application-level lock.
+# Buckets are inserted in ascending order, so two requests for the same start
+# time collide on the very first document and the loser writes nothing.
+from datetime import datetime, timedelta
+from typing import List
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError
+
+LOCK_MINUTES = 5
+LOCK_RETENTION = timedelta(days=1)  # Keep locks one day past the booking date
+
+
+class SlotUnavailable(Exception):
+    """Raised when another booking already holds part of the interval"""
+
+
+def lock_ids(shop_id: str, date: str, start: int, end: int) -> List[str]:
+    """Return the lock keys covering [start, end)"""
+    first = start // LOCK_MINUTES
+    last = -(-end // LOCK_MINUTES)  # ceil
+    return [f"{shop_id}|{date}|{bucket * LOCK_MINUTES}" for bucket in range(first, last)]
+
+
+async def reserve_slot(
+    db: AsyncIOMotorDatabase,
+    booking_id: str,
+    shop_id: str,
+    date: str,
+    start: int,
+    end: int
+):
+    """Claim [start, end) for a booking in one round trip or raise SlotUnavailable"""
+    expires_at = datetime.strptime(date, "%Y-%m-%d") + LOCK_RETENTION
+    locks = [
+        {
+            "_id": lock_id,
+            "booking_id": booking_id,
+            "shop_id": shop_id,
+            "date": date,
+            "expires_at": expires_at
+        }
+        for lock_id in lock_ids(shop_id, date, start, end)
+    ]
+
+    try:
+        await db.slot_locks.insert_many(locks, ordered=True)
+    except BulkWriteError as e:
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+        # Give back any buckets claimed before the collision
+        if e.details.get("nInserted"):
+            await release_slot(db, booking_id)
+        raise SlotUnavailable()
+
+
+async def release_slot(db: AsyncIOMotorDatabase, booking_id: str):
+    """Release every bucket held by a booking"""
+    await db.slot_locks.delete_many({"booking_id": booking_id})
@@ -0,0 +1,103 @@
+# Interval-based scheduling engine
+# A booking occupies [start_minute, end_minute) on its date, where the end is
+# the start plus the summed duration of the booked services. DaySchedule keeps
+# the day's intervals sorted by start with a running maximum of end times, so
+# an overlap query is a single bisect instead of a scan of the day's bookings.
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Tuple
+
+SLOT_MINUTES = 30  # Granularity of offered start times
+DEFAULT_DURATION = 30  # Assumed length of bookings stored without an end time
+
+
+def parse_minutes(value: str) -> int:
+    """Convert "HH:MM" to minutes since midnight"""
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def format_minutes(value: int) -> str:
+    """Convert minutes since midnight to HH:MM"""
+    return f"{value // 60:02d}:{value % 60:02d}"
+
+
+def total_duration(services: Iterable[dict]) -> int:
+    """Sum the durations of the selected services"""
+    duration = sum(s.get("duration") or 0 for s in services)
+    return duration or DEFAULT_DURATION
+
+
+def booking_interval(booking: dict) -> Tuple[int, int]:
+    """Return the [start, end) minutes occupied by a stored booking"""
+    start = booking.get("start_minute")
+    if start is None:
+        start = parse_minutes(booking["time"])
+    end = booking.get("end_minute")
+    if end is None:
+        end = start + DEFAULT_DURATION
+    return start, end
+
+
+class DaySchedule:
+    """Booked intervals of one shop on one day, sorted by start"""
+
+    def __init__(self, open_minute: int, close_minute: int):
+        self.open_minute = open_minute
+        self.close_minute = close_minute
+        self._intervals: List[Tuple[int, int, str]] = []  # (start, end, booking_id)
+        self._starts: List[int] = []
+        self._max_ends: List[int] = []  # max end over _intervals[:i + 1]
+        self._by_booking: Dict[str, Tuple[int, int, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def _reindex(self):
+        self._starts = [interval[0] for interval in self._intervals]
+        self._max_ends = []
+        running = 0
+        for _, end, _ in self._intervals:
+            running = max(running, end)
+            self._max_ends.append(running)
+
+    def add(self, booking_id: str, start: int, end: int):
+        """Record a booking interval (replacing any previous one for the id)"""
+        self._discard(booking_id)
+        interval = (start, end, booking_id)
+        insort(self._intervals, interval)
+        self._by_booking[booking_id] = interval
+        self._reindex()
+
+    def remove(self, booking_id: str):
+        """Forget a booking interval"""
+        if self._discard(booking_id):
+            self._reindex()
+
+    def _discard(self, booking_id: str) -> bool:
+        interval = self._by_booking.pop(booking_id, None)
+        if interval is None:
+            return False
+        self._intervals.remove(interval)
+        return True
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """Check whether [start, end) intersects any booked interval"""
+        # Only intervals starting before `end` can intersect; among those the
+        # running maximum tells whether any of them reaches past `start`.
+        i = bisect_left(self._starts, end)
+        return i > 0 and self._max_ends[i - 1] > start
+
+    def fits(self, start: int, end: int) -> bool:
+        """Check whether [start, end) lies within working hours"""
+        return self.open_minute <= start and end <= self.close_minute
+
+    def is_free(self, start: int, end: int) -> bool:
+        return self.fits(start, end) and not self.overlaps(start, end)
+
+    def free_starts(self, duration: int, step: int = SLOT_MINUTES) -> List[str]:
+        """Start times on the slot grid where `duration` minutes are free"""
+        return [
+            format_minutes(start)
+            for start in range(self.open_minute, self.close_minute - duration + 1, step)
+            if not self.overlaps(start, start + duration)
+        ]
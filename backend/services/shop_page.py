@@ -0,0 +1,111 @@
+# Shop page loader and cache
+# The public shop page needs the shop, its services, its products, its newest
+# reviews and a rating histogram. These are fetched concurrently, so a cache
+# miss costs about as long as the slowest query rather than the sum of them,
+# and the assembled page is cached per shop. Every write path that changes
+# what the page shows (shop, services, products, reviews) calls invalidate().
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from services.enrichment import attach_review_authors
+from services.projections import shop_projection
+import asyncio
+import os
+import time
+
+SHOP_PAGE_REVIEWS = int(os.environ.get("SHOP_PAGE_REVIEWS", "10"))
+SHOP_PAGE_CATALOG_LIMIT = 100
+SHOP_PAGE_CACHE_TTL_SECONDS = float(os.environ.get("SHOP_PAGE_CACHE_TTL_SECONDS", "30"))
+SHOP_PAGE_CACHE_MAX_SIZE = int(os.environ.get("SHOP_PAGE_CACHE_MAX_SIZE", "2000"))
+
+
+async def _rating_histogram(db: AsyncIOMotorDatabase, shop_id: str) -> dict:
+    histogram = {str(stars): 0 for stars in range(1, 6)}
+    async for row in db.reviews.aggregate([
+        {"$match": {"shop_id": shop_id}},
+        {"$group": {"_id": "$rating", "count": {"$sum": 1}}}
+    ]):
+        histogram[str(row["_id"])] = row["count"]
+    return histogram
+
+
+async def _newest_reviews(db: AsyncIOMotorDatabase, shop_id: str) -> list:
+    reviews = await db.reviews.find({"shop_id": shop_id}).sort(
+        [("created_at", -1), ("_id", -1)]
+    ).limit(SHOP_PAGE_REVIEWS).to_list(SHOP_PAGE_REVIEWS)
+    return await attach_review_authors(db, reviews)
+
+
+def _catalog(db: AsyncIOMotorDatabase, collection: str, shop_id: str):
+    return db[collection].find({"shop_id": shop_id}).sort(
+        [("created_at", 1), ("_id", 1)]
+    ).to_list(SHOP_PAGE_CATALOG_LIMIT)
+
+
+async def load_shop_page(db: AsyncIOMotorDatabase, shop_id: str) -> Optional[dict]:
+    """Fetch everything the shop page shows in parallel"""
+    shop, services, products, reviews, histogram = await asyncio.gather(
+        db.barber_shops.find_one({"_id": shop_id}, shop_projection("detail")),
+        _catalog(db, "services", shop_id),
+        _catalog(db, "products", shop_id),
+        _newest_reviews(db, shop_id),
+        _rating_histogram(db, shop_id)
+    )
+    if not shop:
+        return None
+
+    return {
+        **shop,
+        "services": services,
+        "products": products,
+        "reviews": reviews,
+        "rating_histogram": histogram
+    }
+
+
+class ShopPageCache:
+    """Bounded TTL cache of assembled shop pages"""
+
+    def __init__(
+        self,
+        max_size: int = SHOP_PAGE_CACHE_MAX_SIZE,
+        ttl_seconds: float = SHOP_PAGE_CACHE_TTL_SECONDS
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._pages: "OrderedDict[str, Tuple[dict, float]]" = OrderedDict()
+        # Loads in flight per shop, and invalidations seen while they ran; a
+        # load that raced an invalidation is not stored
+        self._loading: Dict[str, int] = {}
+        self._generations: Dict[str, int] = {}
+
+    async def get(self, db: AsyncIOMotorDatabase, shop_id: str) -> Optional[dict]:
+        cached = self._pages.get(shop_id)
+        if cached and cached[1] >= time.monotonic():
+            self._pages.move_to_end(shop_id)
+            return cached[0]
+
+        generation = self._generations.get(shop_id, 0)
+        self._loading[shop_id] = self._loading.get(shop_id, 0) + 1
+        try:
+            page = await load_shop_page(db, shop_id)
+        finally:
+            stale = self._generations.get(shop_id, 0) != generation
+            self._loading[shop_id] -= 1
+            if not self._loading[shop_id]:
+                del self._loading[shop_id]
+                self._generations.pop(shop_id, None)
+        if page is not None and not stale:
+            self._pages[shop_id] = (page, time.monotonic() + self.ttl_seconds)
+            self._pages.move_to_end(shop_id)
+            while len(self._pages) > self.max_size:
+                self._pages.popitem(last=False)
+        return page
+
+    def invalidate(self, shop_id: str):
+        self._pages.pop(shop_id, None)
+        if shop_id in self._loading:
+            self._generations[shop_id] = self._generations.get(shop_id, 0) + 1
+
+
+shop_page_cache = ShopPageCache()
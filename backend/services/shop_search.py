@@ -0,0 +1,131 @@
+# Shop search
+# Shops carry two derived, indexed fields next to their Location:
+#   geo             GeoJSON Point [longitude, latitude] (2dsphere index)
+#   city_normalized trimmed, lower-cased city name (ascending index)
+# Nearby search runs $geoNear, which walks the 2dsphere index outward from
+# the caller and stops at the radius, so its cost follows the number of
+# nearby shops rather than the size of the collection.
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from services.projections import ShopShape, finalize_shops, shop_project_stage, shop_projection
+import re
+
+
+def normalize_city(city: str) -> str:
+    return city.strip().lower()
+
+
+def shop_search_fields(location: dict) -> dict:
+    """Derived search fields for a shop's location"""
+    return {
+        "geo": {
+            "type": "Point",
+            "coordinates": [location["longitude"], location["latitude"]]
+        },
+        "city_normalized": normalize_city(location["city"])
+    }
+
+
+async def backfill_shop_search_fields(db: AsyncIOMotorDatabase) -> int:
+    """Derive search fields for shops stored before they existed"""
+    result = await db.barber_shops.update_many(
+        {"geo": {"$exists": False}, "location.latitude": {"$exists": True}},
+        [{
+            "$set": {
+                "geo": {
+                    "type": "Point",
+                    "coordinates": ["$location.longitude", "$location.latitude"]
+                },
+                "city_normalized": {"$toLower": {"$trim": {"input": "$location.city"}}}
+            }
+        }]
+    )
+    return result.modified_count
+
+
+def _cursor_position(after: Optional[dict], fields: Dict[str, tuple]) -> Optional[dict]:
+    """Check a decoded cursor holds exactly the fields this search pages by"""
+    if after is None:
+        return None
+    if set(after) != set(fields) or any(
+        isinstance(after[field], bool) or not isinstance(after[field], types)
+        for field, types in fields.items()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return after
+
+
+async def find_nearby_shops(
+    db: AsyncIOMotorDatabase,
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    limit: int,
+    after: Optional[dict] = None,
+    shape: ShopShape = "card"
+) -> Tuple[List[dict], Optional[dict]]:
+    """Shops within radius_km, nearest first, with the next page position"""
+    after = _cursor_position(after, {"d": (int, float), "id": (str,)})
+    geo_near = {
+        "near": {"type": "Point", "coordinates": [longitude, latitude]},
+        "distanceField": "distance_m",
+        "maxDistance": radius_km * 1000,
+        "spherical": True
+    }
+    pipeline = [{"$geoNear": geo_near}]
+
+    if after:
+        # Resume at the last distance; ties are broken by _id
+        geo_near["minDistance"] = after["d"]
+        pipeline.append({
+            "$match": {
+                "$or": [
+                    {"distance_m": {"$gt": after["d"]}},
+                    {"distance_m": after["d"], "_id": {"$gt": after["id"]}}
+                ]
+            }
+        })
+
+    pipeline += [
+        {"$sort": {"distance_m": 1, "_id": 1}},
+        {"$limit": limit + 1}
+    ]
+    project = shop_project_stage(shape, keep=["distance_m"])
+    if project:
+        pipeline.append(project)
+
+    shops = await db.barber_shops.aggregate(pipeline).to_list(limit + 1)
+    shops, position = _page(shops, limit, lambda last: {"d": last["distance_m"], "id": last["_id"]})
+    return finalize_shops(shops, shape), position
+
+
+async def find_shops(
+    db: AsyncIOMotorDatabase,
+    city: Optional[str],
+    limit: int,
+    after: Optional[dict] = None,
+    shape: ShopShape = "card"
+) -> Tuple[List[dict], Optional[dict]]:
+    """Shops whose city starts with `city` (or all shops), by _id"""
+    after = _cursor_position(after, {"id": (str,)})
+    query = {}
+    if city:
+        # Anchored prefix on the normalized field can use its index
+        query["city_normalized"] = {"$regex": "^" + re.escape(normalize_city(city))}
+    if after:
+        query["_id"] = {"$gt": after["id"]}
+
+    cursor = db.barber_shops.find(query, shop_projection(shape)).sort("_id", 1).limit(limit + 1)
+    shops, position = _page(await cursor.to_list(limit + 1), limit, lambda last: {"id": last["_id"]})
+    return finalize_shops(shops, shape), position
+
+
+def _page(items: List[dict], limit: int, position_of) -> Tuple[List[dict], Optional[dict]]:
+    if len(items) > limit:
+        items = items[:limit]
+        return items, position_of(items[-1])
+    return items, None
@@ -1,9 +1,12 @@
 # Mock Tranzila Payment Service for Testing
 from pydantic import BaseModel
 from typing import Optional
+import logging
 import uuid
 from datetime import datetime, timedelta
 
+logger = logging.getLogger(__name__)
+
 class TranzilaPaymentRequest(BaseModel):
     amount: float
     currency: str = "ILS"
@@ -37,12 +40,13 @@ def process_tranzila_payment(request: TranzilaPaymentRequest) -> TranzilaPayment
     payment_token = f"tok_test_{uuid.uuid4().hex[:16]}"
     
     # Simulate processing delay (would be real API call)
-    print(f"[MOCK TRANZILA] Processing payment:")
-    print(f"  Amount: {request.amount} {request.currency}")
-    print(f"  Customer: {request.customer_name} ({request.customer_email})")
-    print(f"  Plan: {request.plan}")
-    print(f"  Transaction ID: {transaction_id}")
-    print(f"  Standing Order ID: {standing_order_id}")
+    logger.info("[MOCK TRANZILA] Processing payment", extra={
+        "amount": request.amount,
+        "currency": request.currency,
+        "plan": request.plan,
+        "transaction_id": transaction_id,
+        "standing_order_id": standing_order_id
+    })
     
     # Always succeed in test mode
     return TranzilaPaymentResponse(
@@ -57,5 +61,5 @@ def cancel_tranzila_standing_order(standing_order_id: str) -> bool:
     """
     MOCK TRANZILA CANCELLATION - FOR TESTING ONLY
     """
-    print(f"[MOCK TRANZILA] Cancelling standing order: {standing_order_id}")
+    logger.info("[MOCK TRANZILA] Cancelling standing order", extra={"standing_order_id": standing_order_id})
     return True
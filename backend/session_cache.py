@@ -0,0 +1,91 @@
+# Per-process session lookup cache, kept short-lived since other workers hold their own copies
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Optional, Set, Tuple
+import os
+import time
+
+SESSION_CACHE_TTL_SECONDS = float(os.environ.get("SESSION_CACHE_TTL_SECONDS", "5"))
+SESSION_CACHE_MAX_SIZE = int(os.environ.get("SESSION_CACHE_MAX_SIZE", "10000"))
+
+
+class SessionCache:
+    """Bounded TTL + LRU cache of resolved sessions"""
+
+    def __init__(
+        self,
+        max_size: int = SESSION_CACHE_MAX_SIZE,
+        ttl_seconds: float = SESSION_CACHE_TTL_SECONDS
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        # {session_token: (user_doc, expires_at, cached_until)}
+        self._entries: "OrderedDict[str, Tuple[dict, datetime, float]]" = OrderedDict()
+        self._tokens_by_user: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, session_token: str) -> Optional[dict]:
+        """Return the cached user document for a live session"""
+        entry = self._entries.get(session_token)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        user_doc, expires_at, cached_until = entry
+        if cached_until < time.monotonic() or expires_at < datetime.now(timezone.utc):
+            self.invalidate(session_token)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(session_token)
+        self.hits += 1
+        return user_doc
+
+    def put(self, session_token: str, user_doc: dict, expires_at: datetime):
+        """Cache a resolved session"""
+        self.invalidate(session_token)
+        self._entries[session_token] = (
+            user_doc,
+            expires_at,
+            time.monotonic() + self.ttl_seconds
+        )
+        self._tokens_by_user.setdefault(user_doc["_id"], set()).add(session_token)
+
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self.invalidate(oldest)
+            self.evictions += 1
+
+    def invalidate(self, session_token: str):
+        """Drop one session, e.g. on logout"""
+        entry = self._entries.pop(session_token, None)
+        if entry is None:
+            return
+
+        user_id = entry[0]["_id"]
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(session_token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+    def invalidate_user(self, user_id: str):
+        """Drop every session of a user after their document changed"""
+        for session_token in list(self._tokens_by_user.get(user_id, ())):
+            self.invalidate(session_token)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+session_cache = SessionCache()
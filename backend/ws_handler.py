@@ -1,69 +1,196 @@
 import socketio
-from typing import Dict, Set
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from http.cookies import SimpleCookie
+from typing import Dict, Optional, Set
+from database import get_database
+from dependencies import resolve_session_token
+from resources import resources
+from services.booking_changes import booking_changes
+from services.notifications import events_since, notification_dispatcher
 import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+def create_client_manager():
+    """
+    Pick the Socket.IO client manager
+    Without SOCKETIO_MESSAGE_QUEUE, rooms live in this process only. With a
+    redis:// or amqp:// URL, emits go through the broker, so a booking made
+    on one worker reaches barbers connected to any other worker.
+    """
+    url = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+    if not url:
+        return socketio.AsyncManager()
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return socketio.AsyncRedisManager(url)
+    if url.startswith(('amqp://', 'amqps://')):
+        return socketio.AsyncAioPikaManager(url)
+    raise ValueError(f"Unsupported SOCKETIO_MESSAGE_QUEUE: {url}")
 
 # Create Socket.IO server
 sio = socketio.AsyncServer(
     async_mode='asgi',
     cors_allowed_origins='*',
-    logger=True,
-    engineio_logger=True
+    client_manager=create_client_manager(),
+    # Per-packet transport logging is gated by SOCKET_DEBUG in log_config
+    logger=logging.getLogger('socketio'),
+    engineio_logger=logging.getLogger('engineio')
 )
 
-# Track connected users
+# Track connected users (this worker only), with reverse maps so a
+# disconnect cleans up in O(1)
 connected_users: Dict[str, str] = {}  # {user_id: sid}
-barber_subscriptions: Dict[str, Set[str]] = {}  # {shop_id: {sid1, sid2, ...}}
+user_by_sid: Dict[str, str] = {}  # {sid: user_id}
+shops_by_sid: Dict[str, Set[str]] = {}  # {sid: {shop_id, ...}}
+
+def shop_room(shop_id: str) -> str:
+    return f"shop:{shop_id}"
+
+def _handshake_token(environ: dict, auth: Optional[dict]) -> Optional[str]:
+    """Session token from the auth payload, the session cookie or a Bearer header"""
+    if isinstance(auth, dict) and auth.get('token'):
+        return auth['token']
+
+    cookie = SimpleCookie(environ.get('HTTP_COOKIE', ''))
+    if 'session_token' in cookie:
+        return cookie['session_token'].value
+
+    authorization = environ.get('HTTP_AUTHORIZATION', '')
+    if authorization.startswith('Bearer '):
+        return authorization.replace('Bearer ', '')
+    return None
+
+async def _owned_shop_ids(user_id: str) -> Set[str]:
+    db = get_database()
+    cursor = db.barber_shops.find({"barber_id": user_id}, {"_id": 1})
+    return {shop["_id"] async for shop in cursor}
 
 @sio.event
 async def connect(sid, environ, auth):
-    print(f"Client connected: {sid}")
+    """
+    Authenticate the handshake once and keep the identity in the socket session
+    The token goes through the same session cache as HTTP requests, so a
+    reconnect storm costs no extra session lookups while the cache is warm
+    """
+    token = _handshake_token(environ, auth)
+    if not token:
+        raise socketio.exceptions.ConnectionRefusedError('Not authenticated')
+
+    try:
+        user_doc = await resolve_session_token(token, resources)
+    except HTTPException as e:
+        raise socketio.exceptions.ConnectionRefusedError(e.detail)
+
+    user_id = user_doc["_id"]
+    role = user_doc.get("role")
+    shop_ids = await _owned_shop_ids(user_id) if role == "barber" else set()
+    await sio.save_session(sid, {'user_id': user_id, 'role': role, 'shop_ids': shop_ids})
+
+    connected_users[user_id] = sid
+    user_by_sid[sid] = user_id
+    logger.info("Client connected", extra={'event': 'socket.connect', 'sid': sid, 'user_id': user_id})
 
 @sio.event
 async def disconnect(sid):
-    print(f"Client disconnected: {sid}")
-    # Remove from tracking
-    for user_id, user_sid in list(connected_users.items()):
-        if user_sid == sid:
-            del connected_users[user_id]
-            break
-    
-    for shop_id, sids in barber_subscriptions.items():
-        if sid in sids:
-            sids.remove(sid)
+    logger.info("Client disconnected", extra={'event': 'socket.disconnect', 'sid': sid})
+    # Remove from tracking; Socket.IO drops the sid from its rooms itself
+    user_id = user_by_sid.pop(sid, None)
+    if user_id is not None and connected_users.get(user_id) == sid:
+        del connected_users[user_id]
+    shops_by_sid.pop(sid, None)
 
 @sio.event
 async def user_online(sid, data):
-    """Register user as online"""
-    user_id = data.get('user_id')
-    if user_id:
-        connected_users[user_id] = sid
-        print(f"User {user_id} is now online")
+    """Register user as online (identity comes from the handshake, not the payload)"""
+    session = await sio.get_session(sid)
+    user_id = session['user_id']
+    connected_users[user_id] = sid
+    user_by_sid[sid] = user_id
+    logger.info("User online", extra={'event': 'socket.online', 'sid': sid, 'user_id': user_id})
+
+async def _authorize_shop(sid, shop_id: str) -> bool:
+    """Whether this socket's user owns the shop"""
+    session = await sio.get_session(sid)
+    if shop_id in session['shop_ids']:
+        return True
+    # The shop may have been created after this socket connected
+    if session['role'] != 'barber' or shop_id not in await _owned_shop_ids(session['user_id']):
+        logger.warning("Shop access refused", extra={
+            'event': 'socket.shop_refused', 'sid': sid, 'user_id': session['user_id'], 'shop_id': shop_id
+        })
+        return False
+    session['shop_ids'].add(shop_id)
+    return True
 
 @sio.event
 async def subscribe_to_shop(sid, data):
     """Barber subscribes to their shop notifications"""
-    shop_id = data.get('shop_id')
-    if shop_id:
-        if shop_id not in barber_subscriptions:
-            barber_subscriptions[shop_id] = set()
-        barber_subscriptions[shop_id].add(sid)
-        print(f"Barber subscribed to shop {shop_id}")
+    shop_id = (data or {}).get('shop_id')
+    if not shop_id:
+        return {'success': False, 'error': 'shop_id is required'}
+    if not await _authorize_shop(sid, shop_id):
+        return {'success': False, 'error': 'Not your shop'}
+
+    await sio.enter_room(sid, shop_room(shop_id))
+    shops_by_sid.setdefault(sid, set()).add(shop_id)
+    logger.info("Subscribed to shop", extra={'event': 'socket.subscribe', 'sid': sid, 'shop_id': shop_id})
+    return {'success': True}
+
+@sio.event
+async def replay_notifications(sid, data):
+    """Return the shop's notifications newer than the last seq the client saw"""
+    shop_id = (data or {}).get('shop_id')
+    try:
+        since = int((data or {}).get('since', 0))
+    except (TypeError, ValueError):
+        return {'success': False, 'error': 'since must be an integer'}
+    if not shop_id:
+        return {'success': False, 'error': 'shop_id is required'}
+    if not await _authorize_shop(sid, shop_id):
+        return {'success': False, 'error': 'Not your shop'}
+
+    events = await events_since(get_database(), shop_id, since)
+    return {'success': True, 'events': events}
 
+@sio.event
+async def sync_bookings(sid, data):
+    """Return the shop's bookings changed since the client's last version"""
+    shop_id = (data or {}).get('shop_id')
+    try:
+        since_version = int((data or {}).get('since_version', 0))
+    except (TypeError, ValueError):
+        return {'success': False, 'error': 'since_version must be an integer'}
+    if not shop_id:
+        return {'success': False, 'error': 'shop_id is required'}
+    if not await _authorize_shop(sid, shop_id):
+        return {'success': False, 'error': 'Not your shop'}
+
+    changes = await booking_changes(get_database(), shop_id, since_version)
+    # Acks go through plain json, which cannot encode datetimes
+    return {'success': True, **jsonable_encoder(changes)}
+
+async def emit_to_shop(shop_id: str, event: str, data: dict):
+    """Socket I/O for the notification dispatcher's workers"""
+    await sio.emit(event, data, room=shop_room(shop_id))
+
+# The notify_* helpers only persist and queue the event; delivery happens in
+# the dispatcher's workers, so callers never wait on socket I/O
 async def notify_new_booking(shop_id: str, booking_data: dict):
     """Notify barber of new booking"""
-    if shop_id in barber_subscriptions:
-        for sid in barber_subscriptions[shop_id]:
-            await sio.emit('new_booking', booking_data, room=sid)
+    await notification_dispatcher.publish(get_database(), shop_id, 'new_booking', booking_data)
 
 async def notify_booking_cancelled(shop_id: str, booking_id: str):
     """Notify barber of cancelled booking"""
-    if shop_id in barber_subscriptions:
-        data = {'booking_id': booking_id, 'status': 'cancelled'}
-        for sid in barber_subscriptions[shop_id]:
-            await sio.emit('booking_cancelled', data, room=sid)
+    data = {'booking_id': booking_id, 'status': 'cancelled'}
+    await notification_dispatcher.publish(get_database(), shop_id, 'booking_cancelled', data)
 
 async def notify_booking_updated(shop_id: str, booking_data: dict):
     """Notify barber of updated booking"""
-    if shop_id in barber_subscriptions:
-        for sid in barber_subscriptions[shop_id]:
-            await sio.emit('booking_updated', booking_data, room=sid)
+    await notification_dispatcher.publish(get_database(), shop_id, 'booking_updated', booking_data)
+
+async def notify_bookings_updated(shop_id: str, updates: list):
+    """Notify barber of many status changes at once ([{booking_id, status}, ...])"""
+    await notification_dispatcher.publish(get_database(), shop_id, 'bookings_updated', {'updates': updates})
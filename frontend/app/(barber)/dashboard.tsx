@@ -38,11 +38,21 @@ export default function BarberDashboardScreen() {
       const shopResponse = await axios.get('/barbers/shops/my');
       setShop(shopResponse.data);
       if (shopResponse.data) {
-        const bookingsResponse = await axios.get(`/bookings/shop/${shopResponse.data._id}`);
-        const bookings = bookingsResponse.data;
         const today = format(new Date(), 'yyyy-MM-dd');
+        // The endpoint is paginated: follow the cursor through every page from today on
+        const bookings: any[] = [];
+        let cursor: string | undefined;
+        do {
+          const bookingsResponse = await axios.get(`/bookings/shop/${shopResponse.data._id}`, {
+            params: { date_from: today, limit: 200, cursor },
+          });
+          bookings.push(...bookingsResponse.data);
+          cursor = bookingsResponse.headers['x-next-cursor'];
+        } while (cursor);
         const todayList = bookings.filter((b: any) => b.date === today);
-        const upcomingList = bookings.filter((b: any) => b.date >= today && b.status !== 'cancelled');
+        const upcomingList = bookings
+          .filter((b: any) => b.status !== 'cancelled')
+          .sort((a: any, b: any) => `${a.date} ${a.time}`.localeCompare(`${b.date} ${b.time}`));
         setTodayBookings(todayList);
         setUpcomingBookings(upcomingList.slice(0, 5));
       }
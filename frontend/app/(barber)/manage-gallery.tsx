@@ -15,6 +15,7 @@ import { useTheme } from '../../src/theme';
 import { Ionicons } from '@expo/vector-icons';
 import * as ImagePicker from 'expo-image-picker';
 import axios from 'axios';
+import { imageUri } from '../../src/context/AuthContext';
 
 export default function ManageGalleryScreen() {
   const { theme } = useTheme();
@@ -153,7 +154,7 @@ export default function ManageGalleryScreen() {
           <View style={styles.gallery}>
             {images.map((image, index) => (
               <View key={index} style={styles.imageContainer}>
-                <Image source={{ uri: image }} style={styles.galleryImage} />
+                <Image source={{ uri: imageUri(image) }} style={styles.galleryImage} />
                 <TouchableOpacity
                   style={[styles.deleteButton, { backgroundColor: theme.error }]}
                   onPress={() => deleteImage(index)}
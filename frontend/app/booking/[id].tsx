@@ -27,11 +27,12 @@ export default function BookingScreen() {
     loadCustomerInfo();
   }, [id]);
 
+  // Slots depend on the total duration of the selected services
   useEffect(() => {
     if (selectedDate) {
-      fetchSlots(selectedDate);
+      fetchSlots(selectedDate, selectedServices);
     }
-  }, [selectedDate]);
+  }, [selectedDate, selectedServices]);
 
   const loadCustomerInfo = async () => {
     try {
@@ -55,10 +56,16 @@ export default function BookingScreen() {
     }
   };
 
-  const fetchSlots = async (date: string) => {
+  const fetchSlots = async (date: string, serviceIds: string[]) => {
     try {
-      const response = await axios.get(`/bookings/available-slots/${id}`, { params: { date } });
-      setAvailableSlots(response.data.available_slots || []);
+      const response = await axios.get(`/bookings/available-slots/${id}`, {
+        params: { date, service_ids: serviceIds },
+        // service_ids=a&service_ids=b, as the API expects
+        paramsSerializer: { indexes: null }
+      });
+      const slots: string[] = response.data.available_slots || [];
+      setAvailableSlots(slots);
+      setSelectedTime((time) => (slots.includes(time) ? time : ''));
     } catch (error) {
       console.error('Error:', error);
     }
@@ -3,7 +3,10 @@ import axios from 'axios';
 import Constants from 'expo-constants';
 import { io, Socket } from 'socket.io-client';
 
-const API_URL = process.env.EXPO_PUBLIC_BACKEND_URL || Constants.expoConfig?.extra?.EXPO_PUBLIC_BACKEND_URL || '';
+export const API_URL = process.env.EXPO_PUBLIC_BACKEND_URL || Constants.expoConfig?.extra?.EXPO_PUBLIC_BACKEND_URL || '';
+
+// Stored images come back as /api/blobs/<digest> references relative to the backend
+export const imageUri = (image: string) => (image.startsWith('/') ? `${API_URL}${image}` : image);
 
 console.log('API_URL configured:', API_URL);
 
@@ -0,0 +1,49 @@
+"""
+Round trips and time to enrich a booking list, batched vs. per booking
+
+Usage: python -m tests.benchmarks.bench_enrichment [--rtt-ms 1.0]
+"""
+import argparse
+import asyncio
+import time
+
+from mongomock_motor import AsyncMongoMockClient
+
+from tests.conftest import QueryCounter
+from tests.test_enrichment import _seed_bookings
+from services.enrichment import attach_customers, attach_services
+
+
+async def per_booking(db, bookings):
+    """The enrichment loop this replaced: one customer and one service query per booking"""
+    for booking in bookings:
+        customer = await db.users.find_one({"_id": booking["customer_id"]})
+        booking["customer"] = customer
+        booking["services"] = await db.services.find(
+            {"_id": {"$in": booking["service_ids"]}}
+        ).to_list(100)
+
+
+async def batched(db, bookings):
+    await asyncio.gather(attach_customers(db, bookings), attach_services(db, bookings))
+
+
+async def main(rtt_ms: float):
+    print(f"{'bookings':>8} {'strategy':>11} {'round trips':>12} {'cpu ms':>8} {'est. ms @rtt':>13}")
+    for count in (10, 100, 1000):
+        db = AsyncMongoMockClient()["bench"]
+        _, _, _, bookings = await _seed_bookings(db, count)
+        for name, strategy in (("per-booking", per_booking), ("batched", batched)):
+            counter = QueryCounter(db)
+            start = time.perf_counter()
+            await strategy(counter, [dict(b) for b in bookings])
+            elapsed = (time.perf_counter() - start) * 1000
+            trips = len(counter.calls)
+            print(f"{count:>8} {name:>11} {trips:>12} {elapsed:>8.1f} {elapsed + trips * rtt_ms:>13.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rtt-ms", type=float, default=1.0, help="network round trip to add per query")
+    args = parser.parse_args()
+    asyncio.run(main(args.rtt_ms))
@@ -0,0 +1,78 @@
+"""
+Encoding cost of a list of booking documents
+
+"stock" is what FastAPI does for a route returning plain data
+(jsonable_encoder, then json.dumps in JSONResponse); "orjson" is
+mongo_json(), which the list endpoints return.
+
+Usage: python -m tests.benchmarks.bench_json [--bookings 200] [--repeat 50]
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import tests.conftest  # noqa: F401 (puts backend/ on sys.path)
+from responses import mongo_json
+
+
+def bookings(count: int) -> list:
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": f"booking_{i:06d}",
+            "shop_id": "shop_1",
+            "customer_id": f"user_{i % 97}",
+            "barber_id": "user_barber",
+            "service_ids": ["service_1", "service_2"],
+            "product_ids": [],
+            "date": "2025-01-15",
+            "time": "10:00",
+            "duration": 45,
+            "total_price": 80.5,
+            "status": "confirmed",
+            "customer_name": "Dana",
+            "customer_phone": "050",
+            "notes": None,
+            "customer": {"name": "Dana", "phone": "050", "email": "dana@example.com"},
+            "services": [
+                {"_id": "service_1", "name": "Cut", "price": 50.0, "duration": 30},
+                {"_id": "service_2", "name": "Beard", "price": 30.5, "duration": 15},
+            ],
+            "version": i,
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now - timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+def stock(content):
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def fast(content):
+    return mongo_json(content).body
+
+
+def run(name, encode, content, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = encode(content)
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"{name:>7}  median={statistics.median(timings):7.2f} ms  max={max(timings):7.2f} ms  body={len(body) / 1024:7.1f} KiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    content = bookings(args.bookings)
+    print(f"bookings={args.bookings}")
+    run("stock", stock, content, args.repeat)
+    run("orjson", fast, content, args.repeat)
@@ -0,0 +1,71 @@
+"""
+Cost of a logging call on the request path when stdout is slow
+
+Times uvicorn.access calls the way uvicorn configures them (a synchronous
+StreamHandler) and after setup_logging (queue handler, writer thread). The
+sink sleeps on every write to stand in for a backed-up pipe to a log shipper.
+
+Usage: python -m tests.benchmarks.bench_logging [--lines 2000] [--write-us 200]
+"""
+import argparse
+import io
+import logging
+import statistics
+import sys
+import time
+
+import tests.conftest  # noqa: F401 (puts backend/ on sys.path)
+import log_config
+
+
+class SlowSink(io.TextIOBase):
+    def __init__(self, write_seconds: float):
+        self.write_seconds = write_seconds
+
+    def write(self, text):
+        time.sleep(self.write_seconds)
+        return len(text)
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run(mode: str, lines: int, sink: SlowSink):
+    access = logging.getLogger("uvicorn.access")
+    log_config.shutdown_logging()
+    if mode == "sync":
+        access.handlers[:] = [logging.StreamHandler(sink)]
+        access.propagate = False
+    else:
+        sys.stdout = sink
+        log_config.setup_logging()
+        sys.stdout = sys.__stdout__
+
+    timings = []
+    for i in range(lines):
+        start = time.perf_counter()
+        access.info('%s - "%s %s HTTP/%s" %d', "10.0.0.1:5000", "GET", f"/api/barbers/shops?page={i}", "1.1", 200)
+        timings.append((time.perf_counter() - start) * 1e6)
+
+    dropped = getattr(logging.getLogger().handlers[0], "dropped", 0) if mode == "queue" else 0
+    flush_start = time.perf_counter()
+    log_config.shutdown_logging()
+    access.handlers.clear()
+    print(
+        f"{mode:>5}  per call p50={statistics.median(timings):7.1f} us  p99={_percentile(timings, 0.99):7.1f} us"
+        f"  on caller={sum(timings) / 1000:7.1f} ms  writer flush={(time.perf_counter() - flush_start) * 1000:7.1f} ms"
+        f"  dropped={dropped}",
+        flush=True
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=2000)
+    parser.add_argument("--write-us", type=float, default=200, help="sink latency per write")
+    args = parser.parse_args()
+    sink = SlowSink(args.write_us / 1e6)
+    for mode in ("sync", "queue"):
+        run(mode, args.lines, sink)
@@ -0,0 +1,96 @@
+"""
+Latency of an unrelated endpoint while barber logins are running
+
+Logins are fired continuously at POST /api/auth/barber/login while GET /health
+is timed. "pool" is the app as shipped; "inline" runs bcrypt on the event
+loop, as the handlers did before.
+
+Usage: python -m tests.benchmarks.bench_login_latency [--logins 8] [--seconds 5] [--rounds 12]
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+import httpx
+from mongomock_motor import AsyncMongoMockClient
+
+from tests.conftest import LatencyDatabase, create_user, fastapi_app
+from resources import resources
+from services import passwords
+
+PROBE_INTERVAL = 0.01
+
+
+async def _inline(func, *args):
+    return func(*args)
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def run(mode: str, concurrent_logins: int, seconds: float):
+    db = AsyncMongoMockClient()["bench"]
+    # Mongo calls yield as they would over the network
+    resources.db = LatencyDatabase(db, 0.001)
+    fastapi_app.state.resources = resources
+    resources.password_hasher.start()
+    hashed = await resources.password_hasher.hash("s3cret")
+    await create_user(db, "barber", username="barber1", password_hash=hashed)
+
+    original_run = resources.password_hasher._run
+    if mode == "inline":
+        resources.password_hasher._run = _inline
+
+    transport = httpx.ASGITransport(app=fastapi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        stop = asyncio.Event()
+        logins = 0
+
+        async def login_loop():
+            nonlocal logins
+            while not stop.is_set():
+                await http.post("/api/auth/barber/login", json={"username": "barber1", "password": "s3cret"})
+                logins += 1
+
+        workers = [asyncio.create_task(login_loop()) for _ in range(concurrent_logins)]
+        # Probes are due on a fixed schedule and timed from when they were
+        # due, so time spent waiting for a blocked loop counts as latency
+        latencies = []
+        due = time.perf_counter()
+        deadline = due + seconds
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(max(0, due - time.perf_counter()))
+            await http.get("/health")
+            latencies.append((time.perf_counter() - due) * 1000)
+            due += PROBE_INTERVAL
+        stop.set()
+        await asyncio.gather(*workers)
+
+    resources.password_hasher._run = original_run
+    resources.password_hasher.shutdown()
+    print(
+        f"{mode:>6}  logins={logins:<5} /health p50={statistics.median(latencies):7.1f} ms"
+        f"  p99={_percentile(latencies, 0.99):7.1f} ms  max={max(latencies):7.1f} ms",
+        flush=True
+    )
+
+
+async def main(concurrent_logins: int, seconds: float):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    print(f"bcrypt rounds={passwords.BCRYPT_ROUNDS}, pool workers={passwords.PASSWORD_HASH_WORKERS}", flush=True)
+    for mode in ("inline", "pool"):
+        await run(mode, concurrent_logins, seconds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=8, help="concurrent login loops")
+    parser.add_argument("--seconds", type=float, default=5, help="how long to probe /health")
+    parser.add_argument("--rounds", type=int, default=passwords.BCRYPT_ROUNDS, help="bcrypt cost factor")
+    args = parser.parse_args()
+    passwords.BCRYPT_ROUNDS = args.rounds
+    asyncio.run(main(args.logins, args.seconds))
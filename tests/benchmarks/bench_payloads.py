@@ -0,0 +1,70 @@
+"""
+Response size and time of the shop listing per response shape
+
+Seeds shops with gallery images and times GET /api/barbers/shops in the
+"detail" shape (the full document, as the endpoint returned before) and the
+lean "card" shape. --inline stores the gallery as base64 data URIs, as shop
+documents did before images moved to the blob store.
+
+Usage: python -m tests.benchmarks.bench_payloads [--shops 200] [--images 6] [--image-kb 150] [--inline]
+"""
+import argparse
+import asyncio
+import base64
+import os
+import statistics
+import time
+
+import httpx
+from mongomock_motor import AsyncMongoMockClient
+
+from tests.conftest import create_shop, create_user, fastapi_app
+from resources import resources
+
+REPEAT = 20
+
+
+async def seed(db, shops: int, images: int, image_kb: int, inline: bool):
+    barber = await create_user(db, "barber")
+    for i in range(shops):
+        if inline:
+            gallery = [
+                "data:image/jpeg;base64," + base64.b64encode(os.urandom(image_kb * 1024)).decode()
+                for _ in range(images)
+            ]
+        else:
+            gallery = [f"/api/blobs/{os.urandom(32).hex()}" for _ in range(images)]
+        await create_shop(db, barber, _id=f"shop_{i:05d}", gallery_images=gallery)
+
+
+async def main(shops: int, images: int, image_kb: int, inline: bool):
+    db = AsyncMongoMockClient()["bench"]
+    resources.db = db
+    fastapi_app.state.resources = resources
+    await seed(db, shops, images, image_kb, inline)
+
+    print(f"shops={shops} images/shop={images} storage={'inline base64' if inline else 'blob refs'}")
+    transport = httpx.ASGITransport(app=fastapi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        for shape in ("detail", "card"):
+            params = {"shape": shape, "limit": shops}
+            sizes, timings = [], []
+            for _ in range(REPEAT):
+                start = time.perf_counter()
+                response = await http.get("/api/barbers/shops", params=params)
+                timings.append((time.perf_counter() - start) * 1000)
+                sizes.append(len(response.content))
+            print(
+                f"{shape:>6}  body={sizes[0] / 1024:10.1f} KiB"
+                f"  median={statistics.median(timings):8.1f} ms  max={max(timings):8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--shops", type=int, default=200)
+    parser.add_argument("--images", type=int, default=6, help="gallery images per shop")
+    parser.add_argument("--image-kb", type=int, default=150, help="size of each inline image")
+    parser.add_argument("--inline", action="store_true", help="store galleries as base64 data URIs")
+    args = parser.parse_args()
+    asyncio.run(main(args.shops, args.images, args.image_kb, args.inline))
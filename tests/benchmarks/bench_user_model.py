@@ -0,0 +1,43 @@
+"""
+Cost of turning a users document into a User on every authenticated request
+
+"validate" is User.model_validate (what get_current_user did before);
+"from_db" is the unvalidated fast path it uses now.
+
+Usage: python -m tests.benchmarks.bench_user_model [--calls 100000]
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+
+import tests.conftest  # noqa: F401 (puts backend/ on sys.path)
+from models import User
+
+DOC = {
+    "_id": "user_0123456789abcdef",
+    "email": "dana.levi@example.com",
+    "name": "Dana Levi",
+    "picture": "https://example.com/avatar.png",
+    "role": "barber",
+    "phone": "050-1234567",
+    "username": "dana",
+    "password_hash": "$2b$12$" + "x" * 53,
+    "favorites": [f"shop_{i}" for i in range(20)],
+    "created_at": datetime(2025, 1, 1, tzinfo=timezone.utc),
+}
+
+
+def run(name, build, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        build(DOC)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>8}  {elapsed / calls * 1e6:6.2f} us/call  ({calls} calls in {elapsed * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100_000)
+    args = parser.parse_args()
+    run("validate", User.model_validate, args.calls)
+    run("from_db", User.from_db, args.calls)
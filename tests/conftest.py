@@ -0,0 +1,260 @@
+# Shared fixtures
+# The backend modules import each other as top-level modules (run from
+# backend/), so that directory goes on sys.path. Tests run the real app
+# against an in-memory mongomock database without its lifespan, so nothing
+# connects to Mongo or starts background workers.
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import asyncio
+import inspect
+import json
+import sys
+import uuid
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+import pytest
+
+from resources import resources
+from server import socket_app
+import ws_handler
+
+fastapi_app = socket_app.other_asgi_app
+
+OPEN_EVERY_DAY = [
+    {"day": day, "open_time": "09:00", "close_time": "18:00", "is_closed": False}
+    for day in range(7)
+]
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db():
+    """Fresh in-memory database wired into the process resources"""
+    database = AsyncMongoMockClient()["zenchair_test"]
+    resources.db = database
+    resources.read_db = None
+    fastapi_app.state.resources = resources
+    yield database
+    resources.db = None
+    resources.session_cache.__init__()
+    resources.shop_page_cache.__init__()
+    resources.availability_index.__init__()
+
+
+@pytest.fixture
+def client(db):
+    return TestClient(fastapi_app)
+
+
+class FakeSockets:
+    """Drives ws_handler.sio without a transport, recording what it sends"""
+
+    def __init__(self, sio):
+        self.sio = sio
+        self.sent = []
+        self.sessions = {}
+        self.sids = []
+
+    async def open(self) -> str:
+        sid = await self.sio.manager.connect(f"eio_{uuid.uuid4().hex}", "/")
+        self.sids.append(sid)
+        return sid
+
+    def events(self, sid: str) -> list:
+        """[event, data] pairs sent to a socket, in order"""
+        eio_sid = self.sio.manager.eio_sid_from_sid(sid, "/")
+        # Event packets are "2" followed by the JSON [event, data] array
+        return [json.loads(packet[1:]) for target, packet in self.sent if target == eio_sid]
+
+    async def _send(self, eio_sid, packet):
+        self.sent.append((eio_sid, packet.data))
+
+    async def _get_session(self, sid, namespace=None):
+        return self.sessions[sid]
+
+    async def _save_session(self, sid, session, namespace=None):
+        self.sessions[sid] = session
+
+
+@pytest.fixture
+async def sockets(monkeypatch):
+    fake = FakeSockets(ws_handler.sio)
+    monkeypatch.setattr(ws_handler.sio, "_send_eio_packet", fake._send)
+    monkeypatch.setattr(ws_handler.sio, "get_session", fake._get_session)
+    monkeypatch.setattr(ws_handler.sio, "save_session", fake._save_session)
+    yield fake
+    for sid in fake.sids:
+        if ws_handler.sio.manager.is_connected(sid, "/"):
+            ws_handler.sio.manager.basic_disconnect(sid, "/")
+    ws_handler.connected_users.clear()
+    ws_handler.user_by_sid.clear()
+    ws_handler.shops_by_sid.clear()
+
+
+async def create_user(db, role: str = "customer", **fields) -> dict:
+    user = {
+        "_id": f"user_{uuid.uuid4().hex}",
+        "email": f"{uuid.uuid4().hex[:8]}@example.com",
+        "name": "Test User",
+        "role": role,
+        "created_at": datetime.now(timezone.utc),
+        **fields
+    }
+    await db.users.insert_one(user)
+    return user
+
+
+async def create_session(db, user: dict) -> str:
+    token = f"session_{uuid.uuid4().hex}"
+    await db.user_sessions.insert_one({
+        "user_id": user["_id"],
+        "session_token": token,
+        "expires_at": datetime.now(timezone.utc) + timedelta(days=7),
+        "created_at": datetime.now(timezone.utc)
+    })
+    return token
+
+
+def auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def create_shop(db, barber: dict, **fields) -> dict:
+    shop = {
+        "_id": f"shop_{uuid.uuid4().hex}",
+        "barber_id": barber["_id"],
+        "name": "Test Shop",
+        "description": "",
+        "location": {"address": "1 Main St", "city": "Tel Aviv", "latitude": 32.08, "longitude": 34.78},
+        "city_normalized": "tel aviv",
+        "geo": {"type": "Point", "coordinates": [34.78, 32.08]},
+        "phone": "000",
+        "email": "shop@example.com",
+        "rating": 0.0,
+        "total_reviews": 0,
+        "rating_sum": 0,
+        "rating_count": 0,
+        "gallery_images": [],
+        "working_hours": OPEN_EVERY_DAY,
+        "vacation_dates": [],
+        "is_open": True,
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+        **fields
+    }
+    await db.barber_shops.insert_one(shop)
+    return shop
+
+
+async def create_service(db, shop: dict, duration: int = 30, price: float = 50.0, **fields) -> dict:
+    service = {
+        "_id": f"service_{uuid.uuid4().hex}",
+        "shop_id": shop["_id"],
+        "name": "Haircut",
+        "description": "",
+        "price": price,
+        "duration": duration,
+        "created_at": datetime.utcnow(),
+        **fields
+    }
+    await db.services.insert_one(service)
+    return service
+
+
+def booking_date(days_ahead: int = 1) -> str:
+    return (datetime.utcnow().date() + timedelta(days=days_ahead)).isoformat()
+
+
+def available_slots(client, shop: dict, service: dict, date: str) -> list:
+    response = client.get(
+        f"/api/bookings/available-slots/{shop['_id']}",
+        params={"date": date, "service_ids": [service["_id"]]}
+    )
+    assert response.status_code == 200
+    return response.json()["available_slots"]
+
+
+def book(client, shop: dict, service: dict, date: str, time: str):
+    return client.post("/api/bookings/", json={
+        "shop_id": shop["_id"],
+        "service_ids": [service["_id"]],
+        "date": date,
+        "time": time,
+        "customer_name": "Dana",
+        "customer_phone": "050"
+    })
+
+
+class QueryCounter:
+    """Database proxy counting collection calls (one call is one round trip)"""
+
+    COUNTED = {"find", "find_one", "aggregate", "count_documents", "distinct"}
+
+    def __init__(self, database):
+        self._database = database
+        self.calls = []
+
+    def __getattr__(self, name):
+        return _CountingCollection(self, name, getattr(self._database, name))
+
+    def __getitem__(self, name):
+        return _CountingCollection(self, name, self._database[name])
+
+
+class _CountingCollection:
+    def __init__(self, counter: QueryCounter, name: str, collection):
+        self._counter = counter
+        self._name = name
+        self._collection = collection
+
+    def __getattr__(self, attr):
+        value = getattr(self._collection, attr)
+        if attr in QueryCounter.COUNTED:
+            def counted(*args, **kwargs):
+                self._counter.calls.append((self._name, attr))
+                return value(*args, **kwargs)
+            return counted
+        return value
+
+
+class LatencyDatabase:
+    """Database proxy that awaits `delay` seconds before every async collection call
+
+    mongomock never yields to the event loop, so without this concurrent
+    requests run one after another instead of interleaving as they would
+    against a real server.
+    """
+
+    def __init__(self, database, delay: float = 0):
+        self._database = database
+        self.delay = delay
+
+    def __getattr__(self, name):
+        return _LatentCollection(self, getattr(self._database, name))
+
+    def __getitem__(self, name):
+        return _LatentCollection(self, self._database[name])
+
+
+class _LatentCollection:
+    def __init__(self, database: LatencyDatabase, collection):
+        self._database = database
+        self._collection = collection
+
+    def __getattr__(self, attr):
+        value = getattr(self._collection, attr)
+        if not inspect.iscoroutinefunction(value):
+            return value
+
+        async def delayed(*args, **kwargs):
+            await asyncio.sleep(self._database.delay)
+            return await value(*args, **kwargs)
+        return delayed
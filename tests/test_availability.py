@@ -0,0 +1,89 @@
+import pytest
+
+from resources import resources
+from services.reservations import release_slot
+from tests.conftest import (
+    QueryCounter, auth, available_slots, book, booking_date, create_service, create_session,
+    create_shop, create_user
+)
+
+pytestmark = pytest.mark.anyio
+
+
+async def _shop(db):
+    barber = await create_user(db, "barber")
+    shop = await create_shop(db, barber)
+    service = await create_service(db, shop, duration=30)
+    return barber, shop, service
+
+
+async def test_warm_slot_queries_do_not_touch_mongo(db, client):
+    _, shop, service = await _shop(db)
+    date = booking_date()
+    first = available_slots(client, shop, service, date)
+
+    counter = QueryCounter(db)
+    resources.db = counter
+    assert available_slots(client, shop, service, date) == first
+    assert counter.calls == []
+
+
+async def test_bookings_update_the_index_in_place(db, client):
+    _, shop, service = await _shop(db)
+    date = booking_date()
+    assert "10:00" in available_slots(client, shop, service, date)
+
+    assert book(client, shop, service, date, "10:00").status_code == 201
+
+    counter = QueryCounter(db)
+    resources.db = counter
+    assert "10:00" not in available_slots(client, shop, service, date)
+    assert counter.calls == []
+
+
+async def test_cancelling_frees_the_slot(db, client):
+    _, shop, service = await _shop(db)
+    customer = await create_user(db)
+    token = await create_session(db, customer)
+    date = booking_date()
+    available_slots(client, shop, service, date)
+
+    created = client.post("/api/bookings/", headers=auth(token), json={
+        "shop_id": shop["_id"], "service_ids": [service["_id"]], "date": date,
+        "time": "11:00", "customer_name": "Dana", "customer_phone": "050"
+    })
+    assert "11:00" not in available_slots(client, shop, service, date)
+
+    response = client.delete(f"/api/bookings/{created.json()['booking_id']}", headers=auth(token))
+    assert response.status_code == 200
+    assert "11:00" in available_slots(client, shop, service, date)
+
+
+async def test_vacation_invalidates_cached_days(db, client):
+    barber, shop, service = await _shop(db)
+    token = await create_session(db, barber)
+    date = booking_date()
+    assert available_slots(client, shop, service, date)
+
+    response = client.post(
+        f"/api/barbers/shops/{shop['_id']}/vacation",
+        headers=auth(token),
+        json={"vacation_dates": [date]}
+    )
+    assert response.status_code == 200
+    assert available_slots(client, shop, service, date) == []
+
+
+async def test_stale_index_does_not_reject_a_free_slot(db, client):
+    _, shop, service = await _shop(db)
+    date = booking_date()
+    booking_id = book(client, shop, service, date, "10:00").json()["booking_id"]
+    assert "10:00" not in available_slots(client, shop, service, date)
+
+    # Another worker cancels it; this worker's index still has it booked
+    await db.bookings.update_one({"_id": booking_id}, {"$set": {"status": "cancelled"}})
+    await release_slot(db, booking_id)
+    assert "10:00" not in available_slots(client, shop, service, date)
+
+    assert book(client, shop, service, date, "10:00").status_code == 201
+    assert book(client, shop, service, date, "10:00").status_code == 409
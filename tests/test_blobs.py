@@ -0,0 +1,91 @@
+import base64
+import hashlib
+
+import pytest
+
+from routes import blobs as blob_routes
+from services import blob_store as blob_store_module
+from services.blob_store import BLOB_URL_PREFIX, LocalBlobStore
+from tests.conftest import auth, create_session, create_shop, create_user
+
+pytestmark = pytest.mark.anyio
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+HTML = b"<html><script>alert(document.cookie)</script></html>"
+
+
+def _data_uri(content_type: str, data: bytes) -> str:
+    return f"data:{content_type};base64,{base64.b64encode(data).decode()}"
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = LocalBlobStore(str(tmp_path))
+    monkeypatch.setattr(blob_store_module, "blob_store", store)
+    monkeypatch.setattr(blob_routes, "blob_store", store)
+    return store
+
+
+@pytest.fixture
+async def barber_shop(db):
+    barber = await create_user(db, "barber")
+    shop = await create_shop(db, barber, gallery_images=[])
+    return shop, await create_session(db, barber)
+
+
+def _upload(client, shop, token, image):
+    return client.post(
+        f"/api/barbers/shops/{shop['_id']}/gallery",
+        json={"image": image}, headers=auth(token)
+    )
+
+
+@pytest.mark.parametrize("image", [
+    _data_uri("text/html", HTML),
+    _data_uri("image/png", HTML),
+    _data_uri("image/svg+xml", b"<svg xmlns='http://www.w3.org/2000/svg'><script/></svg>"),
+    base64.b64encode(HTML).decode(),
+])
+async def test_non_images_are_rejected(db, client, store, barber_shop, image):
+    shop, token = barber_shop
+    response = _upload(client, shop, token, image)
+    assert response.status_code == 400
+    assert (await db.barber_shops.find_one({"_id": shop["_id"]}))["gallery_images"] == []
+
+
+async def test_type_comes_from_the_bytes(db, client, store, barber_shop):
+    shop, token = barber_shop
+    response = _upload(client, shop, token, _data_uri("text/html", PNG))
+    assert response.status_code == 200
+    digest = response.json()["image"][len(BLOB_URL_PREFIX):]
+    assert store.stat(digest)["content_type"] == "image/png"
+
+    blob = client.get(f"/api/blobs/{digest}")
+    assert blob.status_code == 200
+    assert blob.content == PNG
+    assert blob.headers["content-type"] == "image/png"
+    assert blob.headers["x-content-type-options"] == "nosniff"
+    assert "default-src 'none'" in blob.headers["content-security-policy"]
+
+
+async def test_legacy_non_image_blobs_are_served_as_octet_stream(db, client, store):
+    digest = await store.put(HTML, "text/html")
+    blob = client.get(f"/api/blobs/{digest}")
+    assert blob.status_code == 200
+    assert blob.headers["content-type"] == "application/octet-stream"
+    assert blob.headers["x-content-type-options"] == "nosniff"
+
+
+async def test_conditional_and_range_requests_keep_security_headers(db, client, store):
+    digest = await store.put(PNG, "image/png")
+    assert digest == hashlib.sha256(PNG).hexdigest()
+
+    cached = client.get(f"/api/blobs/{digest}", headers={"If-None-Match": f'"{digest}"'})
+    assert cached.status_code == 304
+    assert cached.headers["x-content-type-options"] == "nosniff"
+
+    partial = client.get(f"/api/blobs/{digest}", headers={"Range": "bytes=0-7"})
+    assert partial.status_code == 206
+    assert partial.content == PNG[:8]
+    assert partial.headers["content-range"] == f"bytes 0-7/{len(PNG)}"
+    assert "sandbox" in partial.headers["content-security-policy"]
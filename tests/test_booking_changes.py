@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import ws_handler
+from services.booking_changes import (
+    BOOKING_VERSION_GRACE_SECONDS, booking_changes, next_booking_version, synced_booking_version
+)
+from tests.conftest import auth, book, booking_date, create_service, create_session, create_shop, create_user
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def shop(db):
+    barber = await create_user(db, "barber")
+    shop = await create_shop(db, barber)
+    service = await create_service(db, shop)
+    return barber, shop, service, await create_session(db, barber)
+
+
+def _changes(client, shop, token, **params):
+    response = client.get(f"/api/bookings/shop/{shop['_id']}/changes", params=params, headers=auth(token))
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_reconnect_sync_returns_only_what_changed(db, client, shop):
+    barber, shop, service, token = shop
+    early = book(client, shop, service, booking_date(), "09:00").json()["booking_id"]
+
+    listing = client.get(f"/api/bookings/shop/{shop['_id']}", headers=auth(token))
+    seen = int(listing.headers["X-Bookings-Version"])
+    assert [b["_id"] for b in listing.json()] == [early]
+
+    # While the dashboard is away: one new booking and one status change
+    late = book(client, shop, service, booking_date(), "11:00").json()["booking_id"]
+    changed = client.put(f"/api/bookings/{early}/status", json={"status": "confirmed"}, headers=auth(token))
+    assert changed.status_code == 200
+
+    delta = _changes(client, shop, token, since_version=seen)
+    assert [b["_id"] for b in delta["bookings"]] == [late, early]
+    assert delta["bookings"][1]["status"] == "confirmed"
+    assert delta["bookings"][0]["customer"]["name"] == "Dana"
+    assert not delta["has_more"]
+
+    assert _changes(client, shop, token, since_version=delta["version"])["bookings"] == []
+
+
+async def test_changes_page_through_has_more(db, client, shop):
+    _, shop, service, token = shop
+    for hour in range(9, 14):
+        book(client, shop, service, booking_date(), f"{hour:02d}:00")
+
+    version, seen = 0, []
+    while True:
+        page = _changes(client, shop, token, since_version=version, limit=2)
+        seen += [b["time"] for b in page["bookings"]]
+        version = page["version"]
+        if not page["has_more"]:
+            break
+    assert seen == ["09:00", "10:00", "11:00", "12:00", "13:00"]
+
+
+
+async def _insert(db, shop, booking_id, version, updated_at=None):
+    await db.bookings.insert_one({
+        "_id": booking_id, "shop_id": shop["_id"], "customer_id": "guest", "service_ids": [],
+        "version": version, "updated_at": updated_at or datetime.utcnow()
+    })
+
+
+async def test_writes_landing_out_of_order_are_not_skipped(db, shop):
+    _, shop, _, _ = shop
+    first = await next_booking_version(db, shop["_id"])
+    second = await next_booking_version(db, shop["_id"])
+
+    # The second write lands while the first is still in flight
+    await _insert(db, shop, "b", second)
+    held = await booking_changes(db, shop["_id"], since_version=0)
+    assert held["bookings"] == []
+    assert held["version"] == 0
+    assert await synced_booking_version(db, shop["_id"]) == 0
+
+    await _insert(db, shop, "a", first)
+    synced = await booking_changes(db, shop["_id"], since_version=held["version"])
+    assert [b["_id"] for b in synced["bookings"]] == ["a", "b"]
+    assert synced["version"] == second
+    assert await synced_booking_version(db, shop["_id"]) == second
+
+
+async def test_gaps_older_than_the_grace_window_are_passed(db, shop):
+    _, shop, _, _ = shop
+    # Version 1 was overwritten long ago by the booking's later change
+    settled = datetime.utcnow() - timedelta(seconds=BOOKING_VERSION_GRACE_SECONDS + 1)
+    await _insert(db, shop, "a", 2, settled)
+    await _insert(db, shop, "b", 3)
+
+    changes = await booking_changes(db, shop["_id"], since_version=0)
+    assert [b["_id"] for b in changes["bookings"]] == ["a", "b"]
+    assert changes["version"] == 3
+
+async def test_timestamp_fallback_for_unversioned_clients(db, shop):
+    _, shop, _, _ = shop
+    await db.bookings.insert_many([
+        {"_id": "old", "shop_id": shop["_id"], "customer_id": "guest", "service_ids": [],
+         "updated_at": datetime(2025, 1, 1)},
+        {"_id": "new", "shop_id": shop["_id"], "customer_id": "guest", "service_ids": [],
+         "updated_at": datetime(2025, 3, 1)},
+    ])
+    changes = await booking_changes(db, shop["_id"], since=datetime(2025, 2, 1))
+    assert [b["_id"] for b in changes["bookings"]] == ["new"]
+
+
+async def test_changes_are_for_the_owner_only(db, client, shop):
+    _, shop, _, _ = shop
+    stranger = await create_session(db, await create_user(db, "barber"))
+    response = client.get(f"/api/bookings/shop/{shop['_id']}/changes", headers=auth(stranger))
+    assert response.status_code == 404
+
+
+async def test_socket_sync_matches_the_http_feed(db, client, sockets, shop):
+    barber, shop, service, token = shop
+    book(client, shop, service, booking_date(), "09:00")
+
+    sid = await sockets.open()
+    await ws_handler.connect(sid, {}, {"token": token})
+    synced = await ws_handler.sync_bookings(sid, {"shop_id": shop["_id"], "since_version": 0})
+    assert synced["success"]
+    assert synced == {"success": True, **_changes(client, shop, token, since_version=0)}
+    assert await ws_handler.sync_bookings(sid, {"shop_id": shop["_id"], "since_version": "x"}) == {
+        "success": False, "error": "since_version must be an integer"
+    }
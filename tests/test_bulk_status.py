@@ -0,0 +1,87 @@
+import pytest
+
+from tests.conftest import auth, booking_date, create_service, create_session, create_shop, create_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def _bookings(db, client, times):
+    barber = await create_user(db, "barber")
+    shop = await create_shop(db, barber)
+    service = await create_service(db, shop)
+    date = booking_date()
+    booking_ids = []
+    for time in times:
+        response = client.post("/api/bookings/", json={
+            "shop_id": shop["_id"], "service_ids": [service["_id"]], "date": date,
+            "time": time, "customer_name": "Dana", "customer_phone": "050"
+        })
+        assert response.status_code == 201
+        booking_ids.append(response.json()["booking_id"])
+    return barber, shop, booking_ids
+
+
+def _bulk(client, token, updates):
+    return client.post(
+        "/api/bookings/bulk-status",
+        json={"updates": [{"booking_id": b, "status": s} for b, s in updates]},
+        headers=auth(token)
+    )
+
+
+async def test_each_item_gets_its_own_result(db, client):
+    barber, shop, (first, second) = await _bookings(db, client, ["10:00", "11:00"])
+    token = await create_session(db, barber)
+    current = (await db.bookings.find_one({"_id": second}))["status"]
+
+    response = _bulk(client, token, [
+        (first, "cancelled"),
+        (second, current),
+        ("booking_missing", "confirmed"),
+        (first, "completed"),
+    ])
+
+    assert response.status_code == 200
+    assert response.json()["updated"] == 1
+    assert [r["result"] for r in response.json()["results"]] == [
+        "updated", "unchanged", "not_found", "duplicate"
+    ]
+    assert (await db.bookings.find_one({"_id": first}))["status"] == "cancelled"
+    assert await db.slot_locks.count_documents({"booking_id": first}) == 0
+    assert await db.slot_locks.count_documents({"booking_id": second}) > 0
+
+    events = await db.notification_outbox.find({"shop_id": shop["_id"], "event": "bookings_updated"}).to_list(None)
+    assert [e["payload"]["updates"] for e in events] == [[{"booking_id": first, "status": "cancelled"}]]
+
+
+async def test_other_barbers_bookings_are_not_found(db, client):
+    _, _, (booking_id,) = await _bookings(db, client, ["10:00"])
+    other = await create_user(db, "barber")
+    token = await create_session(db, other)
+
+    response = _bulk(client, token, [(booking_id, "cancelled")])
+    assert response.json()["results"] == [{"booking_id": booking_id, "result": "not_found"}]
+    assert (await db.bookings.find_one({"_id": booking_id}))["status"] != "cancelled"
+
+
+async def test_reactivation_loses_to_a_newer_booking(db, client):
+    barber, shop, (booking_id,) = await _bookings(db, client, ["10:00"])
+    token = await create_session(db, barber)
+    assert _bulk(client, token, [(booking_id, "cancelled")]).json()["updated"] == 1
+    # Someone else takes the freed slot
+    service = await db.services.find_one({"shop_id": shop["_id"]})
+    retaken = client.post("/api/bookings/", json={
+        "shop_id": shop["_id"], "service_ids": [service["_id"]], "date": booking_date(),
+        "time": "10:00", "customer_name": "Noa", "customer_phone": "052"
+    })
+    assert retaken.status_code == 201
+
+    response = _bulk(client, token, [(booking_id, "confirmed")])
+    assert response.json()["results"] == [{"booking_id": booking_id, "result": "conflict"}]
+    assert (await db.bookings.find_one({"_id": booking_id}))["status"] == "cancelled"
+
+
+async def test_empty_batches_are_rejected(db, client):
+    barber = await create_user(db, "barber")
+    token = await create_session(db, barber)
+    assert _bulk(client, token, []).status_code == 422
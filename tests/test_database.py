@@ -0,0 +1,69 @@
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference
+
+import database
+from metrics import mongo_command_metrics, mongo_pool_metrics
+from resources import resources
+from tests.conftest import QueryCounter, create_shop, create_user
+
+pytestmark = pytest.mark.anyio
+
+POOL_ENV = (
+    "MONGO_MAX_POOL_SIZE", "MONGO_MIN_POOL_SIZE", "MONGO_MAX_IDLE_TIME_MS", "MONGO_WAIT_QUEUE_TIMEOUT_MS",
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS", "MONGO_COMPRESSORS", "MONGO_READ_ONLY_PREFERENCE",
+    "MONGO_MAX_STALENESS_SECONDS",
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    for name in POOL_ENV:
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_default_pool_options():
+    options = database.client_options()
+    assert {key: value for key, value in options.items() if key != "event_listeners"} == {
+        "maxPoolSize": 100,
+        "minPoolSize": 0,
+        "waitQueueTimeoutMS": 5000,
+        "serverSelectionTimeoutMS": 5000,
+    }
+    assert options["event_listeners"] == [mongo_command_metrics, mongo_pool_metrics]
+
+
+async def test_pool_options_reach_the_client(monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "25")
+    monkeypatch.setenv("MONGO_MIN_POOL_SIZE", "5")
+    monkeypatch.setenv("MONGO_MAX_IDLE_TIME_MS", "60000")
+    monkeypatch.setenv("MONGO_COMPRESSORS", "zlib")
+    assert database.client_options()["compressors"] == "zlib"
+
+    client = AsyncIOMotorClient("mongodb://127.0.0.1:1", connect=False, **database.client_options())
+    try:
+        pool = client.delegate.options.pool_options
+        assert (pool.max_pool_size, pool.min_pool_size, pool.max_idle_time_seconds) == (25, 5, 60)
+        assert pool.wait_queue_timeout == 5
+        assert mongo_pool_metrics in client.delegate.options.event_listeners
+    finally:
+        client.close()
+
+
+def test_read_preference_defaults_to_secondary_preferred(monkeypatch):
+    assert database.read_only_preference() == ReadPreference.SECONDARY_PREFERRED
+
+    monkeypatch.setenv("MONGO_READ_ONLY_PREFERENCE", "nearest")
+    monkeypatch.setenv("MONGO_MAX_STALENESS_SECONDS", "120")
+    preference = database.read_only_preference()
+    assert preference.mode == ReadPreference.NEAREST.mode
+    assert preference.max_staleness == 120
+
+
+async def test_search_reads_through_the_read_only_handle(db, client, monkeypatch):
+    await create_shop(db, await create_user(db, "barber"))
+    reads = QueryCounter(db)
+    monkeypatch.setattr(resources, "read_db", reads)
+
+    assert len(client.get("/api/barbers/shops").json()) == 1
+    assert reads.calls == [("barber_shops", "find")]
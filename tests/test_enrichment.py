@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.enrichment import attach_customers, attach_review_authors, attach_services, attach_shops
+from tests.conftest import QueryCounter, create_service, create_shop, create_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def _seed_bookings(db, count: int):
+    barber = await create_user(db, "barber")
+    shop = await create_shop(db, barber)
+    services = [await create_service(db, shop) for _ in range(3)]
+    customers = [await create_user(db, phone="050") for _ in range(5)]
+    now = datetime.utcnow()
+    bookings = [
+        {
+            "_id": f"booking_{i}",
+            "shop_id": shop["_id"],
+            "customer_id": customers[i % len(customers)]["_id"] if i % 7 else "guest",
+            "customer_name": f"Guest {i}",
+            "customer_phone": "052",
+            "service_ids": [services[i % 3]["_id"], services[(i + 1) % 3]["_id"]],
+            "created_at": now - timedelta(minutes=i)
+        }
+        for i in range(count)
+    ]
+    return shop, services, customers, bookings
+
+
+@pytest.mark.parametrize("count", [1, 10, 200])
+async def test_booking_enrichment_round_trips_do_not_grow(db, count):
+    _, _, _, bookings = await _seed_bookings(db, count)
+    counter = QueryCounter(db)
+
+    await attach_customers(counter, bookings)
+    await attach_services(counter, bookings)
+    await attach_shops(counter, bookings)
+
+    assert sorted(counter.calls) == [
+        ("barber_shops", "find"), ("services", "find"), ("users", "find")
+    ]
+
+
+async def test_enriched_fields(db):
+    shop, services, customers, bookings = await _seed_bookings(db, 8)
+    await attach_customers(db, bookings)
+    await attach_services(db, bookings)
+    await attach_shops(db, bookings)
+
+    guest = bookings[0]
+    assert guest["customer"] == {"name": "Guest 0", "phone": "052", "email": None}
+    known = bookings[1]
+    assert known["customer"]["name"] == customers[1]["name"]
+    assert [s["_id"] for s in known["services"]] == [services[1]["_id"], services[2]["_id"]]
+    assert known["shop"]["_id"] == shop["_id"]
+
+
+async def test_review_authors_in_one_query(db):
+    authors = [await create_user(db, picture=f"p{i}") for i in range(3)]
+    reviews = [{"_id": f"r{i}", "customer_id": authors[i % 3]["_id"]} for i in range(30)]
+    counter = QueryCounter(db)
+
+    await attach_review_authors(counter, reviews)
+
+    assert counter.calls == [("users", "find")]
+    assert reviews[4]["customer_name"] == authors[1]["name"]
+    assert reviews[4]["customer_picture"] == "p1"
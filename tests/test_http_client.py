@@ -0,0 +1,153 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+import pytest
+
+import http_client as http_client_module
+from http_client import HttpClient, http_client
+from routes import auth as auth_routes
+from tests.conftest import fastapi_app
+
+pytestmark = pytest.mark.anyio
+
+
+class StubAuthServer:
+    """Local stand-in for the OAuth provider that adds latency and failures"""
+
+    def __init__(self, delay: float = 0, failures: int = 0):
+        self.delay = delay
+        self.failures = failures
+        self.requests = 0
+        self.in_flight = 0
+        self.peak = 0
+        self.client_ports = set()
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    stub.in_flight += 1
+                    stub.peak = max(stub.peak, stub.in_flight)
+                    stub.client_ports.add(self.client_address[1])
+                    fail = stub.failures > 0
+                    stub.failures -= fail
+                time.sleep(stub.delay)
+                session_id = self.headers.get("X-Session-ID")
+                body = json.dumps({
+                    "email": f"{session_id}@example.com",
+                    "name": "OAuth Barber",
+                    "session_token": f"session_{session_id}"
+                }).encode()
+                with stub._lock:
+                    stub.in_flight -= 1
+                self.send_response(503 if fail else 200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_POST = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/session-data"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+async def pooled_client():
+    await http_client.start()
+    yield http_client
+    await http_client.close()
+
+
+async def test_slow_provider_does_not_block_other_routes(db, pooled_client, monkeypatch):
+    with StubAuthServer(delay=0.5) as stub:
+        monkeypatch.setattr(auth_routes, "EMERGENT_AUTH_URL", stub.url)
+        transport = httpx.ASGITransport(app=fastapi_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            exchanges = [
+                asyncio.create_task(http.post("/api/auth/barber/oauth/session", json={"session_id": f"s{i}"}))
+                for i in range(4)
+            ]
+            await asyncio.sleep(0.05)
+
+            latencies = []
+            while not all(task.done() for task in exchanges):
+                start = time.perf_counter()
+                assert (await http.get("/health")).status_code == 200
+                latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.02)
+            responses = await asyncio.gather(*exchanges)
+
+    assert [r.status_code for r in responses] == [200] * 4
+    assert await db.users.count_documents({"role": "barber"}) == 4
+    assert len(latencies) > 5
+    assert max(latencies) < 0.1
+    # The four exchanges ran concurrently rather than one after another
+    assert stub.peak == 4
+
+
+async def test_connections_are_kept_alive(pooled_client):
+    with StubAuthServer() as stub:
+        for i in range(5):
+            response = await http_client.get(stub.url, headers={"X-Session-ID": str(i)})
+            assert response.status_code == 200
+    assert stub.requests == 5
+    assert len(stub.client_ports) == 1
+
+
+async def test_transient_failures_are_retried(pooled_client, monkeypatch):
+    monkeypatch.setattr(http_client_module, "HTTP_BACKOFF_SECONDS", 0.01)
+    with StubAuthServer(failures=2) as stub:
+        response = await http_client.get(stub.url)
+    assert response.status_code == 200
+    assert stub.requests == 3
+
+    with StubAuthServer(failures=5) as stub:
+        response = await http_client.get(stub.url, retries=1)
+    assert response.status_code == 503
+    assert stub.requests == 2
+
+
+async def test_posts_are_not_retried_unless_asked(pooled_client, monkeypatch):
+    monkeypatch.setattr(http_client_module, "HTTP_BACKOFF_SECONDS", 0.01)
+    with StubAuthServer(failures=1) as stub:
+        response = await http_client.request("POST", stub.url)
+    assert response.status_code == 503
+    assert stub.requests == 1
+
+    with StubAuthServer(failures=1) as stub:
+        response = await http_client.request("POST", stub.url, retries=1)
+    assert response.status_code == 200
+    assert stub.requests == 2
+
+
+async def test_per_host_concurrency_limit(monkeypatch):
+    monkeypatch.setattr(http_client_module, "HTTP_PER_HOST_LIMIT", 2)
+    client = HttpClient()
+    await client.start()
+    try:
+        with StubAuthServer(delay=0.05) as stub:
+            await asyncio.gather(*(client.get(stub.url) for _ in range(8)))
+    finally:
+        await client.close()
+    assert stub.requests == 8
+    assert stub.peak == 2
@@ -0,0 +1,85 @@
+import os
+import uuid
+
+import pytest
+
+from indexes import INDEXES, QUERY_SHAPES, ensure_indexes, find_collscans
+
+pytestmark = pytest.mark.anyio
+
+MONGO_TEST_URL = os.environ.get("MONGO_TEST_URL")
+
+RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte", "$regex"}
+
+
+def _equality_fields(query: dict) -> set:
+    return {
+        field for field, value in query.items()
+        if not (isinstance(value, dict) and RANGE_OPERATORS & set(value))
+    }
+
+
+def _index_keys(index) -> list:
+    return [field for field, _ in index.document["key"].items()]
+
+
+def test_every_query_shape_has_a_usable_index():
+    """A planner-free stand-in for find_collscans, runnable without a server"""
+    missing = []
+    for collection, query, sort in QUERY_SHAPES:
+        usable = [
+            index for index in INDEXES.get(collection, [])
+            if _index_keys(index)[0] in query and _equality_fields(query) <= set(_index_keys(index))
+        ]
+        if not usable:
+            missing.append((collection, query, sort))
+    assert missing == []
+
+
+def test_every_registered_collection_has_a_query_shape():
+    assert {collection for collection, _, _ in QUERY_SHAPES} == set(INDEXES)
+
+
+async def test_ensure_indexes_is_idempotent(db):
+    await ensure_indexes(db)
+    await ensure_indexes(db)
+    for collection, indexes in INDEXES.items():
+        info = await db[collection].index_information()
+        assert {index.document["name"] for index in indexes} <= set(info)
+
+
+class _ExplainDatabase:
+    """Returns canned plans: COLLSCAN for one collection, index scans for the rest"""
+
+    def __init__(self, scanned: str):
+        self.scanned = scanned
+
+    async def command(self, name, command, verbosity):
+        if command["find"] == self.scanned:
+            # Classic engine, with the scan below a SORT stage
+            return {"queryPlanner": {"winningPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}}}
+        # Slot-based engine nests the plan under queryPlan
+        return {"queryPlanner": {"winningPlan": {"queryPlan": {
+            "stage": "FETCH", "inputStage": {"stage": "IXSCAN"}
+        }}}}
+
+
+async def test_find_collscans_reports_scanning_shapes():
+    offenders = await find_collscans(_ExplainDatabase("reviews"))
+    expected = [shape for shape in QUERY_SHAPES if shape[0] == "reviews"]
+    assert len(offenders) == len(expected)
+    assert all(offender.startswith("reviews ") for offender in offenders)
+
+
+@pytest.mark.skipif(not MONGO_TEST_URL, reason="set MONGO_TEST_URL to explain against a real server")
+async def test_no_collscans_against_a_real_server():
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(MONGO_TEST_URL)
+    database = client[f"zenchair_test_{uuid.uuid4().hex[:8]}"]
+    try:
+        await ensure_indexes(database)
+        assert await find_collscans(database) == []
+    finally:
+        await client.drop_database(database.name)
+        client.close()
@@ -0,0 +1,111 @@
+import io
+import json
+import logging
+import queue
+import sys
+import time
+
+import pytest
+
+import log_config
+from log_config import DroppingQueueHandler, SamplingFilter, parse_sample_rates, setup_logging, shutdown_logging
+
+
+class SlowStream(io.StringIO):
+    """A stdout whose writes block, like a full pipe to a log shipper"""
+
+    def __init__(self, delay: float = 0):
+        super().__init__()
+        self.delay = delay
+
+    def write(self, text):
+        time.sleep(self.delay)
+        return super().write(text)
+
+
+@pytest.fixture
+def logging_to(monkeypatch):
+    """Re-run setup_logging against a given stdout; restores the test setup after"""
+    def setup(stream):
+        shutdown_logging()
+        monkeypatch.setattr(sys, "stdout", stream)
+        setup_logging()
+
+    yield setup
+    shutdown_logging()
+    monkeypatch.undo()
+    for name in log_config.UVICORN_LOGGERS:
+        logging.getLogger(name).handlers.clear()
+    setup_logging()
+
+
+def _uvicorn_defaults(stream):
+    # What uvicorn's LOGGING_CONFIG sets up before it imports the app
+    for name, propagate in (("uvicorn", True), ("uvicorn.access", False)):
+        logger = logging.getLogger(name)
+        logger.handlers[:] = [logging.StreamHandler(stream)]
+        logger.propagate = propagate
+        logger.setLevel(logging.INFO)
+
+
+def _lines(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_uvicorn_loggers_go_through_the_queue(logging_to):
+    stream = SlowStream()
+    _uvicorn_defaults(stream)
+    logging_to(stream)
+
+    for name in log_config.UVICORN_LOGGERS:
+        assert logging.getLogger(name).handlers == []
+        assert logging.getLogger(name).propagate
+    logging.getLogger("uvicorn.access").info('%s - "%s %s HTTP/%s" %d', "1.2.3.4:5", "GET", "/health", "1.1", 200)
+    logging.getLogger("uvicorn.error").warning("Shutting down")
+    shutdown_logging()
+
+    lines = _lines(stream)
+    assert [(line["logger"], line["level"]) for line in lines] == [
+        ("uvicorn.access", "INFO"), ("uvicorn.error", "WARNING")
+    ]
+    assert lines[0]["message"] == '1.2.3.4:5 - "GET /health HTTP/1.1" 200'
+
+
+def test_slow_output_does_not_block_logging_calls(logging_to):
+    stream = SlowStream(delay=0.02)
+    _uvicorn_defaults(stream)
+    logging_to(stream)
+
+    access = logging.getLogger("uvicorn.access")
+    start = time.perf_counter()
+    for i in range(20):
+        access.info("request %d", i)
+    elapsed = time.perf_counter() - start
+    shutdown_logging()
+
+    # Written inline, 20 lines would take at least 0.4 s
+    assert elapsed < 0.2
+    assert len(_lines(stream)) == 20
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for i in range(5):
+        handler.handle(logging.makeLogRecord({"msg": f"line {i}"}))
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_sampling_applies_per_event_and_never_to_warnings(monkeypatch):
+    rates = parse_sample_rates("socket.connect=0, socket.online=0.5, junk, socket.cap=7")
+    assert rates == {"socket.connect": 0.0, "socket.online": 0.5, "socket.cap": 1.0}
+    sampler = SamplingFilter(rates)
+
+    def record(level, event=None):
+        return logging.makeLogRecord({"levelno": level, **({"event": event} if event else {})})
+
+    assert not sampler.filter(record(logging.INFO, "socket.connect"))
+    assert sampler.filter(record(logging.WARNING, "socket.connect"))
+    assert sampler.filter(record(logging.INFO))
+    monkeypatch.setattr(log_config.random, "random", lambda: 0.4)
+    assert sampler.filter(record(logging.INFO, "socket.online"))
@@ -0,0 +1,133 @@
+import logging
+import re
+from types import SimpleNamespace
+
+import pytest
+
+import metrics
+from metrics import Counter, Gauge, Histogram, MetricsRegistry, MongoCommandMetrics, MongoPoolMetrics
+
+pytestmark = pytest.mark.anyio
+
+
+def _sample(text: str, name: str, **labels) -> float:
+    """Value of one series in Prometheus text output (0 if absent)"""
+    for line in text.splitlines():
+        match = re.match(r"^(\w+)(?:\{(.*)\})? (\S+)$", line)
+        if not match or match.group(1) != name:
+            continue
+        found = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', match.group(2) or ""))
+        if all(found.get(key) == value for key, value in labels.items()):
+            return float(match.group(3))
+    return 0
+
+
+def _render(*series) -> str:
+    registry = MetricsRegistry()
+    for metric in series:
+        registry._register(metric)
+    return registry.render()
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", ("route",))
+    for value in (0.002, 0.02, 0.3, 20):
+        latency.observe(("/x",), value)
+
+    text = registry.render()
+    assert "# TYPE latency_seconds histogram" in text
+    assert _sample(text, "latency_seconds_bucket", route="/x", le="0.005") == 1
+    assert _sample(text, "latency_seconds_bucket", route="/x", le="0.5") == 3
+    assert _sample(text, "latency_seconds_bucket", route="/x", le="+Inf") == 4
+    assert _sample(text, "latency_seconds_count", route="/x") == 4
+    assert _sample(text, "latency_seconds_sum", route="/x") == pytest.approx(20.322)
+
+
+async def test_requests_are_labelled_by_route_template(db, client):
+    before = client.get("/metrics").text
+    labels = {"method": "GET", "route": "/api/barbers/shops/{shop_id}", "status": "404"}
+    count = _sample(before, "http_request_duration_seconds_count", **labels)
+
+    for shop_id in ("shop_a", "shop_b", "shop_c"):
+        client.get(f"/api/barbers/shops/{shop_id}")
+
+    after = client.get("/metrics")
+    assert after.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert _sample(after.text, "http_request_duration_seconds_count", **labels) == count + 3
+    assert "shop_a" not in after.text
+    # Only the /metrics request itself is still in flight
+    assert _sample(after.text, "http_requests_in_flight", method="GET") == 1
+
+
+async def test_slow_requests_are_logged(db, client, monkeypatch, caplog):
+    monkeypatch.setattr(metrics, "HTTP_SLOW_REQUEST_MS", 0)
+    with caplog.at_level(logging.WARNING, logger="metrics"):
+        client.get("/health")
+    slow = [record for record in caplog.records if getattr(record, "event", None) == "http.slow"]
+    assert slow and slow[0].route == "/health"
+
+
+def _command_events(name, command, reply, micros, request_id=1):
+    base = {"connection_id": ("db", 27017), "request_id": request_id, "operation_id": request_id,
+            "command_name": name}
+    return (
+        SimpleNamespace(**base, command=command),
+        SimpleNamespace(**base, reply=reply, duration_micros=micros, failure={"errmsg": "boom"}),
+    )
+
+
+def test_mongo_commands_are_timed_per_collection(monkeypatch, caplog):
+    labels = ("collection", "command")
+    monkeypatch.setattr(metrics, "mongo_command_duration", Histogram("duration", "", labels))
+    monkeypatch.setattr(metrics, "mongo_documents_returned", Counter("returned", "", labels))
+    monkeypatch.setattr(metrics, "mongo_command_failures", Counter("failures", "", labels))
+    listener = MongoCommandMetrics()
+
+    started, done = _command_events(
+        "find", {"find": "bookings", "filter": {"shop_id": "s"}},
+        {"cursor": {"firstBatch": [{}, {}, {}]}}, 250_000
+    )
+    with caplog.at_level(logging.WARNING, logger="metrics"):
+        listener.started(started)
+        listener.succeeded(done)
+    more_started, more_done = _command_events(
+        "getMore", {"getMore": 42, "collection": "bookings"}, {"cursor": {"nextBatch": [{}]}}, 1_000, 2
+    )
+    listener.started(more_started)
+    listener.succeeded(more_done)
+    failed_started, failed = _command_events("insert", {"insert": "reviews"}, {}, 5_000, 3)
+    listener.started(failed_started)
+    listener.failed(failed)
+
+    text = _render(metrics.mongo_command_duration, metrics.mongo_documents_returned, metrics.mongo_command_failures)
+    assert _sample(text, "duration_count", collection="bookings", command="find") == 1
+    assert _sample(text, "duration_count", collection="bookings", command="getMore") == 1
+    assert _sample(text, "returned", collection="bookings", command="find") == 3
+    assert _sample(text, "returned", collection="bookings", command="getMore") == 1
+    assert _sample(text, "failures", collection="reviews", command="insert") == 1
+
+    slow = [record for record in caplog.records if getattr(record, "event", None) == "mongo.slow"]
+    assert slow[0].filter_keys == ["shop_id"] and slow[0].documents == 3
+    assert listener._pending == {}
+
+
+def test_pool_listener_tracks_checkouts_and_waiters(monkeypatch):
+    for name in ("mongo_pool_connections", "mongo_pool_checked_out", "mongo_pool_waiters"):
+        monkeypatch.setattr(metrics, name, Gauge(name, "", ("address",)))
+    listener = MongoPoolMetrics()
+    event = SimpleNamespace(address=("db", 27017), reason="timeout")
+
+    listener.connection_created(event)
+    listener.connection_check_out_started(event)
+    listener.connection_checked_out(event)
+    listener.connection_check_out_started(event)
+    listener.connection_check_out_failed(event)
+
+    text = _render(metrics.mongo_pool_connections, metrics.mongo_pool_checked_out, metrics.mongo_pool_waiters)
+    assert _sample(text, "mongo_pool_connections", address="db:27017") == 1
+    assert _sample(text, "mongo_pool_checked_out", address="db:27017") == 1
+    assert _sample(text, "mongo_pool_waiters", address="db:27017") == 0
+
+    listener.connection_checked_in(event)
+    assert metrics.mongo_pool_checked_out._values[("db:27017",)] == 0
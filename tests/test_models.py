@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from models import User, UserRole
+from tests.conftest import auth, create_session, create_user
+
+pytestmark = pytest.mark.anyio
+
+
+def _doc(**fields) -> dict:
+    return {
+        "_id": "user_1",
+        "email": "dana@example.com",
+        "name": "Dana",
+        "role": "barber",
+        "username": "dana",
+        "created_at": datetime(2025, 1, 1, tzinfo=timezone.utc),
+        "password_hash": "$2b$12$secret",
+        "favorites": ["shop_1"],
+        **fields
+    }
+
+
+@pytest.mark.parametrize("doc", [
+    _doc(),
+    _doc(role="customer", picture="https://example.com/p.png", phone="050"),
+    {"_id": "user_2", "email": "min@example.com", "name": "Min", "role": "admin"},
+])
+def test_from_db_matches_validation(doc):
+    fast, validated = User.from_db(doc), User.model_validate(doc)
+    assert fast.id == validated.id == doc["_id"]
+    assert fast.role is validated.role
+    assert isinstance(fast.role, UserRole)
+    exclude = {"created_at"} if "created_at" not in doc else set()
+    assert fast.model_dump(exclude=exclude) == validated.model_dump(exclude=exclude)
+
+
+def test_from_db_drops_fields_outside_the_model():
+    user = User.from_db(_doc())
+    assert "password_hash" not in user.model_dump()
+    assert not hasattr(user, "favorites")
+
+
+def test_from_db_fills_defaults():
+    user = User.from_db({"_id": "user_3", "email": "x@example.com", "name": "X"})
+    assert user.role is UserRole.CUSTOMER
+    assert user.phone is None
+    assert isinstance(user.created_at, datetime)
+
+
+def test_from_db_rejects_unknown_roles():
+    with pytest.raises(ValueError):
+        User.from_db(_doc(role="superuser"))
+
+
+async def test_authenticated_requests_build_users_from_db(db, client):
+    barber = await create_session(db, await create_user(db, "barber", password_hash="$2b$12$secret"))
+    customer = await create_session(db, await create_user(db))
+
+    # Barber-only routes check the role User.from_db restored
+    assert client.get("/api/barbers/shops/my", headers=auth(barber)).status_code == 404
+    assert client.get("/api/barbers/shops/my", headers=auth(customer)).status_code == 403
@@ -0,0 +1,167 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+import ws_handler
+from services import notifications
+from services.notifications import NotificationDispatcher, _coalesce, events_since, next_sequence
+from tests.conftest import booking_date, create_service, create_shop, create_user, fastapi_app
+
+pytestmark = pytest.mark.anyio
+
+
+class Recorder:
+    """emit(shop_id, event, data) that records, and can be slowed down or broken"""
+
+    def __init__(self, delay: float = 0, failing: bool = False):
+        self.delay = delay
+        self.failing = failing
+        self.emitted = []
+
+    async def __call__(self, shop_id, event, data):
+        await asyncio.sleep(self.delay)
+        if self.failing:
+            raise ConnectionError("socket gone")
+        self.emitted.append((shop_id, event, data))
+
+
+@pytest.fixture
+async def dispatcher(db):
+    dispatchers = []
+
+    def start(emit, **options):
+        dispatcher = NotificationDispatcher(**options)
+        dispatcher.start(lambda: db, emit)
+        dispatchers.append(dispatcher)
+        return dispatcher
+
+    yield start
+    for dispatcher in dispatchers:
+        await dispatcher.stop()
+
+
+async def _drained(db, timeout: float = 2):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while await db.notification_outbox.count_documents({"pending": True}):
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+async def test_published_events_are_delivered_in_order(db, dispatcher):
+    recorder = Recorder()
+    outbox = dispatcher(recorder)
+    seqs = [await outbox.publish(db, "shop_1", "new_booking", {"booking_id": f"b{i}"}) for i in range(5)]
+    await _drained(db)
+
+    assert seqs == [1, 2, 3, 4, 5]
+    assert [data for _, _, data in recorder.emitted] == [{"booking_id": f"b{i}", "seq": i + 1} for i in range(5)]
+    assert await db.notification_outbox.count_documents({"delivered_at": {"$exists": True}}) == 5
+
+
+def test_coalescing_keeps_the_newest_event_per_booking():
+    batch = [
+        {"_id": "s:1", "shop_id": "s", "seq": 1, "event": "booking_updated", "payload": {"booking_id": "b1"}},
+        {"_id": "s:2", "shop_id": "s", "seq": 2, "event": "booking_updated", "payload": {"booking_id": "b2"}},
+        {"_id": "s:3", "shop_id": "s", "seq": 3, "event": "booking_updated", "payload": {"booking_id": "b1"}},
+        {"_id": "s:4", "shop_id": "s", "seq": 4, "event": "bookings_updated", "payload": {"updates": []}},
+        {"_id": "s:5", "shop_id": "s", "seq": 5, "event": "bookings_updated", "payload": {"updates": []}},
+    ]
+    assert [doc["seq"] for doc in _coalesce(batch)] == [2, 3, 4, 5]
+
+
+async def test_booking_request_does_not_wait_for_delivery(db, dispatcher, monkeypatch):
+    recorder = Recorder(delay=0.5)
+    monkeypatch.setattr(ws_handler, "notification_dispatcher", dispatcher(recorder))
+
+    barber = await create_user(db, "barber")
+    shop = await create_shop(db, barber)
+    service = await create_service(db, shop)
+    transport = httpx.ASGITransport(app=fastapi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        start = asyncio.get_running_loop().time()
+        response = await http.post("/api/bookings/", json={
+            "shop_id": shop["_id"], "service_ids": [service["_id"]], "date": booking_date(),
+            "time": "10:00", "customer_name": "Dana", "customer_phone": "050"
+        })
+        elapsed = asyncio.get_running_loop().time() - start
+
+    assert response.status_code == 201
+    assert elapsed < 0.25
+    assert recorder.emitted == []
+    await _drained(db)
+    assert [event for _, event, _ in recorder.emitted] == ["new_booking"]
+
+
+async def test_full_queue_leaves_events_pending_for_the_sweeper(db, monkeypatch):
+    monkeypatch.setattr(notifications, "SWEEP_GRACE", timedelta(0))
+    monkeypatch.setattr(notifications, "NOTIFICATION_SWEEP_INTERVAL_SECONDS", 0.01)
+    recorder = Recorder()
+    outbox = NotificationDispatcher(queue_size=2, workers=1)
+    outbox._queue = asyncio.Queue(maxsize=2)  # no workers yet, so nothing drains
+
+    for i in range(5):
+        await outbox.publish(db, "shop_1", "new_booking", {"booking_id": f"b{i}"})
+    assert outbox._queue.qsize() == 2
+    assert await db.notification_outbox.count_documents({"pending": True}) == 5
+
+    # Once workers run, the sweeper re-queues what did not fit
+    outbox._queue = None
+    outbox._queued.clear()
+    outbox.start(lambda: db, recorder)
+    try:
+        await _drained(db)
+    finally:
+        await outbox.stop()
+    assert sorted(data["seq"] for _, _, data in recorder.emitted) == [1, 2, 3, 4, 5]
+
+
+async def test_failed_emits_stay_pending_and_count_attempts(db, dispatcher, monkeypatch):
+    monkeypatch.setattr(notifications, "NOTIFICATION_EMIT_RETRIES", 2)
+    outbox = dispatcher(Recorder(failing=True))
+    await outbox.publish(db, "shop_1", "new_booking", {"booking_id": "b1"})
+
+    deadline = asyncio.get_running_loop().time() + 2
+    while not (await db.notification_outbox.find_one({"_id": "shop_1:1"}))["attempts"]:
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+    doc = await db.notification_outbox.find_one({"_id": "shop_1:1"})
+    assert doc["pending"] and doc["attempts"] == 1
+
+
+async def test_replay_returns_events_after_a_seq(db):
+    outbox = NotificationDispatcher()
+    for i in range(4):
+        await outbox.publish(db, "shop_1", "booking_updated", {"booking_id": f"b{i}"})
+    await outbox.publish(db, "shop_2", "booking_updated", {"booking_id": "other"})
+
+    replay = await events_since(db, "shop_1", 2)
+    assert [event["seq"] for event in replay] == [3, 4]
+    assert replay[0]["data"] == {"booking_id": "b2", "seq": 3}
+
+
+async def _write_event(db, seq, created_at=None):
+    await db.notification_outbox.insert_one({
+        "_id": f"shop_1:{seq}", "shop_id": "shop_1", "seq": seq, "event": "new_booking",
+        "payload": {"booking_id": f"b{seq}"}, "created_at": created_at or datetime.utcnow()
+    })
+
+
+async def test_replay_stops_at_an_event_still_being_written(db):
+    first = await next_sequence(db, "shop_1")
+    second = await next_sequence(db, "shop_1")
+
+    # The second event lands while the first is still in flight
+    await _write_event(db, second)
+    assert await events_since(db, "shop_1", 0) == []
+
+    await _write_event(db, first)
+    assert [event["seq"] for event in await events_since(db, "shop_1", 0)] == [1, 2]
+
+
+async def test_replay_passes_gaps_older_than_the_grace_window(db):
+    settled = datetime.utcnow() - timedelta(seconds=notifications.NOTIFICATION_REPLAY_GRACE_SECONDS + 1)
+    await _write_event(db, 2, settled)
+    await _write_event(db, 3)
+    assert [event["seq"] for event in await events_since(db, "shop_1", 0)] == [2, 3]
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from tests.conftest import auth, booking_date, create_session, create_shop, create_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def _shop_with_bookings(db, dates):
+    barber = await create_user(db, "barber")
+    shop = await create_shop(db, barber)
+    now = datetime.utcnow()
+    await db.bookings.insert_many([
+        {
+            "_id": f"booking_{i:03d}",
+            "shop_id": shop["_id"],
+            "customer_id": "guest",
+            "customer_name": f"Guest {i}",
+            "service_ids": [],
+            "date": date,
+            "time": "10:00",
+            "status": "confirmed",
+            # Pairs share a timestamp, so the _id tie-break matters
+            "created_at": now - timedelta(minutes=i // 2)
+        }
+        for i, date in enumerate(dates)
+    ])
+    return shop, await create_session(db, barber)
+
+
+def _walk(client, path, token, **params):
+    pages, cursor = [], None
+    while True:
+        response = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})}, headers=auth(token))
+        assert response.status_code == 200
+        pages.append([booking["_id"] for booking in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
+
+
+async def test_shop_bookings_pages_cover_every_booking_once(db, client):
+    shop, token = await _shop_with_bookings(db, [booking_date(1)] * 23)
+    pages = _walk(client, f"/api/bookings/shop/{shop['_id']}", token, limit=5)
+
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    seen = [booking_id for page in pages for booking_id in page]
+    assert sorted(seen) == [f"booking_{i:03d}" for i in range(23)]
+
+
+async def test_shop_bookings_from_a_date(db, client):
+    past, today, later = booking_date(-3), booking_date(0), booking_date(4)
+    shop, token = await _shop_with_bookings(db, [past, today, later] * 20)
+    pages = _walk(client, f"/api/bookings/shop/{shop['_id']}", token, limit=7, date_from=today)
+
+    bookings = await db.bookings.find({"_id": {"$in": [b for page in pages for b in page]}}).to_list(None)
+    assert len(bookings) == 40
+    assert {booking["date"] for booking in bookings} == {today, later}
+
+
+@pytest.mark.parametrize("params", [{"date_from": "tomorrow"}, {"limit": 0}, {"limit": 1000}])
+async def test_shop_bookings_rejects_bad_parameters(db, client, params):
+    shop, token = await _shop_with_bookings(db, [booking_date(1)])
+    response = client.get(f"/api/bookings/shop/{shop['_id']}", params=params, headers=auth(token))
+    assert response.status_code == 422
+
+
+async def test_shop_bookings_rejects_foreign_cursors(db, client):
+    shop, token = await _shop_with_bookings(db, [booking_date(1)])
+    response = client.get(
+        f"/api/bookings/shop/{shop['_id']}", params={"cursor": "not-a-cursor"}, headers=auth(token)
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
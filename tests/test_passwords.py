@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+
+import bcrypt
+import pytest
+
+from services import passwords
+from tests.conftest import create_user
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def pool():
+    # The pool's semaphore belongs to the loop it starts on, like in the app
+    passwords.password_hasher.start()
+    yield passwords.password_hasher
+    passwords.password_hasher.shutdown()
+
+
+@pytest.fixture
+def fast_bcrypt(monkeypatch):
+    monkeypatch.setattr(passwords, "BCRYPT_ROUNDS", 4)
+
+
+async def test_hash_and_verify(fast_bcrypt):
+    hashed = await passwords.password_hasher.hash("s3cret")
+    assert hashed.startswith("$2b$04$")
+    assert await passwords.password_hasher.verify("s3cret", hashed)
+    assert not await passwords.password_hasher.verify("wrong", hashed)
+
+
+async def test_event_loop_keeps_running_during_hashing():
+    hashed = bcrypt.hashpw(b"s3cret", bcrypt.gensalt(rounds=10)).decode()
+    start = time.perf_counter()
+    bcrypt.checkpw(b"s3cret", hashed.encode())
+    blocking = time.perf_counter() - start
+    gaps = []
+
+    async def ticker(stop: asyncio.Event):
+        last = time.perf_counter()
+        while not stop.is_set():
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(stop))
+    await asyncio.gather(*(passwords.password_hasher.verify("s3cret", hashed) for _ in range(8)))
+    stop.set()
+    await tick
+
+    # Inline, the eight calls would stall the loop for 8x one call
+    assert max(gaps) < 4 * blocking
+
+
+async def test_concurrency_is_bounded(monkeypatch, pool):
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def slow_verify(password, hashed):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+        return True
+
+    monkeypatch.setattr(passwords, "_verify", slow_verify)
+    await asyncio.gather(*(passwords.password_hasher.verify("p", "h") for _ in range(40)))
+    assert peak <= pool.workers
+
+
+async def test_login_verifies_on_the_pool(db, client, fast_bcrypt):
+    hashed = await passwords.password_hasher.hash("s3cret")
+    await create_user(db, "barber", username="barber1", password_hash=hashed)
+
+    ok = client.post("/api/auth/barber/login", json={"username": "barber1", "password": "s3cret"})
+    assert ok.status_code == 200
+    assert ok.json()["session_token"]
+    bad = client.post("/api/auth/barber/login", json={"username": "barber1", "password": "nope"})
+    assert bad.status_code == 401
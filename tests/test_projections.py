@@ -0,0 +1,54 @@
+import pytest
+
+from tests.conftest import auth, create_session, create_shop, create_user
+
+pytestmark = pytest.mark.anyio
+
+GALLERY = ["/api/blobs/" + "a" * 64, "/api/blobs/" + "b" * 64]
+CARD_KEYS = {"_id", "name", "description", "location", "rating", "total_reviews", "is_open", "thumbnail"}
+
+
+async def _gallery_shop(db):
+    barber = await create_user(db, "barber")
+    return barber, await create_shop(db, barber, gallery_images=GALLERY, working_hours={"monday": {"open": "09:00"}})
+
+
+async def test_search_returns_cards(db, client):
+    await _gallery_shop(db)
+    shops = client.get("/api/barbers/shops").json()
+    assert set(shops[0]) == CARD_KEYS
+    assert shops[0]["thumbnail"] == GALLERY[0]
+
+
+async def test_detail_shape_drops_only_internal_fields(db, client):
+    await _gallery_shop(db)
+    shop = client.get("/api/barbers/shops", params={"shape": "detail"}).json()[0]
+    assert shop["gallery_images"] == GALLERY
+    assert "working_hours" in shop
+    assert not {"geo", "city_normalized"} & set(shop)
+
+
+async def test_favorites_and_recent_return_cards(db, client):
+    _, shop = await _gallery_shop(db)
+    customer = await create_user(db, favorites=[shop["_id"]])
+    token = await create_session(db, customer)
+    await db.bookings.insert_one({
+        "_id": "booking_1", "customer_id": customer["_id"], "shop_id": shop["_id"], "created_at": shop["created_at"]
+    })
+
+    # Paginated lists also carry their sort key for the cursor
+    for path, keys in (
+        ("/api/favorites/", CARD_KEYS | {"created_at"}),
+        ("/api/favorites/recent", CARD_KEYS),
+    ):
+        cards = client.get(path, headers=auth(token)).json()
+        assert [set(card) for card in cards] == [keys]
+        assert cards[0]["thumbnail"] == GALLERY[0]
+
+
+async def test_owner_gets_the_full_document(db, client):
+    barber, shop = await _gallery_shop(db)
+    token = await create_session(db, barber)
+    mine = client.get("/api/barbers/shops/my", headers=auth(token)).json()
+    assert mine["gallery_images"] == GALLERY
+    assert {"geo", "city_normalized", "working_hours"} <= set(mine)
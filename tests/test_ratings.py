@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from services import ratings
+from services.ratings import apply_rating_change, begin_rating_change, reconcile_ratings
+from tests.conftest import auth, create_session, create_shop, create_user
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def no_round(monkeypatch):
+    # mongomock cannot evaluate $round; the aggregates are what matter here
+    monkeypatch.setattr(ratings, "_derived_fields", lambda: {"total_reviews": "$rating_count"})
+
+
+async def _aggregates(db, shop):
+    stored = await db.barber_shops.find_one({"_id": shop["_id"]})
+    return stored["rating_sum"], stored["rating_count"]
+
+
+async def test_review_writes_keep_aggregates_in_step(db, client):
+    barber = await create_user(db, "barber")
+    shop = await create_shop(db, barber)
+    tokens = [await create_session(db, await create_user(db)) for _ in range(3)]
+
+    review_ids = [
+        client.post("/api/reviews/", json={"shop_id": shop["_id"], "rating": rating, "comment": "ok"},
+                    headers=auth(token)).json()["review_id"]
+        for rating, token in zip((5, 4, 2), tokens)
+    ]
+    assert await _aggregates(db, shop) == (11, 3)
+
+    assert client.put(f"/api/reviews/{review_ids[2]}", json={"rating": 3}, headers=auth(tokens[2])).status_code == 200
+    assert client.delete(f"/api/reviews/{review_ids[0]}", headers=auth(tokens[0])).status_code == 200
+    assert await _aggregates(db, shop) == (7, 2)
+    assert (await db.barber_shops.find_one({"_id": shop["_id"]}))["rating_changed_at"]
+
+    # Someone else's review is not found, and leaves the aggregates alone
+    assert client.delete(f"/api/reviews/{review_ids[1]}", headers=auth(tokens[2])).status_code == 404
+    assert await reconcile_ratings(db) == 0
+
+
+async def test_reconcile_repairs_old_drift(db):
+    barber = await create_user(db, "barber")
+    shop = await create_shop(db, barber, rating_sum=40, rating_count=9,
+                             rating_changed_at=datetime.utcnow() - timedelta(hours=1))
+    await db.reviews.insert_many([
+        {"_id": "r1", "shop_id": shop["_id"], "rating": 5},
+        {"_id": "r2", "shop_id": shop["_id"], "rating": 3},
+    ])
+
+    assert await reconcile_ratings(db) == 1
+    assert await _aggregates(db, shop) == (8, 2)
+
+
+async def test_reconcile_skips_recently_stamped_shops(db):
+    barber = await create_user(db, "barber")
+    shop = await create_shop(db, barber)
+    # A review written, but its aggregate change not yet applied
+    await begin_rating_change(db, shop["_id"])
+    await db.reviews.insert_one({"_id": "r1", "shop_id": shop["_id"], "rating": 4})
+
+    assert await reconcile_ratings(db) == 0
+    await apply_rating_change(db, shop["_id"], 4, 1)
+    assert await _aggregates(db, shop) == (4, 1)
+
+
+class _WriteDuringCount:
+    """Runs a review write while reconciliation counts the reviews"""
+
+    def __init__(self, db, write):
+        self._db = db
+        self._write = write
+        self.barber_shops = db.barber_shops
+        self.reviews = self
+
+    def aggregate(self, pipeline):
+        database, write = self._db, self._write
+
+        async def rows():
+            await write()
+            async for row in database.reviews.aggregate(pipeline):
+                yield row
+        return rows()
+
+
+async def test_review_written_during_reconciliation_is_counted_once(db):
+    barber = await create_user(db, "barber")
+    shop = await create_shop(db, barber, rating_sum=3, rating_count=1)
+    await db.reviews.insert_one({"_id": "r1", "shop_id": shop["_id"], "rating": 3})
+    # Drift from a crash long ago, so the shop is due for repair
+    await db.barber_shops.update_one({"_id": shop["_id"]}, {"$set": {
+        "rating_sum": 0, "rating_count": 0, "rating_changed_at": datetime.utcnow() - timedelta(hours=1)
+    }})
+
+    async def write_review():
+        await begin_rating_change(db, shop["_id"])
+        await db.reviews.insert_one({"_id": "r2", "shop_id": shop["_id"], "rating": 5})
+
+    # The count includes r2, but the stamp moved, so nothing is overwritten
+    assert await reconcile_ratings(_WriteDuringCount(db, write_review)) == 0
+    await apply_rating_change(db, shop["_id"], 5, 1)
+    assert await _aggregates(db, shop) == (5, 1)
+
+    # The old drift is repaired once the write is past the grace period
+    await db.barber_shops.update_one({"_id": shop["_id"]}, {"$set": {
+        "rating_changed_at": datetime.utcnow() - timedelta(hours=1)
+    }})
+    assert await reconcile_ratings(db) == 1
+    assert await _aggregates(db, shop) == (8, 2)
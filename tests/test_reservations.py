@@ -0,0 +1,102 @@
+from collections import Counter
+import asyncio
+
+import httpx
+import pytest
+
+from resources import resources
+from services.reservations import SlotUnavailable, lock_ids, release_slot, reserve_slot
+from tests.conftest import (
+    LatencyDatabase, booking_date, create_service, create_shop, create_user, fastapi_app
+)
+
+pytestmark = pytest.mark.anyio
+
+CONCURRENT_REQUESTS = 200
+
+
+async def _post_concurrently(payloads):
+    transport = httpx.ASGITransport(app=fastapi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        return await asyncio.gather(*(http.post("/api/bookings/", json=p) for p in payloads))
+
+
+def _payload(shop, service, date, time):
+    return {
+        "shop_id": shop["_id"],
+        "service_ids": [service["_id"]],
+        "date": date,
+        "time": time,
+        "customer_name": "Dana",
+        "customer_phone": "050"
+    }
+
+
+async def _shop_with_service(db, duration):
+    barber = await create_user(db, "barber")
+    shop = await create_shop(db, barber)
+    return shop, await create_service(db, shop, duration=duration)
+
+
+async def test_concurrent_requests_for_one_slot_book_it_once(db):
+    shop, service = await _shop_with_service(db, 30)
+    date = booking_date()
+    # Every Mongo call yields, so the requests interleave past the
+    # in-memory availability check and race on the slot locks
+    resources.db = LatencyDatabase(db)
+
+    responses = await _post_concurrently(
+        [_payload(shop, service, date, "10:00")] * CONCURRENT_REQUESTS
+    )
+
+    statuses = Counter(r.status_code for r in responses)
+    assert statuses == {201: 1, 409: CONCURRENT_REQUESTS - 1}
+    assert await db.bookings.count_documents({"shop_id": shop["_id"]}) == 1
+    winner = next(r.json()["booking_id"] for r in responses if r.status_code == 201)
+    assert await db.slot_locks.count_documents({"booking_id": {"$ne": winner}}) == 0
+
+
+async def test_overlapping_intervals_at_different_starts_book_once(db):
+    shop, service = await _shop_with_service(db, 60)
+    date = booking_date()
+    resources.db = LatencyDatabase(db)
+    # 10:00, 10:05, ..., 10:55: any two of these 60-minute bookings overlap
+    starts = [f"10:{minute:02d}" for minute in range(0, 60, 5)]
+    payloads = [_payload(shop, service, date, start) for start in starts * 10]
+
+    responses = await _post_concurrently(payloads)
+
+    statuses = Counter(r.status_code for r in responses)
+    assert statuses == {201: 1, 409: len(payloads) - 1}
+    booking = await db.bookings.find_one({"shop_id": shop["_id"]})
+    assert await db.slot_locks.count_documents({}) == 12
+    assert await db.slot_locks.count_documents({"booking_id": booking["_id"]}) == 12
+
+
+async def test_reserve_slot_race(db):
+    latent = LatencyDatabase(db)
+    date = booking_date()
+
+    async def attempt(i):
+        try:
+            await reserve_slot(latent, f"b{i}", "shop", date, 600 + (i % 6) * 5, 660)
+            return True
+        except SlotUnavailable:
+            return False
+
+    results = await asyncio.gather(*(attempt(i) for i in range(CONCURRENT_REQUESTS)))
+    assert results.count(True) == 1
+
+
+async def test_adjacent_intervals_do_not_collide(db):
+    date = booking_date()
+    await reserve_slot(db, "a", "shop", date, 600, 630)
+    await reserve_slot(db, "b", "shop", date, 630, 660)
+    with pytest.raises(SlotUnavailable):
+        await reserve_slot(db, "c", "shop", date, 625, 635)
+    # The loser keeps none of the buckets it claimed before colliding
+    assert await db.slot_locks.count_documents({"booking_id": "c"}) == 0
+
+    await release_slot(db, "a")
+    await reserve_slot(db, "c", "shop", date, 600, 625)
+    assert lock_ids("shop", date, 600, 625)[-1] == f"shop|{date}|620"
@@ -0,0 +1,60 @@
+import pytest
+
+import database
+from resources import Resources, resources
+from services.passwords import PasswordHasher
+from services.shop_page import ShopPageCache
+from session_cache import SessionCache
+from tests.conftest import auth, create_session, create_shop, create_user, fastapi_app
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def app_resources(db):
+    """A separate Resources for the app, so routes can only reach it by injection"""
+    app_resources = Resources()
+    app_resources.db = db
+    app_resources.shop_page_cache = ShopPageCache()
+    app_resources.session_cache = SessionCache()
+    fastapi_app.state.resources = app_resources
+    yield app_resources
+    fastapi_app.state.resources = resources
+
+
+async def test_routes_use_the_injected_caches(db, client, app_resources):
+    barber = await create_user(db, "barber")
+    shop = await create_shop(db, barber)
+    token = await create_session(db, barber)
+
+    assert client.get(f"/api/barbers/shops/{shop['_id']}").json()["name"] == "Test Shop"
+    assert shop["_id"] in app_resources.shop_page_cache._pages
+    assert shop["_id"] not in resources.shop_page_cache._pages
+
+    response = client.put(
+        f"/api/barbers/shops/{shop['_id']}", json={"name": "Renamed"}, headers=auth(token)
+    )
+    assert response.status_code == 200
+    assert shop["_id"] not in app_resources.shop_page_cache._pages
+    assert client.get(f"/api/barbers/shops/{shop['_id']}").json()["name"] == "Renamed"
+
+
+async def test_sessions_resolve_through_the_injected_cache(db, client, app_resources, monkeypatch):
+    barber = await create_user(db, "barber")
+    await create_shop(db, barber)
+    token = await create_session(db, barber)
+    # The session is looked up in the injected database too
+    monkeypatch.setattr(resources, "db", None)
+
+    assert client.get("/api/barbers/shops/my", headers=auth(token)).status_code == 200
+    assert app_resources.session_cache.get(token)["_id"] == barber["_id"]
+    assert resources.session_cache.get(token) is None
+
+
+def test_bcrypt_pool_is_a_process_resource():
+    assert isinstance(resources.password_hasher, PasswordHasher)
+    assert Resources().password_hasher is resources.password_hasher
+
+
+def test_read_handles_come_from_dependencies_only():
+    assert not hasattr(database, "get_read_database")
@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+import json
+
+from bson import ObjectId
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+import orjson
+import pytest
+
+from responses import mongo_json
+from tests.conftest import auth, book, booking_date, create_service, create_session, create_shop, create_user
+
+pytestmark = pytest.mark.anyio
+
+
+def _booking(i: int = 0) -> dict:
+    return {
+        "_id": f"booking_{i}",
+        "shop_id": "shop_1",
+        "service_ids": ["service_1", "service_2"],
+        "date": "2025-01-15",
+        "time": "10:00",
+        "total_price": 80.5,
+        "status": "confirmed",
+        "customer": {"name": "Dana", "phone": "050", "email": None},
+        "created_at": datetime(2025, 1, 14, 9, 30, 15, 123456),
+        "updated_at": datetime(2025, 1, 14, 9, 30, tzinfo=timezone.utc),
+        "version": 7
+    }
+
+
+@pytest.mark.parametrize("content", [
+    _booking(),
+    [_booking(i) for i in range(3)],
+    {"amount": Decimal("12.50"), 5: "non-str key", "tags": ("a", "b")},
+])
+def test_encoding_matches_jsonable_encoder(content):
+    expected = json.loads(json.dumps(jsonable_encoder(content)))
+    assert orjson.loads(mongo_json(content).body) == expected
+
+
+def test_object_ids_are_strings():
+    content = {"_id": ObjectId("65a1b2c3d4e5f60718293a4b")}
+    assert orjson.loads(mongo_json(content).body) == {"_id": "65a1b2c3d4e5f60718293a4b"}
+
+
+def test_route_headers_are_carried_over():
+    route_response = Response()
+    route_response.headers["X-Next-Cursor"] = "abc"
+    response = mongo_json([], route_response)
+    assert response.headers["X-Next-Cursor"] == "abc"
+    assert response.headers["content-type"] == "application/json"
+    assert response.body == b"[]"
+
+
+async def test_routes_return_iso_datetimes(db, client):
+    barber = await create_user(db, "barber")
+    shop = await create_shop(db, barber)
+    service = await create_service(db, shop)
+    book(client, shop, service, booking_date(), "10:00")
+
+    listing = client.get(f"/api/bookings/shop/{shop['_id']}", headers=auth(await create_session(db, barber)))
+    booking = listing.json()[0]
+    assert datetime.fromisoformat(booking["created_at"])
+    assert booking["services"][0]["_id"] == service["_id"]
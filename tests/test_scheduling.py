@@ -0,0 +1,62 @@
+import pytest
+
+from services.scheduling import DaySchedule, booking_interval, parse_minutes, total_duration
+from tests.conftest import available_slots, book, booking_date, create_service, create_shop, create_user
+
+pytestmark = pytest.mark.anyio
+
+
+def test_overlap_uses_half_open_intervals():
+    day = DaySchedule(parse_minutes("09:00"), parse_minutes("18:00"))
+    day.add("long", 600, 690)  # 10:00-11:30
+    day.add("short", 720, 750)  # 12:00-12:30
+
+    assert day.overlaps(660, 690)
+    assert day.overlaps(570, 601)
+    assert not day.overlaps(690, 720)
+    assert not day.overlaps(570, 600)
+    # A short booking after a long one must not hide the long one's end
+    day.add("inner", 610, 620)
+    assert day.overlaps(680, 700)
+
+
+def test_remove_and_replace():
+    day = DaySchedule(540, 1080)
+    day.add("b", 600, 660)
+    day.add("b", 700, 730)
+    assert not day.overlaps(600, 660)
+    assert day.overlaps(700, 701)
+    day.remove("b")
+    assert len(day) == 0
+    assert not day.overlaps(0, 1440)
+
+
+def test_free_starts_respect_duration_and_hours():
+    day = DaySchedule(540, 720)  # 09:00-12:00
+    day.add("b", 600, 690)  # 10:00-11:30
+    assert day.free_starts(30) == ["09:00", "09:30", "11:30"]
+    assert day.free_starts(60) == ["09:00"]
+
+
+def test_durations_and_legacy_bookings():
+    assert total_duration([{"duration": 45}, {"duration": 45}]) == 90
+    assert total_duration([]) == 30
+    assert booking_interval({"time": "10:00"}) == (600, 630)
+    assert booking_interval({"time": "10:00", "start_minute": 600, "end_minute": 690}) == (600, 690)
+
+
+async def test_long_booking_blocks_every_slot_it_covers(db, client):
+    barber = await create_user(db, "barber")
+    shop = await create_shop(db, barber)
+    long_service = await create_service(db, shop, duration=90)
+    short_service = await create_service(db, shop, duration=30)
+    date = booking_date()
+
+    assert book(client, shop, long_service, date, "10:00").status_code == 201
+
+    slots = available_slots(client, shop, short_service, date)
+    assert "09:30" in slots and "11:30" in slots
+    assert not {"10:00", "10:30", "11:00"} & set(slots)
+    assert book(client, shop, short_service, date, "11:00").status_code == 409
+    # Ending exactly when the long booking starts is fine
+    assert book(client, shop, short_service, date, "09:30").status_code == 201
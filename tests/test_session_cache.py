@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+import session_cache as session_cache_module
+from resources import resources
+from session_cache import SESSION_CACHE_TTL_SECONDS, SessionCache
+from tests.conftest import QueryCounter, auth, create_session, create_user
+
+pytestmark = pytest.mark.anyio
+
+LATER = datetime.now(timezone.utc) + timedelta(days=1)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(session_cache_module, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = SessionCache(ttl_seconds=5)
+    cache.put("t", {"_id": "u"}, LATER)
+    clock[0] += 4.9
+    assert cache.get("t") == {"_id": "u"}
+    clock[0] += 0.2
+    assert cache.get("t") is None
+
+
+def test_expired_sessions_are_never_served():
+    cache = SessionCache()
+    cache.put("t", {"_id": "u"}, datetime.now(timezone.utc) - timedelta(seconds=1))
+    assert cache.get("t") is None
+
+
+def test_lru_eviction_and_user_invalidation():
+    cache = SessionCache(max_size=2)
+    cache.put("a", {"_id": "u1"}, LATER)
+    cache.put("b", {"_id": "u2"}, LATER)
+    cache.get("a")
+    cache.put("c", {"_id": "u1"}, LATER)
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+
+    cache.invalidate_user("u1")
+    assert cache.get("a") is None and cache.get("c") is None
+
+
+def test_default_ttl_bounds_cross_worker_staleness():
+    # Logout only clears the worker that served it; others rely on the TTL
+    assert SESSION_CACHE_TTL_SECONDS <= 5
+
+
+async def test_other_workers_stop_accepting_a_logged_out_token(db, client, clock):
+    user = await create_user(db)
+    token = await create_session(db, user)
+    other_worker = SessionCache()
+    other_worker.put(token, user, LATER)
+
+    assert client.post("/api/auth/logout", headers=auth(token)).status_code == 200
+
+    assert other_worker.get(token) is not None
+    clock[0] += SESSION_CACHE_TTL_SECONDS + 0.1
+    assert other_worker.get(token) is None
+
+
+async def test_logout_takes_effect_on_the_serving_worker(db, client):
+    user = await create_user(db)
+    token = await create_session(db, user)
+    assert client.get("/api/bookings/my", headers=auth(token)).status_code == 200
+
+    # Served from the cache while warm
+    counter = QueryCounter(db)
+    resources.db = counter
+    assert client.get("/api/bookings/my", headers=auth(token)).status_code == 200
+    assert ("user_sessions", "find_one") not in counter.calls
+
+    resources.db = db
+    client.post("/api/auth/logout", headers=auth(token))
+    assert client.get("/api/bookings/my", headers=auth(token)).status_code == 401
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from services import shop_page as shop_page_module
+from services.shop_page import ShopPageCache, load_shop_page
+from tests.conftest import LatencyDatabase, QueryCounter, auth, create_service, create_session, create_shop, create_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def _shop(db):
+    barber = await create_user(db, "barber")
+    shop = await create_shop(db, barber)
+    await create_service(db, shop, name="Cut")
+    customer = await create_user(db, name="Dana")
+    await db.reviews.insert_many([
+        {"_id": f"review_{i}", "shop_id": shop["_id"], "customer_id": customer["_id"],
+         "rating": rating, "comment": "", "created_at": shop["created_at"]}
+        for i, rating in enumerate((5, 5, 3))
+    ])
+    return barber, shop
+
+
+async def test_page_holds_every_section(db):
+    _, shop = await _shop(db)
+    page = await load_shop_page(db, shop["_id"])
+
+    assert [s["name"] for s in page["services"]] == ["Cut"]
+    assert page["products"] == []
+    assert len(page["reviews"]) == 3
+    assert page["reviews"][0]["customer_name"] == "Dana"
+    assert page["rating_histogram"] == {"1": 0, "2": 0, "3": 1, "4": 0, "5": 2}
+    assert not {"geo", "city_normalized"} & set(page)
+    assert await load_shop_page(db, "shop_missing") is None
+
+
+async def test_sections_load_concurrently(db):
+    _, shop = await _shop(db)
+    slow = LatencyDatabase(db, 0.05)
+
+    start = asyncio.get_running_loop().time()
+    await load_shop_page(slow, shop["_id"])
+    elapsed = asyncio.get_running_loop().time() - start
+    # Five queries plus the review authors; run one after another they take 0.3 s
+    assert elapsed < 0.2
+
+
+async def test_cache_hits_skip_the_database(db):
+    _, shop = await _shop(db)
+    cache = ShopPageCache()
+    counter = QueryCounter(db)
+
+    await cache.get(counter, shop["_id"])
+    misses = len(counter.calls)
+    await cache.get(counter, shop["_id"])
+    assert misses >= 5
+    assert len(counter.calls) == misses
+
+    cache.invalidate(shop["_id"])
+    await cache.get(counter, shop["_id"])
+    assert len(counter.calls) == 2 * misses
+
+
+async def test_load_racing_an_invalidation_is_not_cached(db, monkeypatch):
+    _, shop = await _shop(db)
+    cache = ShopPageCache()
+
+    async def invalidated_mid_load(db, shop_id):
+        page = await load_shop_page(db, shop_id)
+        cache.invalidate(shop_id)
+        return page
+
+    monkeypatch.setattr(shop_page_module, "load_shop_page", invalidated_mid_load)
+    assert await cache.get(db, shop["_id"]) is not None
+    assert shop["_id"] not in cache._pages
+    assert cache._generations == {}
+
+
+def test_invalidations_leave_no_bookkeeping_behind():
+    cache = ShopPageCache()
+    for i in range(100):
+        cache.invalidate(f"shop_{i}")
+    assert cache._generations == {}
+    assert cache._loading == {}
+
+
+async def test_cache_is_bounded(db):
+    cache = ShopPageCache(max_size=2)
+    barber = await create_user(db, "barber")
+    shops = [await create_shop(db, barber) for _ in range(3)]
+    for shop in shops:
+        await cache.get(db, shop["_id"])
+    assert list(cache._pages) == [shops[1]["_id"], shops[2]["_id"]]
+
+
+async def test_route_serves_fresh_page_after_a_write(db, client):
+    barber, shop = await _shop(db)
+    token = await create_session(db, barber)
+
+    first = client.get(f"/api/barbers/shops/{shop['_id']}").json()
+    assert [s["name"] for s in first["services"]] == ["Cut"]
+
+    created = client.post(
+        "/api/services/", params={"shop_id": shop["_id"]}, headers=auth(token),
+        json={"name": "Shave", "description": "", "price": 30, "duration": 15}
+    )
+    assert created.status_code == 201
+    second = client.get(f"/api/barbers/shops/{shop['_id']}").json()
+    assert [s["name"] for s in second["services"]] == ["Cut", "Shave"]
+
+    assert client.get("/api/barbers/shops/shop_missing").status_code == 404
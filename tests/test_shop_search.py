@@ -0,0 +1,110 @@
+import base64
+import json
+
+import pytest
+
+from services.shop_search import find_nearby_shops
+from tests.conftest import create_shop, create_user
+
+pytestmark = pytest.mark.anyio
+
+
+def _raw_cursor(position) -> str:
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+async def _shops(db, count, city="Tel Aviv", prefix="shop"):
+    barber = await create_user(db, "barber")
+    return [
+        await create_shop(
+            db, barber, _id=f"{prefix}_{i:03d}", name=f"Shop {i}",
+            location={"address": "x", "city": city, "latitude": 32.0, "longitude": 34.0},
+            city_normalized=city.lower()
+        )
+        for i in range(count)
+    ]
+
+
+async def test_city_search_pages_with_cursor(db, client):
+    await _shops(db, 5)
+    await _shops(db, 2, city="Haifa", prefix="haifa")
+
+    first = client.get("/api/barbers/shops", params={"city": " tel", "limit": 3})
+    assert first.status_code == 200
+    assert [s["_id"] for s in first.json()] == ["shop_000", "shop_001", "shop_002"]
+    assert set(first.json()[0]) >= {"name", "thumbnail", "rating"}
+
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get("/api/barbers/shops", params={"city": "tel", "limit": 3, "cursor": cursor})
+    assert [s["_id"] for s in second.json()] == ["shop_003", "shop_004"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+@pytest.mark.parametrize("position", [
+    {"x": 1},
+    {},
+    {"id": 5},
+    {"id": "shop_001", "d": 1.5},
+    {"t": "2025-01-01T00:00:00", "id": "booking_1"},
+    ["shop_001"],
+])
+async def test_city_search_rejects_foreign_cursors(db, client, position):
+    response = client.get("/api/barbers/shops", params={"cursor": _raw_cursor(position)})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.parametrize("position", [
+    {"x": 1},
+    {"id": "shop_001"},
+    {"d": "near", "id": "shop_001"},
+    {"d": True, "id": "shop_001"},
+    {"d": 10.0, "id": 7},
+])
+async def test_nearby_search_rejects_foreign_cursors(db, client, position):
+    response = client.get("/api/barbers/shops", params={
+        "latitude": 32.0, "longitude": 34.0, "cursor": _raw_cursor(position)
+    })
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.parametrize("radius", [0, -5])
+async def test_radius_must_be_positive(db, client, radius):
+    response = client.get("/api/barbers/shops", params={
+        "latitude": 32.0, "longitude": 34.0, "radius_km": radius
+    })
+    assert response.status_code == 422
+
+
+class _GeoDatabase:
+    """Captures the $geoNear pipeline (mongomock cannot run it)"""
+
+    def __init__(self, results):
+        self.results = results
+        self.pipeline = None
+        self.barber_shops = self
+
+    def aggregate(self, pipeline):
+        self.pipeline = pipeline
+        return self
+
+    async def to_list(self, length):
+        return self.results[:length]
+
+
+async def test_nearby_search_resumes_after_the_last_distance():
+    db = _GeoDatabase([
+        {"_id": f"shop_{i}", "distance_m": 100.0 * i, "name": "s", "gallery_images": []}
+        for i in range(3)
+    ])
+
+    shops, position = await find_nearby_shops(db, 32.0, 34.0, 5, 2)
+    assert [s["_id"] for s in shops] == ["shop_0", "shop_1"]
+    assert position == {"d": 100.0, "id": "shop_1"}
+    assert db.pipeline[0]["$geoNear"]["maxDistance"] == 5000
+
+    await find_nearby_shops(db, 32.0, 34.0, 5, 2, after=position)
+    geo_near, match = db.pipeline[0]["$geoNear"], db.pipeline[1]["$match"]
+    assert geo_near["minDistance"] == 100.0
+    assert {"distance_m": 100.0, "_id": {"$gt": "shop_1"}} in match["$or"]
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import socketio
+
+import ws_handler
+from resources import resources
+from tests.conftest import QueryCounter, create_session, create_shop, create_user
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def barber(db):
+    barber = await create_user(db, "barber")
+    shop = await create_shop(db, barber)
+    return barber, shop, await create_session(db, barber)
+
+
+@pytest.mark.parametrize("handshake", [
+    lambda token: ({}, {"token": token}),
+    lambda token: ({"HTTP_COOKIE": f"session_token={token}"}, None),
+    lambda token: ({"HTTP_AUTHORIZATION": f"Bearer {token}"}, None),
+])
+async def test_handshake_token_sources(db, sockets, barber, handshake):
+    user, shop, token = barber
+    environ, auth = handshake(token)
+    sid = await sockets.open()
+
+    await ws_handler.connect(sid, environ, auth)
+    assert sockets.sessions[sid] == {"user_id": user["_id"], "role": "barber", "shop_ids": {shop["_id"]}}
+    assert ws_handler.connected_users[user["_id"]] == sid
+
+
+@pytest.mark.parametrize("auth", [None, {"token": "session_unknown"}])
+async def test_unauthenticated_handshakes_are_refused(db, sockets, auth):
+    sid = await sockets.open()
+    with pytest.raises(socketio.exceptions.ConnectionRefusedError):
+        await ws_handler.connect(sid, {}, auth)
+    assert sid not in sockets.sessions
+
+
+async def test_expired_session_is_refused(db, sockets):
+    user = await create_user(db)
+    await db.user_sessions.insert_one({
+        "user_id": user["_id"], "session_token": "session_old",
+        "expires_at": datetime.now(timezone.utc) - timedelta(minutes=1)
+    })
+    with pytest.raises(socketio.exceptions.ConnectionRefusedError):
+        await ws_handler.connect(await sockets.open(), {}, {"token": "session_old"})
+
+
+async def test_reconnect_storm_reuses_the_cached_session(db, sockets, barber, monkeypatch):
+    _, _, token = barber
+    counter = QueryCounter(db)
+    monkeypatch.setattr(resources, "db", counter)
+
+    for _ in range(20):
+        await ws_handler.connect(await sockets.open(), {}, {"token": token})
+    session_lookups = [call for call in counter.calls if call[0] in ("user_sessions", "users")]
+    assert session_lookups == [("user_sessions", "find_one"), ("users", "find_one")]
+
+
+async def test_identity_comes_from_the_handshake(db, sockets, barber):
+    user, shop, token = barber
+    sid = await sockets.open()
+    await ws_handler.connect(sid, {}, {"token": token})
+
+    # A payload naming another user is ignored
+    await ws_handler.user_online(sid, {"user_id": "user_someone_else"})
+    assert ws_handler.user_by_sid[sid] == user["_id"]
+    assert "user_someone_else" not in ws_handler.connected_users
+
+    customer_sid = await sockets.open()
+    await ws_handler.connect(customer_sid, {}, {"token": await create_session(db, await create_user(db))})
+    refused = await ws_handler.subscribe_to_shop(customer_sid, {"shop_id": shop["_id"]})
+    assert refused == {"success": False, "error": "Not your shop"}
@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+import pytest
+import socketio
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+import ws_handler
+from ws_handler import create_client_manager, emit_to_shop, shop_room
+from tests.conftest import FakeSockets, create_shop, create_user
+
+pytestmark = pytest.mark.anyio
+
+
+class InMemoryBroker:
+    """Stand-in for Redis/AMQP: every published message reaches every worker"""
+
+    def __init__(self):
+        self.queues = []
+        self.published = []
+
+
+class BrokerManager(AsyncPubSubManager):
+    name = "memory"
+
+    def __init__(self, broker: InMemoryBroker):
+        super().__init__()
+        self.broker = broker
+        self.queue = asyncio.Queue()
+        broker.queues.append(self.queue)
+
+    async def _publish(self, data):
+        # Messages cross the broker as JSON, as they do over Redis
+        message = json.dumps(data)
+        self.broker.published.append(data)
+        for queue in self.broker.queues:
+            queue.put_nowait(message)
+
+    async def _listen(self):
+        while True:
+            yield await self.queue.get()
+
+
+@pytest.fixture
+async def workers():
+    broker = InMemoryBroker()
+    servers = [socketio.AsyncServer(async_mode="asgi", client_manager=BrokerManager(broker)) for _ in range(2)]
+    fakes = []
+    for server in servers:
+        server.manager.initialize()
+        fake = FakeSockets(server)
+        server._send_eio_packet = fake._send
+        fakes.append(fake)
+    yield broker, fakes
+    for server in servers:
+        server.manager.thread.cancel()
+
+
+async def _settle(broker):
+    while any(not queue.empty() for queue in broker.queues):
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+
+async def test_room_emit_reaches_sockets_on_other_workers(workers):
+    broker, (worker_a, worker_b) = workers
+    barber_on_b = await worker_b.open()
+    other_shop_on_b = await worker_b.open()
+    barber_on_a = await worker_a.open()
+    await worker_b.sio.enter_room(barber_on_b, shop_room("shop_1"))
+    await worker_b.sio.enter_room(other_shop_on_b, shop_room("shop_2"))
+    await worker_a.sio.enter_room(barber_on_a, shop_room("shop_1"))
+
+    await worker_a.sio.emit("new_booking", {"booking_id": "b1"}, room=shop_room("shop_1"))
+    await _settle(broker)
+
+    assert worker_b.events(barber_on_b) == [["new_booking", {"booking_id": "b1"}]]
+    assert worker_a.events(barber_on_a) == [["new_booking", {"booking_id": "b1"}]]
+    assert worker_b.events(other_shop_on_b) == []
+    # One broker message per emit, however many sockets are in the room
+    assert [message["method"] for message in broker.published] == ["emit"]
+
+
+async def test_client_manager_follows_the_message_queue_setting(monkeypatch):
+    monkeypatch.delenv("SOCKETIO_MESSAGE_QUEUE", raising=False)
+    assert type(create_client_manager()) is socketio.AsyncManager
+
+    monkeypatch.setenv("SOCKETIO_MESSAGE_QUEUE", "kafka://broker:9092")
+    with pytest.raises(ValueError):
+        create_client_manager()
+
+
+async def test_redis_url_selects_the_redis_manager(monkeypatch):
+    pytest.importorskip("redis")
+    monkeypatch.setenv("SOCKETIO_MESSAGE_QUEUE", "redis://localhost:6379/0")
+    assert isinstance(create_client_manager(), socketio.AsyncRedisManager)
+
+
+async def test_subscribers_get_their_shop_events_only(db, sockets):
+    barber = await create_user(db, "barber")
+    shop = await create_shop(db, barber)
+    other_shop = await create_shop(db, await create_user(db, "barber"))
+
+    subscribed, elsewhere = await sockets.open(), await sockets.open()
+    for sid in (subscribed, elsewhere):
+        await sockets.sio.save_session(sid, {"user_id": barber["_id"], "role": "barber", "shop_ids": {shop["_id"]}})
+    assert await ws_handler.subscribe_to_shop(subscribed, {"shop_id": shop["_id"]}) == {"success": True}
+    refused = await ws_handler.subscribe_to_shop(elsewhere, {"shop_id": other_shop["_id"]})
+    assert refused == {"success": False, "error": "Not your shop"}
+
+    await emit_to_shop(shop["_id"], "booking_cancelled", {"booking_id": "b1"})
+    assert sockets.events(subscribed) == [["booking_cancelled", {"booking_id": "b1"}]]
+    assert sockets.events(elsewhere) == []
+
+    await ws_handler.disconnect(subscribed)
+    assert subscribed not in ws_handler.shops_by_sid